@@ -0,0 +1,179 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : benchmark.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Time the parser, the scenario writer, the simulation loop and the error
+#                       computation on synthetic networks of increasing size
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Sizes and kinds of networks, optional baseline (JSON)
+# Output: Results (JSON), regressions against the baseline
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import argparse
+import datetime
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from lib.synthetic import writeNetwork
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+SIZES = [100, 1000, 10000, 100000, 200000]
+KINDS = ["grid", "tree"]
+BENCH_PATH = "networks/bench"
+RESULT_PATH = "results/bench_{0}.json".format(datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+TOLERANCE = 0.25            # Slowdown accepted before a regression is flagged
+SCENARIOS = 5               # Scenarios written / simulated by size
+PAIRS = 1000                # Junction pairs for the error computation
+SOURCES = 20                # Distinct predicted junctions of the pairs
+
+# ------------------------------------
+# Time a function
+# Return: duration [s]
+# ------------------------------------
+def timeit(function, *args):
+    tm = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - tm
+
+# ------------------------------------
+# Load epabstract.py on a network
+# ------------------------------------
+def loadEpabstract(path, sensors):
+    e = importlib.import_module("epabstract")
+    e.configure(path, sensors)
+    return e
+
+# ------------------------------------
+# Benchmark of one network
+# Return: dict of durations [s] by subsystem (None if skipped)
+# ------------------------------------
+def benchNetwork(kind, n):
+    r = {}
+    path = os.path.join(BENCH_PATH, "{0}_{1}.inp".format(kind, n))
+    sensors = os.path.join(BENCH_PATH, "{0}_{1}.csv".format(kind, n))
+    r["generate"] = timeit(writeNetwork, kind, n, path, sensors)
+    rnd = random.Random(n)
+
+    # -- Parser and scenario writer --
+    try:
+        e = loadEpabstract(path, sensors)
+    except ImportError as err:
+        print("epabstract.py not loaded ({0}), parser and scenarios skipped".format(err))
+        e = None
+    if e is not None:
+        r["parse"] = timeit(e.runSummary)
+        r["reset"] = timeit(e.reset)
+        t = 0.0
+        for i in range(SCENARIOS):
+            e.reset()
+            t += timeit(e.addLeaksMiddle, e.convertUnit("flow", 2/3600), rnd.randint(5, 95)/100, 1)
+        r["write_scenario"] = t / SCENARIOS
+        r["raster"] = timeit(e.drawNetwork, "PC")
+
+        # -- Native solver: leaks in the middle of random pipes --
+        e.reset()
+        solver = e.nativeSolver()
+        leaks = [(rnd.choice(solver.link_ids), rnd.randint(5, 95)/100, 2) for i in range(SCENARIOS)]
+        r["native_solve"] = timeit(solver.leakSweep, leaks, solver.ids[:1]) / SCENARIOS
+
+        # -- Simulation loop (external Epanet simulation) --
+        if importlib.util.find_spec("epanettools") is not None:
+            e.main_reset()
+            t = 0.0
+            for i in range(SCENARIOS):
+                e.reset()
+                node = e.addLeaksMiddle(e.convertUnit("flow", 2/3600), rnd.randint(5, 95)/100, 1)
+                t += timeit(e.sim, node, i + 1)
+            r["simulate"] = t / SCENARIOS
+        else:
+            r["simulate"] = None
+
+    # -- Error computation --
+    import errorComputation
+    errorComputation.PATH = path
+    errorComputation.hydraulic = None
+    sources = [rnd.randint(1, n) for i in range(SOURCES)]
+    pairs = [(rnd.choice(sources), rnd.randint(1, n)) for i in range(PAIRS)]
+    r["error_euclid"] = sum(timeit(errorComputation.get_distance, a, b) for a, b in pairs[:SCENARIOS]) / SCENARIOS
+    r["error_hydraulic"] = timeit(errorComputation.get_errors, [b for a, b in pairs], [a for a, b in pairs])
+    return r
+
+# ------------------------------------
+# Compare the results with a baseline
+# Return: list of regressions (text)
+# ------------------------------------
+def regressions(results, baseline, tolerance=TOLERANCE):
+    found = []
+    for network, r in results.items():
+        for subsystem, t in r.items():
+            t_base = baseline.get(network, {}).get(subsystem)
+            if t is not None and t_base and t > t_base * (1 + tolerance):
+                found.append("{0} {1}: {2:.4f} [s] (baseline {3:.4f} [s], +{4:.0f}%)".format(network, subsystem, t, t_base, 100 * (t / t_base - 1)))
+    return found
+
+# ------------------------------------
+# Main
+# ------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of epabstract on synthetic networks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--kinds", nargs="+", default=KINDS, choices=KINDS)
+    parser.add_argument("--output", default=RESULT_PATH)
+    parser.add_argument("--baseline", help="JSON of a previous run")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    for directory in (BENCH_PATH, "results/sim", os.path.dirname(args.output)):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    results = {}
+    for kind in args.kinds:
+        for n in args.sizes:
+            network = "{0}_{1}".format(kind, n)
+            print("-- {0} --".format(network))
+            results[network] = benchNetwork(kind, n)
+            for subsystem, t in results[network].items():
+                print("{0:<16}{1}".format(subsystem, "skipped" if t is None else "{0:.4f} [s]".format(t)))
+
+    output = {"date": str(datetime.datetime.now()), "python": platform.python_version(), "platform": platform.platform(), "results": results}
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print("Results saved in {0}".format(args.output))
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)["results"]
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print("REGRESSION " + line)
+        if found:
+            return 1
+        print("No regression against {0}".format(args.baseline))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -25,7 +25,11 @@
 # ------------------------------------
 # Import
 # ------------------------------------
+# Heavy and optional dependencies (epanettools, matplotlib, pandas, scipy, the
+# notification backends) are imported in the functions which use them
+import argparse
 import ast
+import copy
 import csv
 import datetime
 import importlib
@@ -34,30 +38,39 @@ import os
 import random
 import re
 import sys
+import tempfile
 import time
 from shutil import copyfile
 
-import epanettools.epanettools as epa
-import matplotlib.cm as cm
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 
-from matplotlib.ticker import MaxNLocator
-from mpl_toolkits.mplot3d import Axes3D
-from numpy.polynomial.polynomial import polyfit
-from prettytable import PrettyTable
-from pushbullet import Pushbullet
+from lib.augment import Augmenter
+from lib.notify import getNotifier
+from lib.profiler import CPROFILE_ENV, StageProfiler
+from lib.raster import rasterize, render
+from lib.telemetry import SimTelemetry
 
 # ------------------------------------
 # Constants
 # ------------------------------------
-PATH = sys.argv[1]
-CANNES_ID_FILES = sys.argv[2]
-SIM_RATIO = int(sys.argv[3])
-LEAK = sys.argv[4]
+PATH = "input.inp"                      # Set by configure()
+CANNES_ID_FILES = ""
+SIM_RATIO = 1
+LEAK = "fix"
+DESIGN = "random"                       # Scenario design (lib/design.py)
+ADAPTIVE = None                         # Tolerance of the early stop (lib/convergence.py), None: fixed run
+MONTECARLO = 0                          # Demand draws by leak scenario (lib/montecarlo.py), 0: base demands
+UNCERTAINTY = "normal"                  # Distribution of the drawn demands
+SEED = None                             # Seed of the leak scenarios, the augmentation and the demand draws
 RESULT_PATH = "results/dataset_{0}_{1}_{2}.csv".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
+METRICS_PATH = "results/metrics_{0}_{1}_{2}.prom".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
+FEASIBILITY_PATH = "results/feasibility_{0}_{1}_{2}.json".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
 DEBUG = 0
+SIM_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib", "sim.py")    # Any working directory
+SURROGATE_BATCH = 10000                 # Scenarios predicted at once by the surrogate
+SUPERNET_BATCH = 10000                  # Scenarios solved by one sweep of the super-network
+FAMILY_BATCH = 10000                    # Closures, valve or burst scenarios solved by one sweep
+MONTECARLO_BATCH = 10000                # Demand draws solved by one sweep
 COLOR_3D_TXT = 1
 JUNCTION_INFO_SIZE = 4
 RESERVOIR_INFO_SIZE = 3
@@ -65,7 +78,6 @@ TANK_INFO_SIZE = 8
 PIPE_INFO_SIZE = 8
 PUMP_INFO_SIZE = 8
 VALVE_INFO_SIZE = 8
-PUSHBULLET_API_KEY = "o.OMvCwTQLnDzXBIHJvV5uvpPjj4a70rnc"
 
 # ------------------------------------
 # Epanet Class
@@ -81,42 +93,336 @@ class EpanetFile:
             self.pipes = {}
             self.pumps = {}
             self.valves = {}
-            self.pipes_sim = []
+            self.pipes_sim = np.zeros(0, dtype=np.int64)    # Simulations by pipe ID
+            self.last_pipe = 0
             self.max_x = 0.0
             self.max_y = 0.0
+            self.options = {}           # Option (first word, upper case) -> value
             self.id_cannes = []
             self.result_path = result_path
             self.sim_cnt = 0
+            self.supernet_cnt = 0
+            self.feasibility = None     # Pressure feasibility of the last sim_data() (lib/feasibility.py)
     
     # ------------------------------------
     # Simulation method
     # ------------------------------------
-    def sim_data(self):
+    def sim_data(self, surrogate=None, cache=None, supernet=None, processes=None, engine="epanet", family=None):
+        from lib.feasibility import FeasibilityStats
         first = 1
         s = datetime.datetime.now()
         s_nbr = len(self.pipes) * SIM_RATIO
-        print("Starting {0} simulations at {1}".format(s_nbr, s))
-        for i in range(s_nbr):
+        print("Starting {0} simulations ({1} design) at {2}".format(s_nbr, DESIGN, s))
+        tm = SimTelemetry(s_nbr, "{0}_{1}_{2}".format(ntpath.basename(PATH), SIM_RATIO, LEAK), list(self.pipes.keys()), METRICS_PATH)
+        self.feasibility = FeasibilityStats([id for id in self.junctions if int(id) in self.id_cannes])
+        adaptive_msg = None
+        if family is not None:
+            self.sim_family(family, s_nbr, tm, processes, engine, supernet)
+        elif MONTECARLO:
+            self.sim_montecarlo(s_nbr, tm, processes, engine, supernet)
+        elif surrogate is not None:
+            self.sim_surrogate(surrogate, s_nbr, tm, cache)
+        elif supernet is not None:
+            self.sim_supernet(supernet, s_nbr, tm, processes, cache, engine)
+        elif ADAPTIVE is not None:
+            adaptive_msg = self.sim_adaptive(s_nbr, tm, cache)
+        else:
             reset()
-            if LEAK == "rand":
-                node = addLeaksMiddle(convertUnit("flow", random.randint(1, 10)/3600), random.randint(5, 95)/100, 1)
-            else:
-                node = addLeaksMiddle(convertUnit("flow", 2/3600), random.randint(5, 95)/100, 1)
-            sim(node, first)
-            first += 1
+            pipes, coefs, demands = self.scenarios(s_nbr, leakPipes())
+            for pipe, coef, demand in zip(pipes, coefs, demands):
+                if self.sim_leak(pipe, coef, demand, first, tm, cache) is not None:
+                    first += 1
+                tm.update(self.pipes_sim)
+        tm.finish(self.pipes_sim)
+        prof.finish()
         f = datetime.datetime.now()
-        sim_msg = "Simulations finished in {0}".format(f-s)
+        sim_msg = "Simulations finished in {0} ({1} failed)".format(f-s, tm.failures)
+        if surrogate is not None:
+            sim_msg += ", {0} by the surrogate".format(s_nbr - self.sim_cnt - (cache.hits if cache is not None else 0))
+        if family is not None:
+            sim_msg += ", {0} {1} scenarios".format(self.sim_cnt, family)
+        elif MONTECARLO:
+            sim_msg += ", {0} rows of {1} {2} demand draws by scenario".format(self.sim_cnt, MONTECARLO, UNCERTAINTY)
+        elif supernet is not None:
+            sim_msg += ", {0} on the super-network".format(self.supernet_cnt)
+        if adaptive_msg is not None:
+            sim_msg += "\n" + adaptive_msg
+        if cache is not None:
+            sim_msg += "\n" + cache.report()
+            cache.close()
+        sim_msg += "\n" + self.feasibility.report()
+        self.feasibility.save(FEASIBILITY_PATH)
         print(sim_msg)
         # Sending the notification
-        push = pb.push_note("WaterMon sim {0}_{1}_{2}".format(ntpath.basename(PATH), SIM_RATIO, LEAK), sim_msg)
+        notify("WaterMon sim {0}_{1}_{2}".format(ntpath.basename(PATH), SIM_RATIO, LEAK), sim_msg)
         # Histogram of the simulated pipes
-        bins = np.arange(0, Pipe.id_max, 1)
-        n, bin, patches = plt.hist(ef.pipes_sim, bins=bins, facecolor='g', alpha=0.75)
+        import matplotlib.pyplot as plt
+        plt.bar(np.arange(len(self.pipes_sim)), self.pipes_sim, width=1.0, color='g', alpha=0.75)
         plt.xlabel('Pipes')
         plt.ylabel('Simulations')
         plt.title('Histogram of simulated pipes')
         plt.grid(True)
 
+    # ------------------------------------
+    # Leak scenarios of the design (lib/design.py) on pipes between two junctions
+    # Return: lists of pipes, positions and demands
+    # ------------------------------------
+    def scenarios(self, s_nbr, pipes):
+        from lib.design import scenarios
+        if LEAK == "rand":
+            flow_range = (1/3600, 10/3600)
+        else:
+            flow_range = (2/3600, 2/3600)
+        # Generator seeded by --seed, new scenarios at every call (rounds of sim_adaptive)
+        pipes, coefs, flows = scenarios(DESIGN, pipes, [float(self.pipes[p].length) for p in pipes], s_nbr, flow_range, scenario_rng)
+        return pipes, coefs, [int(convertUnit("flow", f)) for f in flows]
+
+    # ------------------------------------
+    # Simulations on the super-network (lib/supernet.py): the INP is opened once by
+    # every worker, a scenario only sets the demand (or emitter) of a leak junction.
+    # The scenarios not converged in TRIALS are simulated with addLeaksMiddle
+    # ------------------------------------
+    def sim_supernet(self, supernet, s_nbr, tm, processes=None, cache=None, engine="epanet"):
+        from lib.supernet import TRIALS
+        sweep = sweeper(engine)
+        first = 1
+        reset()
+        sensors = [id for id in self.junctions if int(id) in self.id_cannes]
+        pipes, coefs, demands = self.scenarios(s_nbr, list(supernet.pipes))
+        leaks = [supernet.leakNode(p, c) for p, c in zip(pipes, coefs)]
+        # Closest node of the leak, as returned by addLeaksMiddle
+        nodes = [self.pipes[p].node1 if x >= 0.5 else self.pipes[p].node2 for p, (node, x) in zip(pipes, leaks)]
+        values = [float(d) for d in demands]
+        if supernet.emitter:
+            # Emitter coefficient giving the leak demand at the pressure without leak
+            leak_nodes = sorted(set(node for node, x in leaks))
+            base = dict(zip(leak_nodes, sweep(supernet.path, [([], 0)], leak_nodes, 1, trials=TRIALS)[0]))
+            exponent = float(self.options.get("EMITTER", "0.5").split()[-1])
+            values = [d / base[node] ** exponent if base[node] > 0 else 0.0 for d, (node, x) in zip(values, leaks)]
+        for start in range(0, s_nbr, SUPERNET_BATCH):
+            end = min(start + SUPERNET_BATCH, s_nbr)
+            cases = [([leaks[k][0]], values[k]) for k in range(start, end)]
+            try:
+                with prof.stage("supernet"):
+                    pressures = sweep(supernet.path, cases, sensors, processes, 0, supernet.emitter, TRIALS)
+            except RuntimeError as e:
+                tm.record(0, end - start)
+                if DEBUG:
+                    print("Simulations failed: {0}".format(e))
+                continue
+            converged = ~np.isnan(pressures).any(axis=1)
+            rows = np.flatnonzero(converged)
+            if len(rows):
+                p = convertUnit("pressure", pressures[rows])
+                leak_rows_to_csv(sensors, p, [nodes[start + k] for k in rows], first)
+                self.feasibility.add(p, [pipes[start + k] for k in rows], sensors)
+                first += len(rows)
+                tm.record(1, len(rows))
+            for k in range(end - start):
+                if converged[k]:
+                    countPipe(pipes[start + k])
+                elif self.sim_leak(pipes[start + k], leaks[start + k][1], demands[start + k], first, tm, cache) is not None:
+                    first += 1
+            self.sim_cnt += len(rows)
+            self.supernet_cnt += len(rows)
+            tm.update(self.pipes_sim)
+
+    # ------------------------------------
+    # Scenarios of a family (lib/families.py: closure, valve, burst) solved by batch
+    # as edits of the network opened once, the bursts are on the leak junctions of
+    # the super-network if given. The unbalanced scenarios and the closures
+    # disconnecting nodes from every source (not solved) are failures
+    # ------------------------------------
+    def sim_family(self, family, s_nbr, tm, processes=None, engine="epanet", supernet=None):
+        from lib.families import disconnecting, scenarios
+        from lib.supernet import TRIALS
+        sweep = sweeper(engine)
+        first = 1
+        reset()
+        sensors = [id for id in self.junctions if int(id) in self.id_cannes]
+        if family == "valve":
+            links = {id: (v.node1, v.node2, v.setting) for id, v in self.valves.items() if str(v.status).upper() != "CLOSED"}
+        else:
+            pipes = supernet.pipes if family == "burst" and supernet is not None else leakPipes()
+            links = {p: (self.pipes[p].node1, self.pipes[p].node2) for p in pipes if str(self.pipes[p].status).upper() != "CLOSED"}
+        path = supernet.path if family == "burst" and supernet is not None else self.path
+        cut = ()
+        if family != "burst":
+            opened = [(p, v.node1, v.node2) for p, v in self.pipes.items() if str(v.status).upper() != "CLOSED"]
+            opened += [(id, v.node1, v.node2) for id, v in self.valves.items() if str(v.status).upper() != "CLOSED"]
+            opened += [(id, v.node1, v.node2) for id, v in self.pumps.items()]
+            cut = disconnecting(opened, list(self.reservoirs) + list(self.tanks))
+        edits, nodes, pipes = scenarios(family, links, s_nbr, np.random.default_rng(random.getrandbits(32)), supernet if path != self.path else None, cut)
+        for start in range(0, s_nbr, FAMILY_BATCH):
+            end = min(start + FAMILY_BATCH, s_nbr)
+            solved = [k for k in range(start, end) if edits[k] is not None]
+            pressures = np.full((end - start, len(sensors)), np.nan)
+            try:
+                with prof.stage(family):
+                    pressures[np.asarray(solved, dtype=int) - start] = sweep(path, [edits[k] for k in solved], sensors, processes, trials=TRIALS)
+            except RuntimeError as e:
+                tm.record(0, end - start)
+                if DEBUG:
+                    print("Simulations failed: {0}".format(e))
+                continue
+            rows = np.flatnonzero(~np.isnan(pressures).any(axis=1))
+            if len(rows):
+                p = convertUnit("pressure", pressures[rows])
+                leak_rows_to_csv(sensors, p, [nodes[start + k] for k in rows], first)
+                self.feasibility.add(p, [pipes[start + k] for k in rows], sensors)
+                first += len(rows)
+                tm.record(1, len(rows))
+            tm.record(0, end - start - len(rows))
+            for k in rows:
+                if pipes[start + k] is not None:
+                    countPipe(pipes[start + k])
+            self.sim_cnt += len(rows)
+            tm.update(self.pipes_sim)
+
+    # ------------------------------------
+    # Leak scenarios on the super-network, every one solved with MONTECARLO draws of
+    # the base demands (lib/montecarlo.py), the rows are tagged with their draw
+    # ------------------------------------
+    def sim_montecarlo(self, s_nbr, tm, processes=None, engine="epanet", supernet=None):
+        from lib.montecarlo import DemandSampler
+        from lib.supernet import TRIALS
+        if engine == "epanet22":
+            from lib.epanet22 import Project as Session
+        else:
+            from lib.session import SolverSession as Session
+        sweep = sweeper(engine)
+        if supernet is None:
+            supernet = superNetwork()
+        first = 1
+        reset()
+        sensors = [id for id in self.junctions if int(id) in self.id_cannes]
+        # Base demands read by the engine of the sweeps
+        session = Session(supernet.path)
+        try:
+            base = session.baseDemands(list(self.junctions))
+        finally:
+            session.close()
+        sampler = DemandSampler(list(self.junctions), base, UNCERTAINTY)
+        pipes, coefs, demands = self.scenarios(s_nbr, list(supernet.pipes))
+        seeds = np.random.SeedSequence(SEED).generate_state(s_nbr)      # One seed by scenario
+        tm.total = s_nbr * MONTECARLO
+        step = max(1, MONTECARLO_BATCH // MONTECARLO)
+        for start in range(0, s_nbr, step):
+            end = min(start + step, s_nbr)
+            edits, nodes, draws, scenario = [], [], [], []
+            for i in range(start, end):
+                node, x = supernet.leakNode(pipes[i], coefs[i])
+                e, t = sampler.edits(int(seeds[i]), MONTECARLO, node, demands[i])
+                edits += e
+                draws += t
+                # Closest node of the leak, as returned by addLeaksMiddle
+                nodes += [self.pipes[pipes[i]].node1 if x >= 0.5 else self.pipes[pipes[i]].node2] * MONTECARLO
+                scenario += [i] * MONTECARLO
+            try:
+                with prof.stage("montecarlo"):
+                    pressures = sweep(supernet.path, edits, sensors, processes, trials=TRIALS)
+            except RuntimeError as e:
+                tm.record(0, len(edits))
+                if DEBUG:
+                    print("Simulations failed: {0}".format(e))
+                continue
+            rows = np.flatnonzero(~np.isnan(pressures).any(axis=1))
+            if len(rows):
+                p = convertUnit("pressure", pressures[rows])
+                leak_rows_to_csv(sensors, p, [nodes[k] for k in rows], first, [draws[k] for k in rows])
+                self.feasibility.add(p, [pipes[scenario[k]] for k in rows], sensors)
+                first += len(rows)
+                tm.record(1, len(rows))
+            tm.record(0, len(edits) - len(rows))
+            for k in rows:
+                countPipe(pipes[scenario[k]])
+            self.sim_cnt += len(rows)
+            tm.update(self.pipes_sim)
+
+    # ------------------------------------
+    # Simulations by rounds on the pipes not converged yet (lib/convergence.py),
+    # stopped when every pipe converged or at the end of the budget
+    # Return: report of the early stop
+    # ------------------------------------
+    def sim_adaptive(self, s_nbr, tm, cache=None):
+        from lib.convergence import ConvergenceTracker
+        first = 1
+        used = 0
+        reset()
+        tracker = ConvergenceTracker(leakPipes(), ADAPTIVE)
+        pending = tracker.pending()
+        while pending and used < s_nbr:
+            pending = pending[:s_nbr - used]
+            pipes, coefs, demands = self.scenarios(len(pending), pending)
+            for pipe, coef, demand in zip(pipes, coefs, demands):
+                df = self.sim_leak(pipe, coef, demand, first, tm, cache)
+                used += 1
+                if df is not None:
+                    tracker.add(pipe, df['pressure'].values)
+                    first += 1
+                tm.update(self.pipes_sim)
+            pending = tracker.pending()
+        tm.total = used
+        return tracker.report(s_nbr, used)
+
+    # ------------------------------------
+    # One leak scenario, from the cache (lib/cache.py) if it was already simulated
+    # Return: dataframe of the pressures added to the result CSV (None if failed)
+    # ------------------------------------
+    def sim_leak(self, pipe, coef, demand, first, tm, cache=None):
+        demand = int(demand)        # Demand of the leaking junction (see Junction)
+        key = cache.key(pipe, coef, demand) if cache is not None else None
+        value = cache.get(key) if cache is not None else None
+        try:
+            if value is not None:
+                countPipe(pipe)
+                with open(simResultFilename(), 'wb') as f:
+                    f.write(value)
+                df = sim_result(first)
+            else:
+                reset()
+                node = addLeaksMiddle(demand, coef, 1, pipe=pipe)
+                df = sim(node, first)
+                if cache is not None:
+                    with open(simResultFilename(), 'rb') as f:
+                        cache.put(key, f.read())
+            if self.feasibility is not None:
+                self.feasibility.add(df['pressure'].values, [pipe], df['id'].astype(str).values)
+            tm.record(1)
+            return df
+        except (RuntimeError, OSError, ValueError) as e:
+            tm.record(0)
+            if DEBUG:
+                print("Simulation failed: {0}".format(e))
+            return None
+
+    # ------------------------------------
+    # Simulations predicted by the surrogate (lib/surrogate.py) by batch, the
+    # scenarios out of its trusted range are simulated by Epanet
+    # ------------------------------------
+    def sim_surrogate(self, surrogate, s_nbr, tm, cache=None):
+        first = 1
+        pipes, coefs, demands = self.scenarios(s_nbr, surrogate.pipes)
+        # Closest node of the leak, as returned by addLeaksMiddle
+        nodes = [self.pipes[p].node1 if c >= 0.5 else self.pipes[p].node2 for p, c in zip(pipes, coefs)]
+        for start in range(0, s_nbr, SURROGATE_BATCH):
+            end = min(start + SURROGATE_BATCH, s_nbr)
+            with prof.stage("surrogate"):
+                pressures, error, trusted = surrogate.predict(pipes[start:end], coefs[start:end], demands[start:end])
+            rows = np.flatnonzero(trusted)
+            if len(rows):
+                p = convertUnit("pressure", pressures[rows])
+                leak_rows_to_csv(surrogate.sensors, p, [nodes[start + k] for k in rows], first)
+                self.feasibility.add(p, [pipes[start + k] for k in rows], surrogate.sensors)
+                first += len(rows)
+                tm.record(1, len(rows))
+            for k in range(end - start):
+                if trusted[k]:
+                    countPipe(pipes[start + k])
+                elif self.sim_leak(pipes[start + k], coefs[start + k], demands[start + k], first, tm, cache) is not None:
+                    first += 1
+            tm.update(self.pipes_sim)
+
 # -- Junction --
 class Junction:
     id_max = 0
@@ -198,7 +504,11 @@ class Tank:
 start_time = 0
 ef = EpanetFile("", PATH, RESULT_PATH)
 state = 0
-pb = Pushbullet(PUSHBULLET_API_KEY)
+notifier = None                 # Created on the first notification
+prof = StageProfiler()          # Enabled by --profile or EPABSTRACT_PROFILE=1
+augmenter = None                # Noisy rows added after every scenario (--augment N)
+scenario_rng = np.random.default_rng()  # Leak scenarios of the designs, seeded by configure()
+parsed = {}                     # Junctions and pipes of the default network by (path, mtime), see reset()
 state_d = {}
 state_d["TITLE"] = 1
 state_d["JUNCTIONS"] = 2
@@ -212,9 +522,40 @@ state_d["EMITTERS"] = 9
 state_d["STATUS"] = 10
 state_d["PATTERNS"] = 11
 state_d["DEMANDS"] = 12
+state_d["OPTIONS"] = 13
 green_3d = [83, 64, 76, 71, 77, 74, 65, 70, 69, 62]
 red_3d = [14, 15, 4, 20, 8, 5, 12, 9, 6, 10]
 
+# ------------------------------------
+# Select the network, the sensors and the run parameters
+# ------------------------------------
+def configure(path, cannes_id_files, sim_ratio=1, leak="fix", design="random", adaptive=None, augment=0, seed=None, montecarlo=0, uncertainty="normal"):
+    global PATH, CANNES_ID_FILES, SIM_RATIO, LEAK, DESIGN, ADAPTIVE, MONTECARLO, UNCERTAINTY, SEED, RESULT_PATH, METRICS_PATH, FEASIBILITY_PATH, ef, augmenter, scenario_rng
+    PATH = path
+    CANNES_ID_FILES = cannes_id_files
+    SIM_RATIO = int(sim_ratio)
+    LEAK = leak
+    DESIGN = design
+    ADAPTIVE = adaptive
+    MONTECARLO = int(montecarlo)
+    UNCERTAINTY = uncertainty
+    SEED = seed
+    scenario_rng = np.random.default_rng(seed)
+    augmenter = Augmenter(augment, seed=seed) if augment else None
+    RESULT_PATH = "results/dataset_{0}_{1}_{2}.csv".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
+    METRICS_PATH = "results/metrics_{0}_{1}_{2}.prom".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
+    FEASIBILITY_PATH = "results/feasibility_{0}_{1}_{2}.json".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
+    ef = EpanetFile("", PATH, RESULT_PATH)
+
+# ------------------------------------
+# Send a notification (asynchronous, backend selected by EPABSTRACT_NOTIFY)
+# ------------------------------------
+def notify(title, body):
+    global notifier
+    if notifier is None:
+        notifier = getNotifier()
+    notifier.send(title, body)
+
 # ------------------------------------
 # Tag detection
 # ------------------------------------
@@ -273,6 +614,11 @@ def getPattern(line):
     if _pattern.match(line):
         return state_d["PATTERNS"]
 
+def getOptions(line):
+    _option = re.compile(r'(^\[OPTIONS\])\s*([^\[]*)')
+    if _option.match(line):
+        return state_d["OPTIONS"]
+
 def getDemands(line):
     _demand = re.compile(r'(^\[DEMANDS\])\s*([^\[]*)')
     if _demand.match(line):
@@ -416,20 +762,16 @@ def savePumps():
         line = next(file, None)
         pumpsPart = 0
         while line:
-            s = getJunction(line)
+            s = getPump(line)
             if s == state_d["PUMPS"]:
                 pumpsPart = 1
                 line = next(file, None)
-                line = next(file, None) # Remove header line
-            if detectTag(line) is not None and pumpsPart is not 0:
+            if line is None or detectTag(line) is not None and pumpsPart != 0:
                 return 0
-            if pumpsPart and len(line.split()):
-                ls = line.split()
-                size = len(ls) - 1
-                if size < PUMP_INFO_SIZE:
-                    for j in range(size, PUMP_INFO_SIZE-1):
-                        ls[j] = ""
-                j = Pumps(ls[0], ls[1], ls[2], ls[3])
+            # Header and comment lines start with ";", the parameters are several words
+            if pumpsPart and len(line.split()) and not line.strip().startswith(";"):
+                ls = line.split(";")[0].split()
+                j = Pump(ls[0], ls[1], ls[2], " ".join(ls[3:]))
                 ef.pumps[j.id] = j
             line = next(file, None)
 
@@ -445,15 +787,11 @@ def saveValves():
             if s == state_d["VALVES"]:
                 valvesPart = 1
                 line = next(file, None)
-                line = next(file, None) # Remove header line
-            if detectTag(line) is not None and valvesPart is not 0:
+            if line is None or detectTag(line) is not None and valvesPart != 0:
                 return 0
-            if valvesPart and len(line.split()):
-                ls = line.split()
-                size = len(ls) - 1
-                if size < VALVE_INFO_SIZE:
-                    for j in range(size, VALVE_INFO_SIZE-1):
-                        ls[j] = ""
+            if valvesPart and len(line.split()) and not line.strip().startswith(";"):
+                ls = line.split(";")[0].split()
+                ls += [""] * (VALVE_INFO_SIZE - 1 - len(ls))     # Minor loss is optional
                 j = Valve(ls[0], ls[1], ls[2], ls[3], ls[4], ls[5], ls[6], "")
                 ef.valves[j.id] = j
             line = next(file, None)
@@ -546,54 +884,48 @@ def saveDemands():
                 if ls[0] in ef.junctions:
                     ef.junctions[ls[0]].demand = ls[1]
             line = next(file, None)
+
+# ------------------------------------
+# Save options (the section has no header line)
+# ------------------------------------
+def saveOptions():
+    with open(ef.path, 'r') as file:
+        line = next(file, None)
+        optionsPart = 0
+        while line:
+            s = getOptions(line)
+            if s == state_d["OPTIONS"]:
+                optionsPart = 1
+                line = next(file, None)
+            if detectTag(line) is not None and optionsPart != 0:
+                return 0
+            if optionsPart and len(line.split()) and not line.strip().startswith(";"):
+                ls = line.split()
+                ef.options[ls[0].upper()] = " ".join(ls[1:])
+            line = next(file, None)
+
 # ----------------------------------------------
 # Print the table of pressure
 # ----------------------------------------------
-def printPressure():
-    t = ["ID opened"]
-    for key, value in ef.junctions.items():
-        if int(value.id) in ef.id_cannes:
-            t.append(value.id)
-    prt = PrettyTable(t)
-    tbl_html = ""
-    row = ""
-    col = []
-    tbl_html += "["
-    row_index = "['"
-    line_index = "['"
-    for key, value in ef.junctions.items():
-        col.append(value.id)
-        sys.stdout.write("[" + value.id + "] ")
-        sys.stdout.flush()
-        if int(value.id) in ef.id_cannes:
-            writeBD(value.id, 10)
-            line_index += "Open: " + value.id + "', '"
-            row_index += value.id + "', '"
-            row = "["
-            for key_r, value_r in ef.junctions.items():
-                if int(value_r.id) in ef.id_cannes:
-                    row += "%.2f" % convertUnit("pressure", value_r.pressure) + ", "
-            row = row[:-2] + "]"
-            tbl_html += row + ", "
-    row_index = row_index[:-3] + "]"
-    line_index = line_index[:-3] + "]"
-    tbl_html = tbl_html[:-2] + "]"
-    data = np.array(ast.literal_eval(tbl_html))
-    data_index = data[0:,0]
-    data_f = pd.DataFrame(data=data, index=ast.literal_eval(line_index), columns=ast.literal_eval(row_index))
+def printPressure(demand=10, processes=None, engine="epanet"):
+    import pandas as pd
+    sensors = [value.id for key, value in ef.junctions.items() if int(value.id) in ef.id_cannes]
+    # One case by sensor: the sensor is opened with the demand
+    cases = [([j], demand) for j in sensors]
+    if engine == "native":
+        data = nativeSolver().sweep(cases, sensors)
+    else:
+        data = sweeper(engine)(ef.path, cases, sensors, processes)
+    data = np.round(convertUnit("pressure", data), 2)
+    data_f = pd.DataFrame(data=data, index=["Open: " + j for j in sensors], columns=sensors)
+    # Minimum pressure on a junction which is not the opened one
+    closed = data.copy()
+    np.fill_diagonal(closed, np.inf)
+    x_min, y_min = np.unravel_index(np.argmin(closed), closed.shape)
+    min = closed[x_min, y_min]
     f = open("results/tbl_open.html", 'w')
-    min = 1
-    x_min = ""
-    y_min = ""
-    for i in ast.literal_eval(row_index):
-        if len(data_f[i].idxmin().split()) >= 2:
-            if int(data_f[i].idxmin().split()[1]) is not int(i):
-                if data_f[i][data_f[i].idxmin()] < min and data_f[i].idxmin() is not ("Opened: " + i):
-                    min = data_f[i][data_f[i].idxmin()]
-                    x_min = data_f[i].idxmin()
-                    y_min = i
-    f.write("Pressure on junction " + str(y_min) + " with " + str(x_min.split()[1]) + " open is minimum on the network with <strong>" + str(min) + " [Pa]</strong><br />")
-    f.write("Simulation for a null pressure on junction " + str(y_min) + " with " + str(x_min.split()[1]) + " open")
+    f.write("Pressure on junction " + str(sensors[y_min]) + " with " + str(sensors[x_min]) + " open is minimum on the network with <strong>" + str(min) + " [Pa]</strong><br />")
+    f.write("Simulation for a null pressure on junction " + str(sensors[y_min]) + " with " + str(sensors[x_min]) + " open")
     f.write(data_f.to_html())
     f.close()
     print("\nArray of pressure exported")
@@ -601,55 +933,20 @@ def printPressure():
 # ------------------------------------
 # Draw the junctions
 # ------------------------------------
-def drawNetwork(type):
-    if type is "EC":
-        graph = ""
-        print("Position X max: ", ef.max_x)
-        print("Position Y max: ", ef.max_y)
-        ratio_x = 125/float(ef.max_x)
-        ratio_y = 75/float(ef.max_y)
-        a = np.zeros(shape=(125,75))
-        for key, value in ef.junctions.items():
-            x = int(float(value.posX)*ratio_x)-1
-            y = int(float(value.posY)*ratio_y)-1
-            if value.ec is not 0:
-                a[x][y] = float(value.ec)
-            else:
-                a[x][y] = 158 # Random number, too big for a real EC
-
-        for i in range(0, 75):
-            for j in range(0, 125):
-                if a[j][74-i]:
-                    if int(a[j][74-i])-158 is not 0:
-                        graph = graph + "@"
-                    else:
-                        graph = graph + "X"
-                else:
-                    graph = graph + " "
-            graph = graph + "\n"
-        return graph
-    if type is "PC":
-        graph = ""
-        print("Position X max: ", ef.max_x)
-        print("Position Y max: ", ef.max_y)
-        ratio_x = 125/float(ef.max_x)
-        ratio_y = 75/float(ef.max_y)
-        a = np.zeros(shape=(125,75))
-        for key, value in ef.junctions.items():
-            x = int(float(value.posX)*ratio_x)-1
-            y = int(float(value.posY)*ratio_y)-1
-            a[x][y] = value.id
-        for i in range(0, 75):
-            for j in range(0, 125):
-                if not a[j][74-i]:
-                    graph = graph + " "
-                else:
-                    if int(a[j][74-i]) in ef.id_cannes:
-                        graph = graph + u"\u2580"
-                    else:
-                        graph = graph + u"\u2592"
-            graph = graph + "\n"
-        return graph
+def drawNetwork(type, width=125, height=75):
+    print("Position X max: ", ef.max_x)
+    print("Position Y max: ", ef.max_y)
+    junctions = list(ef.junctions.values())
+    x = np.fromiter((float(j.posX) for j in junctions), dtype=np.float64, count=len(junctions))
+    y = np.fromiter((float(j.posY) for j in junctions), dtype=np.float64, count=len(junctions))
+    if type == "EC":
+        # X: junction without emitter, @: junction with an emitter coefficient
+        codes = np.fromiter((1 + (float(j.ec) != 0) for j in junctions), dtype=np.int8, count=len(junctions))
+        return render(rasterize(x, y, codes, width, height), " X@")
+    if type == "PC":
+        cannes = set(ef.id_cannes)
+        codes = np.fromiter((1 + (int(j.id) in cannes) for j in junctions), dtype=np.int8, count=len(junctions))
+        return render(rasterize(x, y, codes, width, height), u" \u2592\u2580")
 
 # ------------------------------------
 # Read points of consumption
@@ -667,20 +964,18 @@ def readPCID():
 # Write new base demand on junction
 # ------------------------------------
 def writeBD(junctions, demand, save=0):
+    import epanettools.epanettools as epa
     demand = int(demand)
     f_epanet = open(ef.path, 'r')
     lines = f_epanet.readlines()
     f_epanet.close()
 
     if junctions is 0 and demand is 0:
-        es=epa.EPANetSimulation(ef.path)
-        es.run()
-        p=epa.Node.value_type['EN_PRESSURE']
-        pre = {}
-        for key, value in es.network.nodes.items():
-            pre[value.id] = value.results[p][0]
-        for key, value in ef.junctions.items():
-            ef.junctions[key].pressure = pre[value.id]
+        # Only the pressures of the junctions are read (lib/sim.py)
+        from lib.sim import extract
+        ids, pressures, links, flows = extract(ef.path, os.path.join(tempfile.gettempdir(), "epabstract_writeBD.rpt"), list(ef.junctions))
+        for id, pressure in zip(ids, pressures):
+            ef.junctions[id].pressure = pressure
     else:
         file_name = "sim_{0}_{1}_{2}.inp".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
         junctionsPart = 0
@@ -724,38 +1019,37 @@ def writeBD(junctions, demand, save=0):
 # ------------------------------------
 # Show graphics
 # ------------------------------------
-def graphPoint3D():
+def graphPoint3D(path=None):
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D
+    from lib.plot import scatter3D, showOrSave
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
-    cm = plt.cm.get_cmap('RdYlBu')
-
-    Xs = []
-    Ys = []
-    Zs = []
-
-    for key, value in ef.junctions.items():
-        Xs.append(float(value.posX))
-        Ys.append(float(value.posY))
-        Zs.append(float(value.elevation))
-        if COLOR_3D_TXT is 1:
-            if int(value.id) in red_3d:
-                ax.text(float(value.posX), float(value.posY), float(value.elevation), str(value.id), color='red')
-            elif int(value.id) in green_3d:
-                ax.text(float(value.posX), float(value.posY), float(value.elevation), str(value.id), color='green')
-            else:
-                ax.text(float(value.posX), float(value.posY), float(value.elevation), ".", size='20')
-        else:
-            x.text(float(value.posX), float(value.posY), float(value.elevation), str(value.id))
 
-    ax.set_xlim(min(Xs), max(Xs))
-    ax.set_ylim(min(Ys), max(Ys))
-    ax.set_zlim(min(Zs), max(Zs))
+    junctions = list(ef.junctions.values())
+    n = len(junctions)
+    Xs = np.fromiter((float(j.posX) for j in junctions), dtype=np.float64, count=n)
+    Ys = np.fromiter((float(j.posY) for j in junctions), dtype=np.float64, count=n)
+    Zs = np.fromiter((float(j.elevation) for j in junctions), dtype=np.float64, count=n)
+    ids = np.asarray([int(j.id) for j in junctions], dtype=np.int64)
+    colors = np.full(n, 'grey', dtype=object)
+    labels = np.full(n, '', dtype=object)
+    if COLOR_3D_TXT == 1:
+        red = np.isin(ids, red_3d)
+        green = np.isin(ids, green_3d)
+        colors[red] = 'red'
+        colors[green] = 'green'
+        labels[red | green] = ids[red | green].astype(str)
+    else:
+        labels[:] = ids.astype(str)
+    scatter3D(ax, Xs, Ys, Zs, colors, labels)
+
     ax.set_xlabel('Coordinated X [m]')
     ax.set_ylabel('Coordinated Y [m]')
     ax.set_zlabel('Elevation [m]')
     plt.title("Map of irrigation points")
-    
-    plt.show()
+
+    showOrSave(fig, path)
 # ------------------------------------
 # Convert unit
 # ------------------------------------
@@ -768,94 +1062,76 @@ def convertUnit(type, val):
         else:
             return val
 
+# ------------------------------------
+# Values of the points of irrigation for the graphics
+# Return: arrays X and Y
+# ------------------------------------
+def junctionsArrays(x, y):
+    cannes = set(ef.id_cannes)
+    junctions = [value for key, value in ef.junctions.items() if int(value.id) in cannes]
+    axe_x = convertUnit(x, np.fromiter((float(getattr(j, x)) for j in junctions), dtype=np.float64, count=len(junctions)))
+    axe_y = convertUnit(y, np.fromiter((float(getattr(j, y)) for j in junctions), dtype=np.float64, count=len(junctions)))
+    return axe_x, axe_y
+
 # ------------------------------------
 # Show graphics
 # ------------------------------------
-def graph2DJunctions(x, y, unit_x, unit_y, title="", regression = 0):
+def graph2DJunctions(x, y, unit_x, unit_y, title="", regression = 0, path=None):
+    import matplotlib.pyplot as plt
+    from lib.plot import scatter2D, showOrSave
     fig = plt.figure()
     ax = fig.add_subplot(111)
 
-    axe_x = []
-    axe_y = []
-    x_for_max_y = float(0)
-    x_for_min_y = float(0)
-
-    for key, value in ef.junctions.items():
-        if int(value.id) in ef.id_cannes:
-            axe_x.append(convertUnit(x, float(getattr(value, x))))
-            axe_y.append(convertUnit(y, float(getattr(value, y))))
-            if float(convertUnit(y, getattr(value, y))) >= max(axe_y):
-                x_for_max_y = float(convertUnit(x, getattr(value, x)))
-            if float(convertUnit(y, getattr(value, y))) <= min(axe_y):
-                x_for_min_y = float(convertUnit(x, getattr(value, x)))
-
-    ax.text(x_for_max_y, float(max(axe_y)), str(int(x_for_max_y)) + ": " + str(int(max(axe_y))) + " [" + unit_y + "]", fontsize=12)
-    ax.text(x_for_min_y, float(min(axe_y)), str(int(x_for_min_y)) + ": " + str(int(min(axe_y))) + " [" + unit_y + "]", fontsize=12)
-    sc = ax.scatter(axe_x, axe_y, c='black')
-    sc = ax.scatter(x_for_max_y, max(axe_y), c='r')
-    sc = ax.scatter(x_for_min_y, min(axe_y), c='r')
-    if regression is 1:
-        b, m = polyfit(np.asarray(axe_x), np.asarray(axe_y), 1)
-        ax.plot(axe_x, b + m * np.asarray(axe_x), '-')
-    if min(axe_x) >= 1:
-        ax.set_xlim(min(axe_x) - (min(axe_x)/80), max(axe_x) + (max(axe_x)/80))
-    else:
-        ax.set_xlim(min(axe_x) - 2, max(axe_x) + (max(axe_x)/80))
-    if min(axe_y) >= 1:
-        ax.set_ylim(min(axe_y) - (min(axe_y)/80), max(axe_y) + (max(axe_y)/80))
-    else:
-        ax.set_ylim(min(axe_y) - 2, max(axe_y) + (max(axe_y)/80))
+    axe_x, axe_y = junctionsArrays(x, y)
+    scatter2D(ax, axe_x, axe_y, unit_y, 'black', 1, 1, regression)
 
     plt.rcParams.update({'font.size': 18})
     ax.set_xlabel(x + " [" + unit_x + "]")
     ax.set_ylabel(y + " [" + unit_y + "]")
     plt.title(title)
 
-    plt.show()
+    showOrSave(fig, path)
 
 # --------------------------------------------------------------
 # Show graphics for multiple nodes on the same graph
 # --------------------------------------------------------------
 def graph2DJunctionsMultiple(x, y, unit_x, unit_y, fig, color, title="", regression = 0):
+    import matplotlib.pyplot as plt
+    from lib.plot import scatter2D
     ax = fig.add_subplot(111)
 
-    axe_x = []
-    axe_y = []
-    x_for_max_y = float(0)
-    x_for_min_y = float(0)
-
-    for key, value in ef.junctions.items():
-        if int(value.id) in ef.id_cannes:
-            axe_x.append(convertUnit(x, float(getattr(value, x))))
-            axe_y.append(convertUnit(y, float(getattr(value, y))))
-            if float(convertUnit(y, getattr(value, y))) >= max(axe_y):
-                x_for_max_y = float(convertUnit(x, getattr(value, x)))
-            if float(convertUnit(y, getattr(value, y))) <= min(axe_y):
-                x_for_min_y = float(convertUnit(x, getattr(value, x)))
-            #ax.text(float(value.elevation), float(convertUnit("pressure", value.pressure)), str(value.id), fontsize=7)
-
-    if regression:
-        ax.text(x_for_max_y, float(max(axe_y)), str(int(x_for_max_y)) + ": " + str(int(max(axe_y))) + " [" + unit_y + "]", fontsize=12)
-        ax.text(x_for_min_y, float(min(axe_y)), str(int(x_for_min_y)) + ": " + str(int(min(axe_y))) + " [" + unit_y + "]", fontsize=12)
-    else:
-        sc = ax.scatter(axe_x, axe_y, c = color) # Transparancy: alpha=0.7
-    if regression:
-        b, m = polyfit(np.asarray(axe_x), np.asarray(axe_y), 1)
-        ax.plot(axe_x, b + m * np.asarray(axe_x), '-')
-    if min(axe_x) >= 1:
-        ax.set_xlim(min(axe_x) - (min(axe_x)/80), max(axe_x) + (max(axe_x)/80))
-    else:
-        ax.set_xlim(min(axe_x) - 2, max(axe_x) + (max(axe_x)/80))
-    if min(axe_y) >= 1:
-        ax.set_ylim(min(axe_y) - (min(axe_y)/80), max(axe_y) + (max(axe_y)/80))
-    else:
-        ax.set_ylim(min(axe_y) - 2, max(axe_y) + (max(axe_y)/80))
+    axe_x, axe_y = junctionsArrays(x, y)
+    # Regression with the extrema, or only the points
+    scatter2D(ax, axe_x, axe_y, unit_y, color, not regression, regression, regression)
 
     plt.rcParams.update({'font.size': 18})
     ax.set_xlabel(x + " [" + unit_x + "]")
     ax.set_ylabel(y + " [" + unit_y + "]")
     plt.title(title)
 
+# --------------------------------------------------------------
+# Export the pressure graphic of many scenarios without display
+# cases: list of (junctions opened, demand), one PNG by case
+# --------------------------------------------------------------
+def exportPressures(cases, out_path="results/figures", regression=1, processes=None, engine="epanet"):
+    from lib.plot import aggFigure, scatter2D
+    os.makedirs(out_path, exist_ok=True)
+    sensors = [value.id for key, value in ef.junctions.items() if int(value.id) in ef.id_cannes]
+    elevation = np.asarray([float(ef.junctions[j].elevation) for j in sensors])
+    if engine == "native":
+        pressure = convertUnit("pressure", nativeSolver().sweep(cases, sensors))
+    else:
+        pressure = convertUnit("pressure", sweeper(engine)(ef.path, cases, sensors, processes))
+    for k, (junctions, demand) in enumerate(cases):
+        fig = aggFigure()           # Off-screen, the backend of pyplot is kept
+        ax = fig.add_subplot(111)
+        scatter2D(ax, elevation, pressure[k], "bar", 'black', 1, 1, regression)
+        ax.set_xlabel("elevation [m]")
+        ax.set_ylabel("pressure [bar]")
+        ax.set_title("Pressure when " + ", ".join(str(j) for j in junctions) + " open with " + str(demand))
+        fig.savefig(os.path.join(out_path, "pressure_{0}.png".format(k)))
+    print("{0} figures exported".format(len(cases)))
+
 # --------------------------------------------------------
 # Save netwok's general information on an HTML file
 # --------------------------------------------------------
@@ -873,6 +1149,7 @@ def runSummary():
     saveStatus()
     saveEmitters()
     saveDemands()
+    saveOptions()
     readPCID()
     f = open('results/summary.html', 'w')
     p = "<h1>" + ef.title + "</h1>"
@@ -897,25 +1174,38 @@ def runSummary():
 def main_reset():
     if os.path.exists(ef.result_path):  # Remove the result file
         os.remove(ef.result_path)
+    if os.path.exists(augmentedPath()):
+        os.remove(augmentedPath())
     ef.sim_cnt = 0          # Reset the simulation counter
-    ef.pipes_sim = []
-    random.seed(int(time.time()))
+    ef.supernet_cnt = 0
+    ef.pipes_sim = np.zeros(Pipe.id_max + 1, dtype=np.int64)
+    random.seed(SEED if SEED is not None else int(time.time()))
 # --------------------------------------------------------
 # Reset default network
 # --------------------------------------------------------
+@prof.timed("reset")
 def reset():
     ef.path = PATH          # Default INP file
-    Junction.id_max = 0     # Reset the max ID
-    Pipe.id_max = 0
     ef.junctions.clear()    # Clean recorted junctions and pipes (TODO: delete obj)
     ef.pipes.clear()
-    saveJunctions()         # Read junctions and pipes from the Epanet network file
-    savePipes()
-    saveCoordinates()
+    # The default network is parsed once, then copied (the leaks modify the objects)
+    stat = os.stat(PATH)
+    key = (PATH, stat.st_mtime_ns, stat.st_size)
+    if key not in parsed:
+        Junction.id_max = 0     # Reset the max ID
+        Pipe.id_max = 0
+        saveJunctions()         # Read junctions and pipes from the Epanet network file
+        savePipes()
+        saveCoordinates()
+        parsed[key] = (dict(ef.junctions), dict(ef.pipes), Junction.id_max, Pipe.id_max, ef.max_x, ef.max_y)
+    junctions, pipes, Junction.id_max, Pipe.id_max, ef.max_x, ef.max_y = parsed[key]
+    ef.junctions.update((id, copy.copy(j)) for id, j in junctions.items())
+    ef.pipes.update((id, copy.copy(p)) for id, p in pipes.items())
 
 # ---------------------------------------------------
 # Write pipe on the Epanet configuration file
 # ---------------------------------------------------
+@prof.timed("writePipe")
 def writePipe(t_leak, p_id, p_id_remove):
     
     # -- Get lines from Epanet configuration file --
@@ -991,6 +1281,7 @@ def writePipe(t_leak, p_id, p_id_remove):
 # ---------------------------------------------------
 # Write junction on the Epanet configuration file
 # ---------------------------------------------------
+@prof.timed("writeJunction")
 def writeJunction(j_id):
     f_epanet = open(ef.path, 'r')
     lines = f_epanet.readlines()
@@ -1033,13 +1324,22 @@ def writeJunction(j_id):
     f_epa.close()
     ef.path = "networks/" + file_name       # Update the working file
 
+# ------------------------------------
+# Count a simulation on a pipe (fixed size array, one cell by pipe ID)
+# ------------------------------------
+def countPipe(p):
+    if p >= len(ef.pipes_sim):
+        ef.pipes_sim = np.concatenate((ef.pipes_sim, np.zeros(p + 1 - len(ef.pipes_sim), dtype=np.int64)))
+    ef.pipes_sim[p] += 1
+    ef.last_pipe = p
+
 # ------------------------------------
 # Add random leaks
 # ------------------------------------
 def addLeaks(emitter):
     random.seed(None)
-    p = random.sample(set(ef.pipes.keys()), 1)[0]      # Select a random pipe
-    ef.pipes_sim.append(p)                   # Register all the simulate pipes for statistics purpose
+    p = random.sample(sorted(ef.pipes.keys()), 1)[0]      # Select a random pipe
+    countPipe(p)                   # Register all the simulate pipes for statistics purpose
     print("Random pipes selected for leak: " + str(ef.pipes[p]))
     j_start = ef.junctions[ef.pipes[p].node1]
     j_stop = ef.junctions[ef.pipes[p].node2]
@@ -1058,20 +1358,27 @@ def addLeaks(emitter):
     writeJunction(j_int_id)
     writePipe(1, p1.id, p)
 
+# ---------------------------------------------
+# Pipes where a leak can be added (between two junctions)
+# ---------------------------------------------
+def leakPipes():
+    return [p for p, value in ef.pipes.items() if value.node1 in ef.junctions and value.node2 in ef.junctions]
+
 # ---------------------------------------------
 # Add leaks on the middle of every pipe
 # Return: ID of the closest junction of the leak
 # ---------------------------------------------
-def addLeaksMiddle(demand, coef, rand=0, persistent=0):
+@prof.timed("addLeaksMiddle")
+def addLeaksMiddle(demand, coef, rand=0, persistent=0, pipe=None):
     pipes = {}
     # Add leaks on every pipes
     if rand is 0:
         pipes = ef.pipes.copy()
         ret = 0
-    # Add leak on a random pipe
+    # Add leak on a random pipe (or on the given one)
     else:
-        p = random.sample(set(ef.pipes.keys()), 1)[0]
-        ef.pipes_sim.append(p)      # Register all the simulate pipes for statistics purpose
+        p = pipe if pipe is not None else random.sample(sorted(ef.pipes.keys()), 1)[0]
+        countPipe(p)      # Register all the simulate pipes for statistics purpose
         pipes[p] = ef.pipes[p]
         if DEBUG:
             print("Selected pipe: {0}".format(pipes[p]))
@@ -1146,7 +1453,9 @@ def addLeaksMiddle(demand, coef, rand=0, persistent=0):
 # ----------------------------------------------------------------------
 # Add a dataframe from simulation to a new line in the result CSV
 # ----------------------------------------------------------------------
+@prof.timed("sim_df_to_csv")
 def sim_df_to_csv(dataframe, first=1):
+    import pandas as pd
     # Re-index, transpose and split the dataframe
     dataframe = dataframe.set_index('id')
     dataframe = dataframe.T
@@ -1160,7 +1469,7 @@ def sim_df_to_csv(dataframe, first=1):
     df1_d = df1_d.iloc[[1]]
     # Create value with the demands concatenation
     co = ""
-    for index, row in df1_d.iteritems():
+    for index, row in df1_d.items():
         co = str(co) + str(str(int(row[0])))
     df1_p['c'] = str("{0}".format(co))
     # Pressure and demand for the same simulation are on one line
@@ -1178,6 +1487,64 @@ def sim_df_to_csv(dataframe, first=1):
     f.write(line)
     f.close()
 
+# ----------------------------------------------------------------------
+# Add rows computed in batch (surrogate, super-network) to the result CSV (same columns
+# as sim_df_to_csv: pressure of every sensor and tag of the closest node of the leak)
+# ----------------------------------------------------------------------
+@prof.timed("leak_rows_to_csv")
+def leak_rows_to_csv(sensors, pressures, nodes, first=1, seeds=None):
+    index = {str(id): k for k, id in enumerate(sensors)}
+    zeros = ["0"] * len(sensors)
+    tags = []
+    for node in nodes:
+        c = list(zeros)
+        if str(node) in index:
+            c[index[str(node)]] = "1"
+        tags.append("".join(c))
+    rows_to_csv(sensors, pressures, tags, first, seeds)
+    augment_rows_to_csv(sensors, pressures, tags, seeds)
+
+# ----------------------------------------------------------------------
+# Add rows of pressures (matrix [row, sensor]) and tags to the result CSV, with the
+# draw of every row in a column "s" if seeds is given (lib/montecarlo.py) and the
+# realization of every row in a column "r" if realizations is given (lib/augment.py)
+# ----------------------------------------------------------------------
+def rows_to_csv(sensors, pressures, tags, first=1, seeds=None, path=None, realizations=None):
+    import io
+    buf = io.StringIO()
+    np.savetxt(buf, pressures, fmt="%.10g", delimiter=",")
+    header = ",".join("p_" + str(id) for id in sensors) + ",c"
+    if seeds is not None:
+        tags = [c + "," + s for c, s in zip(tags, seeds)]
+        header += ",s"
+    if realizations is not None:
+        tags = [c + "," + str(r) for c, r in zip(tags, realizations)]
+        header += ",r"
+    with open(path or ef.result_path, 'a') as f:
+        if first == 1:
+            f.write(header + "\n")
+        f.write("".join(line + "," + c + "\n" for line, c in zip(buf.getvalue().splitlines(), tags)))
+
+# ----------------------------------------------------------------------
+# Augmented CSV of the result CSV: noisy rows only, never mixed with the simulations
+# ----------------------------------------------------------------------
+def augmentedPath():
+    return os.path.splitext(ef.result_path)[0] + "_augmented.csv"
+
+# ----------------------------------------------------------------------
+# Add the augmented realizations of the rows (lib/augment.py) to the augmented CSV,
+# column "r": realization (1 to n) of the scenario, missing measures (dropouts): nan
+# ----------------------------------------------------------------------
+@prof.timed("augment")
+def augment_rows_to_csv(sensors, pressures, tags, seeds=None):
+    if augmenter is None:
+        return
+    path = augmentedPath()
+    first = 0 if os.path.exists(path) else 1
+    rows = len(np.atleast_2d(pressures))
+    rows_to_csv(sensors, augmenter.augment(pressures), augmenter.tags(tags), first,
+                augmenter.tags(seeds) if seeds is not None else None, path, augmenter.realizations(rows))
+
 # ----------------------------------------------------------------------
 # Simulation and result in CSV, return the pressure in a dataframe
 # ----------------------------------------------------------------------
@@ -1185,24 +1552,50 @@ def sim(node = 0, first = 1):
     # Increment the simulation counter
     ef.sim_cnt += 1
     # Run external simulation script
-    result_filename = "results/sim/{0}_{1}_{2}.inp".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
-    print("Simulation {0} in progress for leak on junction {1}...".format(ef.sim_cnt, node))
-    os.system("python lib/sim.py {0} {1} {2}".format(ef.path, result_filename, node))
+    result_filename = simResultFilename()
+    if DEBUG:
+        print("Simulation {0} in progress for leak on junction {1}...".format(ef.sim_cnt, node))
+    tm = time.perf_counter()
+    if os.system("python {0} {1} {2} {3} {4}".format(SIM_SCRIPT, ef.path, result_filename, CANNES_ID_FILES, node)) != 0:
+        raise RuntimeError("Simulation {0} failed".format(ef.sim_cnt))
+    if prof.enabled:
+        # Split the external simulation in process launch and Epanet solve
+        tm = time.perf_counter() - tm
+        with open(result_filename + ".time", 'r') as f_time:
+            solve = float(f_time.read())
+        prof.record("launch", tm - solve)
+        prof.record("solve", solve)
     if DEBUG:
         print("Done")
+    return sim_result(first)
+
+# ----------------------------------------------------------------------
+# Result file of the external simulation (lib/sim.py)
+# ----------------------------------------------------------------------
+def simResultFilename():
+    return "results/sim/{0}_{1}_{2}.inp".format(ntpath.basename(PATH), SIM_RATIO, LEAK)
+
+# ----------------------------------------------------------------------
+# Result of the last simulation in CSV, return the pressure in a dataframe
+# ----------------------------------------------------------------------
+def sim_result(first = 1):
+    import pandas as pd
     # Return a dataframe of pressures
     names = ['id', 'pressure', 'demand']
-    df_pre = pd.read_csv(result_filename, names=names)
+    with prof.stage("read"):
+        df_pre = pd.read_csv(simResultFilename(), names=names)
     if first is 1:
         sim_df_to_csv(df_pre)
     else:
         sim_df_to_csv(df_pre, 0)
+    augment_rows_to_csv(df_pre['id'].values, df_pre['pressure'].values, ["".join(str(int(d)) for d in df_pre['demand'].values)])
     return df_pre
 
 # -----------------------------------------------------------------------------------
 # Old simulation in intern, with the Epanettools limitation (Only for testing)
 # -----------------------------------------------------------------------------------
 def deprecated_intern_sim():
+    import epanettools.epanettools as epa
     es=epa.EPANetSimulation(ef.path)
     print("(DEPRECATED) Simulation in progress...")
     es.run()
@@ -1220,9 +1613,270 @@ def deprecated_intern_sim():
     f_result.close()
 
 # -------------------------------------------------------------
-# Return the ratio of simulaitons with negative pressure
+# Sweep of demand cases of an engine: "epanet" (Epanet 2.0, a process by worker,
+# lib/sweep.py) or "epanet22" (Epanet 2.2, a thread by worker, lib/epanet22.py)
+# -------------------------------------------------------------
+def sweeper(engine="epanet"):
+    if engine == "epanet22":
+        from lib.epanet22 import sweep
+    else:
+        from lib.sweep import sweep
+    return sweep
+
 # -------------------------------------------------------------
-def pressureRatio(nbr):
+# Native steady state solver on the parsed network (no Epanet process), refused on
+# the networks it would solve wrongly (see nativeUnsupported)
+# -------------------------------------------------------------
+def nativeSolver():
+    from lib.solver import GGASolver
+    unsupported = nativeUnsupported()
+    if unsupported:
+        raise ValueError("The native solver does not support this network: {0}".format(", ".join(unsupported)))
+    return GGASolver(ef.junctions, ef.pipes, ef.reservoirs, ef.tanks, ef.options)
+
+# -------------------------------------------------------------
+# Elements of the network ignored by the native solver: pumps, valves, demand
+# patterns with a multiplier other than 1 in the first period (the solved one) and
+# junctions with several demand categories
+# Return: list of descriptions (empty if supported)
+# -------------------------------------------------------------
+def nativeUnsupported():
+    unsupported = []
+    for section in ("PUMPS", "VALVES"):
+        links = inpSection(section)
+        if links:
+            unsupported.append("{0} {1}".format(len(links), section.lower()))
+    patterns = {}
+    for ls in inpSection("PATTERNS"):
+        patterns.setdefault(ls[0], []).extend(float(v) for v in ls[1:])
+    default = ef.options.get("PATTERN", "1").split()[0] if ef.options.get("PATTERN") else "1"
+    # Demands of the junctions: (demand, pattern), replaced by [DEMANDS] if present
+    demands = {ls[0]: [(float(ls[2]), ls[3] if len(ls) > 3 else default)] for ls in inpSection("JUNCTIONS") if len(ls) > 2}
+    categories = {}
+    for ls in inpSection("DEMANDS"):
+        categories.setdefault(ls[0], []).append((float(ls[1]), ls[2] if len(ls) > 2 else default))
+    demands.update(categories)
+    multi = sum(len(d) > 1 for d in categories.values())
+    if multi:
+        unsupported.append("{0} junctions with several demand categories".format(multi))
+    scaled = set(p for d in demands.values() for demand, p in d if demand != 0 and patterns.get(p, [1.0])[0] != 1.0)
+    if scaled:
+        unsupported.append("demand patterns {0}".format(", ".join(sorted(scaled))))
+    return unsupported
+
+# -------------------------------------------------------------
+# Data lines of a section of the INP file (comments removed)
+# Return: list of the split lines
+# -------------------------------------------------------------
+def inpSection(name, path=None):
+    lines = []
+    section = None
+    with open(path or ef.path, 'r') as f:
+        for line in f:
+            line = line.split(";")[0].strip()
+            if line.startswith("["):
+                section = line.strip("[]").upper()
+            elif line and section == name:
+                lines.append(line.split())
+    return lines
+
+# -------------------------------------------------------------
+# Pressures of the native solver against Epanet on the sensors: without leak, with
+# the demand on every sensor and, with a super-network, with a leak on every leak
+# pipe (at the position of its leak junction). The cases unbalanced by Epanet in
+# TRIALS are not compared (engine: "epanet" or "epanet22")
+# Return: largest absolute difference (pressure unit of Epanet), ValueError above
+# the tolerance
+# -------------------------------------------------------------
+def checkNativeSolver(demand=None, supernet=None, tolerance=None, processes=None, engine="epanet"):
+    from lib.solver import TOLERANCE
+    from lib.supernet import TRIALS
+    sweep = sweeper(engine)
+    reset()
+    solver = nativeSolver()
+    if demand is None:
+        demand = int(convertUnit("flow", 10/3600))      # Largest leak demand of sim_data()
+    sensors = [value.id for key, value in ef.junctions.items() if int(value.id) in ef.id_cannes]
+    cases = [([], 0)] + [([j], demand) for j in sensors]
+    native = [solver.sweep(cases, sensors)]
+    epanet = [sweep(ef.path, cases, sensors, processes, trials=TRIALS)]
+    if supernet is not None:
+        leaks = [(p, x, demand) for p in supernet.pipes for x in supernet.positions]
+        native.append(solver.leakSweep(leaks, sensors))
+        epanet.append(sweep(supernet.path, [([supernet.leakNode(p, x)[0]], d) for p, x, d in leaks], sensors, processes, trials=TRIALS))
+    diff = np.abs(np.vstack(native) - np.vstack(epanet))
+    compared = ~np.isnan(diff).any(axis=1)
+    error = float(diff[compared].max()) if compared.any() else 0.0
+    tolerance = TOLERANCE if tolerance is None else tolerance
+    print("Native solver: largest difference with Epanet {0:.3g} on {1} cases ({2} unbalanced, tolerance {3:g})".format(
+        error, int(compared.sum()), int((~compared).sum()), tolerance))
+    if error > tolerance:
+        raise ValueError("The native solver differs from Epanet by {0:.3g}".format(error))
+    return error
+
+# -------------------------------------------------------------
+# Surrogate of the leak simulations on the default network, calibrated with the
+# native solver (max_flow: largest leak demand of sim_data() by default)
+# -------------------------------------------------------------
+def leakSurrogate(max_flow=None, tolerance=None):
+    from lib.surrogate import TOLERANCE, LeakSurrogate
+    reset()
+    sensors = [value.id for key, value in ef.junctions.items() if int(value.id) in ef.id_cannes]
+    pipes = leakPipes()
+    if max_flow is None:
+        max_flow = int(convertUnit("flow", 10/3600))
+    return LeakSurrogate(nativeSolver(), sensors, pipes, max_flow, tolerance=TOLERANCE if tolerance is None else tolerance)
+
+# -------------------------------------------------------------
+# Super-network of the default network (lib/supernet.py): leak junctions on every
+# leak pipe at the positions, written once, for ef.sim_data(supernet=...)
+# -------------------------------------------------------------
+def superNetwork(positions=None, emitter=0, out_path=None):
+    from lib.supernet import POSITIONS, SuperNetwork
+    reset()
+    if out_path is None:
+        out_path = "networks/super_" + ntpath.basename(PATH)
+    node_ids = list(ef.reservoirs.keys()) + list(ef.tanks.keys())
+    net = SuperNetwork(ef.junctions, ef.pipes, leakPipes(), POSITIONS if positions is None else positions, node_ids, emitter)
+    net.writeInp(PATH, out_path)
+    print("Super-network: {0} leak junctions on {1} pipes in {2}".format(len(net.leak_nodes), len(net.pipes), out_path))
+    return net
+
+# -------------------------------------------------------------
+# Nearest neighbour index of a dataset for the leak localization (lib/localize.py),
+# the result of sim_data() by default
+# -------------------------------------------------------------
+def leakIndex(dataset=None, components=None):
+    from lib.localize import LeakIndex, readDataset
+    sensors, pressures, labels = readDataset(ef.result_path if dataset is None else dataset)
+    index = LeakIndex(sensors, pressures, labels, components, {id: (p.node1, p.node2) for id, p in ef.pipes.items()})
+    print("Leak index: {0} rows, {1} dimensions".format(len(labels), index.z.shape[1]))
+    return index
+
+# -------------------------------------------------------------
+# Localization error of the rows of a dataset, distances with the coordinates of
+# errorComputation.py
+# -------------------------------------------------------------
+def localizationError(index, dataset, k=None):
+    import errorComputation
+    from lib.localize import K, readDataset
+    errorComputation.PATH = PATH
+    sensors, pressures, labels = readDataset(dataset)
+    if sensors != index.sensors:
+        raise ValueError("The sensors of {0} are not the ones of the index".format(dataset))
+    return index.evaluate(pressures, labels, errorComputation.get_coordinates(), K if k is None else k)
+
+# -------------------------------------------------------------
+# Local what-if server (lib/server.py) on the default network, the leaks are set on
+# its super-network. Runs until interrupted
+# -------------------------------------------------------------
+def serve(port=None, engine="epanet", sessions=1, leaks=1):
+    from lib.server import PORT, WhatIf, server
+    from lib.supernet import TRIALS
+    sensors = [id for id in ef.junctions if int(id) in ef.id_cannes]
+    supernet = superNetwork() if leaks else None
+    whatif = WhatIf(supernet.path if leaks else ef.path, sensors, supernet, engine, sessions, TRIALS, lambda p: convertUnit("pressure", p))
+    httpd = server(whatif, port=PORT if port is None else port)
+    print("What-if server on http://{0}:{1} ({2} sensors)".format(httpd.server_address[0], httpd.server_address[1], len(sensors)))
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        whatif.close()
+
+# -------------------------------------------------------------
+# Skeleton of the default network (lib/skeleton.py): sensors, pumps, valves and the
+# leak pipes are kept, the error on the sensors is checked by Epanet (without leak
+# and with a leak on the ends of the kept pipes), only exact reductions are done if
+# it is above the tolerance
+# Return: path of the reduced INP, skeleton (mapping of the original IDs)
+# -------------------------------------------------------------
+def skeletonize(keep_pipes=(), tolerance=None, out_path=None, processes=None, engine="epanet"):
+    from lib.skeleton import TOLERANCE, Skeleton
+    from lib.supernet import TRIALS
+    sweep = sweeper(engine)
+    reset()
+    savePumps()
+    saveValves()
+    tolerance = TOLERANCE if tolerance is None else tolerance
+    if out_path is None:
+        out_path = "networks/skeleton_" + ntpath.basename(PATH)
+    sensors = [id for id in ef.junctions if int(id) in ef.id_cannes]
+    links = list(ef.pumps.values()) + list(ef.valves.values())
+    demand = int(convertUnit("flow", 10/3600))
+    ends = sorted(set(str(n) for p in list(keep_pipes)[:20] for n in (ef.pipes[p].node1, ef.pipes[p].node2)) & set(ef.junctions))
+    cases = [([], 0)] + [([n], demand) for n in ends]
+
+    # -- Reference: original network --
+    tm = time.perf_counter()
+    ref = sweep(PATH, cases, sensors, processes, trials=TRIALS)
+    t_ref = time.perf_counter() - tm
+
+    for exact in (0, 1):
+        sk = Skeleton(ef.junctions, ef.pipes, sensors, keep_pipes, ef.options, links).reduce(exact)
+        sk.writeInp(PATH, out_path)
+        tm = time.perf_counter()
+        p = sweep(out_path, cases, sensors, processes, trials=TRIALS)
+        t_red = time.perf_counter() - tm
+        diff = np.abs(convertUnit("pressure", p - ref))
+        compared = ~np.isnan(diff).any(axis=1)          # Cases balanced on both networks
+        error = float(np.max(diff[compared], initial=0))
+        if error <= tolerance:
+            break
+    sk.writeMapping(os.path.splitext(out_path)[0] + "_mapping.csv")
+    print(sk.summary(len(ef.junctions), len(ef.pipes)) + "{0}".format(" (exact reductions only)" if exact else ""))
+    print("Max pressure error on the sensors: {0:.5f} (tolerance {1}, {2} cases), sweep time {3:.4f} -> {4:.4f} [s]".format(error, tolerance, int(compared.sum()), t_ref, t_red))
+    if error > tolerance:
+        print("Warning: error of the skeleton above the tolerance")
+    return out_path, sk
+
+# -------------------------------------------------------------
+# Persistent cache of the leak simulations (lib/cache.py), keyed by the
+# network, the sensors and the quantized leak, for ef.sim_data(cache=...)
+# -------------------------------------------------------------
+def resultCache(max_bytes=None):
+    from lib.cache import MAX_BYTES, ResultCache
+    return ResultCache([PATH, CANNES_ID_FILES], max_bytes=MAX_BYTES if max_bytes is None else max_bytes)
+
+# -------------------------------------------------------------
+# Distance along the pipes of the default network (cached on disk)
+# -------------------------------------------------------------
+def hydraulicDistance():
+    from lib.distance import HydraulicDistance, edgesFromPipes
+    reset()
+    return HydraulicDistance(edgesFromPipes(ef.pipes))
+
+# -------------------------------------------------------------
+# Choose k sensors among the candidates maximizing the detectability of the leaks
+# (leak of "demand" on the junctions of the leak pipes, threshold of detection in
+# pressure unit, candidates: junctions able to hold a sensor, default every
+# junction)
+# Return: list of the selected junctions
+# -------------------------------------------------------------
+def sensorPlacement(k, demand=10, threshold=None, processes=None, candidates=None):
+    from lib.sensitivity import detectability, greedyPlacement, sensitivityMatrix
+    reset()
+    readPCID()
+    sites = sorted(set(ef.pipes[p].node1 for p in leakPipes()) | set(ef.pipes[p].node2 for p in leakPipes()), key=int)
+    if candidates is None:
+        candidates = list(ef.junctions)
+    candidates = [str(c) for c in candidates if str(c) in ef.junctions]
+    S = sensitivityMatrix(PATH, sites, candidates, demand, processes)
+    chosen, trace = greedyPlacement(S, k, threshold)
+    current = [candidates.index(str(i)) for i in ef.id_cannes if str(i) in candidates]
+    print("Detectability of the current sensors ({0}): {1:.2f}".format(len(current), detectability(S, current, threshold)))
+    print("Detectability of the selected sensors ({0}): {1:.2f}".format(len(chosen), detectability(S, chosen, threshold)))
+    return [candidates[j] for j in chosen]
+
+# -------------------------------------------------------------
+# Return the ratio of simulaitons with negative pressure, from the statistics of the
+# last sim_data() (lib/feasibility.py) if any, otherwise (or rerun) by nbr simulations
+# -------------------------------------------------------------
+def pressureRatio(nbr, rerun=False):
+    if not rerun and ef.feasibility is not None and ef.feasibility.rows:
+        return ef.feasibility.ratio()
     path = ef.path
     po = 0
     ng = 0
@@ -1246,10 +1900,32 @@ def pressureRatio(nbr):
 # Main
 # ------------------------------------
 if __name__ == '__main__':
+    from lib.design import DESIGNS
+    from lib.montecarlo import DISTRIBUTIONS
+    parser = argparse.ArgumentParser(description="Dataset of leak simulations on an Epanet network")
+    parser.add_argument("path", help="INP file of the network")
+    parser.add_argument("cannes", help="CSV file of the IDs of the irrigation canes")
+    parser.add_argument("ratio", type=int, help="Simulations by pipe")
+    parser.add_argument("leak", choices=["fix", "rand"], help="Fixed or random leak demand")
+    parser.add_argument("--design", choices=DESIGNS, default="random", help="Scenario design (default: uniform random)")
+    parser.add_argument("--adaptive", type=float, metavar="TOL", help="Stop when the standard error of the mean pressures of every pipe is below TOL")
+    parser.add_argument("--augment", type=int, default=0, metavar="N", help="Noisy realizations added after every scenario")
+    parser.add_argument("--seed", type=int, help="Seed of the leak scenarios, the augmentation and the demand draws")
+    parser.add_argument("--montecarlo", type=int, default=0, metavar="N", help="Draws of the base demands by leak scenario")
+    parser.add_argument("--uncertainty", choices=DISTRIBUTIONS, default="normal", help="Distribution of the drawn demands")
+    parser.add_argument("--profile", action="store_true", help="Time and memory by stage (or EPABSTRACT_PROFILE=1)")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Answer what-if queries on localhost instead (lib/server.py)")
+    args = parser.parse_args()
+    configure(args.path, args.cannes, args.ratio, args.leak, args.design, args.adaptive, args.augment, args.seed, args.montecarlo, args.uncertainty)
+    if args.profile and not prof.enabled:
+        prof.enable(1, os.environ.get(CPROFILE_ENV))
     runSummary()
+    if args.serve:
+        serve(args.serve)
+        sys.exit(0)
     main_reset()
-    #ef.sim_data()
-    graphPoint3D()
+    ef.sim_data()
+    #graphPoint3D()
     #print(drawNetwork("PC"))
     #plt.show()
     #print("Negative ratio: {0:3.2f}".format(pressureRatio(10)))
@@ -1357,3 +2033,6 @@ if __name__ == '__main__':
     # print("Simulation time for external function: {0} [ms]".format(tm2-tm1))
 
     # print("End")
+
+    if notifier is not None:
+        notifier.flush()        # Wait for the pending notifications
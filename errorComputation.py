@@ -17,8 +17,8 @@
 # Revision History  :
 # Date        Author      Ref    Revision
 # 
-# Input: ID of the first and second junction 
-# Output: Euclidian distance between the two points
+# Input: ID of the first and second junction, optional "hydraulic" mode
+# Output: Euclidian (or hydraulic) distance between the two points
 # ********************************************************************************;
 
 # ------------------------------------
@@ -27,10 +27,15 @@
 import math
 import sys
 
+from lib.distance import HydraulicDistance
+
+PATH = 'input.inp'
+hydraulic = None
+
 # Read an INP file and return coordinates
 # @Return: list of ID and coordinates X and Y
 def get_index(junction):
-    path = 'input.inp'
+    path = PATH
     inp_file = open(path,'r')
     lines = inp_file.readlines()
     lines_coor = []
@@ -79,8 +84,58 @@ def get_distance(j1, j2):
     dist_eucl = math.sqrt(dist['x'] ** 2 + dist['y'] ** 2)
     return "{:.4f}".format(dist_eucl)
 
+# Read an INP file and return the coordinates of every junction at once
+# @Return: dictionary ID -> (X, Y)
+def get_coordinates():
+    coordinates = {}
+    coor_part = False
+    with open(PATH, 'r') as inp_file:
+        for line in inp_file:
+            if line.startswith("["):
+                coor_part = line.strip() == "[COORDINATES]"
+                continue
+            ls = line.split()
+            if coor_part and len(ls) > 2 and not ls[0].startswith(";"):
+                coordinates[ls[0]] = (float(ls[1]), float(ls[2]))
+    return coordinates
+
+# Read an INP file and return the pipes
+# @Return: list of node 1, node 2 and length
+def get_pipes():
+    pipes = []
+    pipes_part = False
+    with open(PATH, 'r') as inp_file:
+        for line in inp_file:
+            if line.startswith("["):
+                pipes_part = line.strip() == "[PIPES]"
+                continue
+            ls = line.split()
+            if pipes_part and len(ls) > 3 and not ls[0].startswith(";"):
+                pipes.append((ls[1], ls[2], float(ls[3])))
+    return pipes
+
+# Pipe graph of the network, built once and shared by every call
+# @Return the hydraulic distance object
+def get_hydraulic():
+    global hydraulic
+    if hydraulic is None:
+        hydraulic = HydraulicDistance(get_pipes())
+    return hydraulic
+
+# Compute the distance along the pipes between two element
+# @Return the distance
+def get_hydraulic_distance(j1, j2):
+    return "{:.4f}".format(get_hydraulic().distance(j1, j2))
+
+# Compute the hydraulic error of a whole evaluation set (real and predicted junctions)
+# @Return array of distances, one Dijkstra per distinct predicted junction
+def get_errors(real, predicted):
+    return get_hydraulic().distances(predicted, real)
+
 def main():
   try:
+      if len(sys.argv) > 3 and sys.argv[3] == "hydraulic":
+          return get_hydraulic_distance(int(sys.argv[1]), int(sys.argv[2]))
       return get_distance(int(sys.argv[1]), int(sys.argv[2]))
   except:
       return -1
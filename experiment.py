@@ -0,0 +1,158 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : experiment.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Datasets of many networks (INP, sensors, ratio, leak) generated by one
+#                       pool of processes, every job in its own working directory
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Experiment (JSON): {"name": ..., "jobs": [{"path", "cannes", "ratio", "leak", ...}]}
+# Output: Dataset, metrics and log by job, summary of the experiment (JSON)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import argparse
+import concurrent.futures
+import contextlib
+import copy
+import datetime
+import importlib
+import json
+import ntpath
+import os
+import sys
+import time
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+ROOT = os.path.dirname(os.path.abspath(__file__))
+EXPERIMENT_PATH = "results/experiments"
+JOB_DEFAULTS = {"ratio": 1, "leak": "fix", "design": "random", "adaptive": None, "augment": 0, "seed": None, "montecarlo": 0, "uncertainty": "normal"}
+
+# Parsed networks of the worker process: (INP, sensors, modification times) ->
+# (EpanetFile, class counters of the junctions and pipes)
+parsed = {}
+
+# ------------------------------------
+# Read an experiment and complete its jobs
+# Return: name, list of jobs (dict)
+# ------------------------------------
+def readExperiment(spec_path):
+    with open(spec_path, 'r') as f:
+        spec = json.load(f)
+    base = os.path.dirname(os.path.abspath(spec_path))
+    name = spec.get("name", os.path.splitext(ntpath.basename(spec_path))[0])
+    jobs = []
+    names = set()
+    for k, j in enumerate(spec["jobs"]):
+        job = dict(JOB_DEFAULTS)
+        job.update(j)
+        # Files relative to the experiment file
+        job["path"] = os.path.join(base, job["path"])
+        job["cannes"] = os.path.join(base, job["cannes"])
+        job.setdefault("name", "{0}_{1}_{2}".format(ntpath.basename(job["path"]), job["ratio"], job["leak"]))
+        if job["name"] in names:
+            job["name"] = "{0}_{1}".format(job["name"], k)
+        names.add(job["name"])
+        jobs.append(job)
+    return name, jobs
+
+# ------------------------------------
+# Parsed network of the job, from the cache of the worker process
+# ------------------------------------
+def loadNetwork(e, job):
+    key = (job["path"], job["cannes"], os.path.getmtime(job["path"]), os.path.getmtime(job["cannes"]))
+    if key in parsed:
+        ef, e.Junction.id_max, e.Pipe.id_max = parsed[key]
+        e.ef = copy.deepcopy(ef)        # No parsing, only the class counters are set back
+        e.ef.result_path = e.RESULT_PATH
+        return 1
+    e.runSummary()
+    parsed[key] = (copy.deepcopy(e.ef), e.Junction.id_max, e.Pipe.id_max)
+    return 0
+
+# ------------------------------------
+# Run one job in the worker process (working directory: results, networks and
+# log of the job)
+# Return: summary of the job (dict)
+# ------------------------------------
+def runJob(job, work_path):
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    for directory in ("results/sim", "networks"):
+        os.makedirs(os.path.join(work_path, directory), exist_ok=True)
+    os.chdir(work_path)
+    r = {"name": job["name"], "path": work_path, "pid": os.getpid()}
+    tm = time.perf_counter()
+    with open("log.txt", 'w') as log, contextlib.redirect_stdout(log):
+        e = importlib.import_module("epabstract")
+        e.configure(job["path"], job["cannes"], job["ratio"], job["leak"], job["design"], job["adaptive"], job["augment"], job["seed"], job["montecarlo"], job["uncertainty"])
+        r["parse_cached"] = loadNetwork(e, job)
+        e.main_reset()
+        e.ef.sim_data()
+        import matplotlib.pyplot as plt
+        plt.close("all")
+        r["simulations"] = e.ef.sim_cnt
+        r["dataset"] = os.path.join(work_path, e.RESULT_PATH)
+    r["duration"] = time.perf_counter() - tm
+    return r
+
+# ------------------------------------
+# Run the jobs of an experiment over one pool of processes
+# Return: list of job summaries (failed jobs with "error")
+# ------------------------------------
+def runExperiment(name, jobs, processes=None, out_path=EXPERIMENT_PATH):
+    out_path = os.path.abspath(os.path.join(out_path, name))
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(runJob, job, os.path.join(out_path, job["name"])): job for job in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            try:
+                r = future.result()
+                print("[{0}/{1}] {2}: {3} simulations in {4:.1f} [s]{5}".format(len(results) + 1, len(jobs), r["name"], r["simulations"], r["duration"], " (parse cached)" if r["parse_cached"] else ""))
+            except Exception as err:
+                r = {"name": job["name"], "error": str(err)}
+                print("[{0}/{1}] {2}: failed ({3})".format(len(results) + 1, len(jobs), job["name"], err))
+            results.append(r)
+    return results
+
+# ------------------------------------
+# Main
+# ------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Datasets of many networks over one pool of processes")
+    parser.add_argument("spec", help="Experiment (JSON)")
+    parser.add_argument("--processes", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", default=EXPERIMENT_PATH)
+    args = parser.parse_args()
+
+    name, jobs = readExperiment(args.spec)
+    s = datetime.datetime.now()
+    print("Experiment {0}: {1} jobs at {2}".format(name, len(jobs), s))
+    results = runExperiment(name, jobs, args.processes, args.output)
+    failed = [r for r in results if "error" in r]
+    summary = {"name": name, "date": str(s), "duration": str(datetime.datetime.now() - s), "jobs": results}
+    summary_path = os.path.join(args.output, name, "summary.json")
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print("Experiment finished in {0} ({1} failed), summary in {2}".format(summary["duration"], len(failed), summary_path))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : augment.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Augmentation of the simulated pressures with the defects of the sensors:
+#                       noise, calibration offsets, dropouts and resolution of the loggers
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Pressures of the sensors [scenario, sensor], number of realizations, seed
+# Output: Augmented pressures [scenario * realization, sensor]
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import numpy as np
+
+# ------------------------------------
+# Constants (pressure unit of the dataset)
+# ------------------------------------
+NOISE_STD = 0.005           # Gaussian noise of a measure
+OFFSET_STD = 0.01           # Calibration offset of a sensor
+DROPOUT = 0.01              # Probability of a missing measure (NaN)
+RESOLUTION = 0.001          # Resolution of the loggers (0: no quantization)
+
+# ------------------------------------
+# Augmenter class
+# The offsets are drawn once by realization and sensor: the realization k of every
+# scenario is measured by the same (biased) sensors
+# ------------------------------------
+class Augmenter:
+    def __init__(self, n, noise_std=NOISE_STD, offset_std=OFFSET_STD, dropout=DROPOUT, resolution=RESOLUTION, seed=None):
+        self.n = int(n)
+        self.noise_std = noise_std
+        self.offset_std = offset_std
+        self.dropout = dropout
+        self.resolution = resolution
+        self.rng = np.random.default_rng(seed)
+        self.offsets = None
+
+    # ------------------------------------
+    # Augmented pressures, the realizations of a scenario are consecutive
+    # Return: matrix [scenario * n, sensor]
+    # ------------------------------------
+    def augment(self, pressures):
+        pressures = np.atleast_2d(np.asarray(pressures, dtype=np.float64))
+        rows, sensors = pressures.shape
+        if self.offsets is None or self.offsets.shape[1] != sensors:
+            self.offsets = self.rng.normal(0.0, self.offset_std, (self.n, sensors))
+        out = np.repeat(pressures, self.n, axis=0)
+        out += np.tile(self.offsets, (rows, 1))
+        out += self.rng.normal(0.0, self.noise_std, out.shape)
+        if self.resolution:
+            out = np.round(out / self.resolution) * self.resolution
+        if self.dropout:
+            out[self.rng.random(out.shape) < self.dropout] = np.nan
+        return out
+
+    # ------------------------------------
+    # Tags of the augmented rows (same order as augment)
+    # ------------------------------------
+    def tags(self, tags):
+        return [t for t in tags for k in range(self.n)]
+
+    # ------------------------------------
+    # Realization (1 to n) of the augmented rows of a number of scenarios
+    # ------------------------------------
+    def realizations(self, rows):
+        return list(range(1, self.n + 1)) * rows
@@ -0,0 +1,136 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : cache.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Persistent cache of the simulation results, keyed by the hash of the
+#                       network and the quantized leak (pipe, position, flow), LRU by size
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: INP and sensors files of the network, leak parameters, results of the simulations
+# Output: Cached results, hit rate
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import hashlib
+import os
+import sqlite3
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+CACHE_PATH = "results/cache/scenarios.sqlite"
+MAX_BYTES = 256 * 1024 * 1024       # Size of the cached results before eviction
+POSITION_STEP = 0.01                # Quantization of the leak position (randint(5, 95)/100)
+FLOW_STEP = 0.001                   # Quantization of the leak flow
+COMMIT_EVERY = 100                  # Writes between two commits
+
+# ------------------------------------
+# Hash of the content of the files of a network (INP, sensors)
+# ------------------------------------
+def networkKey(paths):
+    h = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        h.update(b"\0")
+    return h.hexdigest()
+
+# ------------------------------------
+# Cache class
+# ------------------------------------
+class ResultCache:
+    def __init__(self, network_paths, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.network = networkKey(network_paths)
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, size INTEGER, used INTEGER)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self.size, self.clock = self.db.execute("SELECT COALESCE(SUM(size), 0), COALESCE(MAX(used), 0) FROM results").fetchone()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.pending = 0
+
+    # ------------------------------------
+    # Key of a leak: content address of the network and of the quantized parameters
+    # ------------------------------------
+    def key(self, pipe, coef, flow, *extra):
+        text = "{0}:{1}:{2}:{3}".format(self.network, pipe, int(round(float(coef) / POSITION_STEP)), int(round(float(flow) / FLOW_STEP)))
+        for e in extra:
+            text += ":{0}".format(e)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    # ------------------------------------
+    # Cached result (bytes) or None
+    # ------------------------------------
+    def get(self, key):
+        row = self.db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.db.execute("UPDATE results SET used = ? WHERE key = ?", (self.clock, key))
+        self.written()
+        return row[0]
+
+    def put(self, key, value):
+        value = bytes(value)
+        self.clock += 1
+        old = self.db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, value, len(value), self.clock))
+        self.size += len(value) - (old[0] if old else 0)
+        if self.size > self.max_bytes:
+            self.evict()
+        self.written()
+
+    # ------------------------------------
+    # Remove the least recently used results until 90% of the maximum size
+    # ------------------------------------
+    def evict(self):
+        target = 0.9 * self.max_bytes
+        rows = self.db.execute("SELECT key, size FROM results ORDER BY used ASC")
+        remove = []
+        for key, size in rows:
+            if self.size <= target:
+                break
+            remove.append((key,))
+            self.size -= size
+        self.db.executemany("DELETE FROM results WHERE key = ?", remove)
+        self.evicted += len(remove)
+
+    def written(self):
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.db.commit()
+            self.pending = 0
+
+    def hitRate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self):
+        return "Cache: {0} hits / {1} ({2:.1%}), {3:.1f} [KiB], {4} evicted".format(
+            self.hits, self.hits + self.misses, self.hitRate(), self.size / 1024, self.evicted)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
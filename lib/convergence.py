@@ -0,0 +1,104 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : convergence.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Streaming statistics of the dataset by pipe and sensor (Welford) to stop
+#                       the simulations when they converge
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Pressures of the sensors of every simulation, tolerances
+# Output: Pipes to simulate again, simulations saved
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+TOLERANCE = 0.01            # Standard error of the mean pressure by sensor (pressure unit)
+MIN_SAMPLES = 5             # Simulations of a pipe before its convergence is tested
+BALANCE = 0.5               # Simulations of the least / most simulated pipe
+
+# ------------------------------------
+# Running mean and variance of vectors (Welford)
+# ------------------------------------
+class RunningStats:
+    def __init__(self):
+        self.n = 0
+        self.mean = None
+        self.m2 = None
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if self.mean is None:
+            self.mean = np.zeros_like(values)
+            self.m2 = np.zeros_like(values)
+        self.n += 1
+        delta = values - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (values - self.mean)
+
+    def variance(self):
+        if self.n < 2:
+            return np.full_like(self.mean, np.inf) if self.mean is not None else np.inf
+        return self.m2 / (self.n - 1)
+
+    # ------------------------------------
+    # Standard error of the mean
+    # ------------------------------------
+    def error(self):
+        return np.sqrt(self.variance() / max(self.n, 1))
+
+# ------------------------------------
+# Convergence of the pressures by pipe (one class of leak by pipe)
+# ------------------------------------
+class ConvergenceTracker:
+    def __init__(self, pipes, tolerance=TOLERANCE, min_samples=MIN_SAMPLES, balance=BALANCE):
+        self.pipes = list(pipes)
+        self.stats = {p: RunningStats() for p in self.pipes}
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+        self.balance = balance
+
+    def add(self, pipe, pressures):
+        self.stats[pipe].add(pressures)
+
+    def converged(self, pipe):
+        s = self.stats[pipe]
+        return s.n >= self.min_samples and float(np.max(s.error())) <= self.tolerance
+
+    # ------------------------------------
+    # Ratio of the simulations of the least and of the most simulated pipe
+    # ------------------------------------
+    def classBalance(self):
+        counts = [s.n for s in self.stats.values()]
+        return min(counts) / max(counts) if counts and max(counts) else 0.0
+
+    # ------------------------------------
+    # Pipes to simulate again: not converged, or under-sampled against the most
+    # simulated pipe (class balance of the dataset)
+    # Return: list of pipes (empty when everything converged)
+    # ------------------------------------
+    def pending(self):
+        most = max(s.n for s in self.stats.values()) if self.stats else 0
+        return [p for p in self.pipes if not self.converged(p) or self.stats[p].n < self.balance * most]
+
+    def report(self, budget, used):
+        done = sum(1 for p in self.pipes if self.converged(p))
+        return "Adaptive stop: {0} simulations of {1} ({2} saved, {3:.1%}), {4}/{5} pipes converged, class balance {6:.2f}".format(
+            used, budget, budget - used, (budget - used) / budget if budget else 0.0, done, len(self.pipes), self.classBalance())
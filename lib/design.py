@@ -0,0 +1,126 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : design.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Designs of the leak scenarios (pipe, position, flow): random, stratified
+#                       by pipe, weighted by the length, Latin hypercube and Sobol
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Pipes (IDs and lengths), number of scenarios, range of the leak flow
+# Output: Scenarios (pipe, position, flow)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import math
+
+import numpy as np
+from scipy.stats import qmc
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+DESIGNS = ["random", "stratified", "length", "lhs", "sobol"]
+POSITION_MIN = 0.05                 # Range of the leak position of addLeaksMiddle
+POSITION_MAX = 0.95
+POSITION_STEP = 0.01
+FLOW_LEVELS = 10                    # Leak flows of the random design (randint(1, 10)/3600 in "rand")
+
+# ------------------------------------
+# Unit interval to leak position (same steps as randint(5, 95)/100)
+# ------------------------------------
+def position(u):
+    steps = round((POSITION_MAX - POSITION_MIN) / POSITION_STEP)
+    k = np.minimum(np.floor(np.asarray(u) * (steps + 1)), steps)
+    return np.round(POSITION_MIN + k * POSITION_STEP, 2)
+
+# ------------------------------------
+# Unit interval to leak flow, continuous or on equally spaced levels (low and high
+# included)
+# ------------------------------------
+def flow(u, flow_range, levels=None):
+    low, high = flow_range
+    u = np.asarray(u)
+    if levels is not None and levels > 1:
+        u = np.minimum(np.floor(u * levels), levels - 1) / (levels - 1)
+    return low + u * (high - low)
+
+# ------------------------------------
+# One point by stratum of [0, 1) for every group of scenarios, in a random order
+# Return: array [n]
+# ------------------------------------
+def stratify(groups, rng):
+    u = np.empty(len(groups))
+    for g in np.unique(groups):
+        k = np.flatnonzero(groups == g)
+        u[k] = (rng.permutation(len(k)) + rng.random(len(k))) / len(k)
+    return u
+
+# ------------------------------------
+# Number of scenarios by pipe, proportional to the weights (largest remainder)
+# Return: array [pipe]
+# ------------------------------------
+def allocate(weights, n):
+    weights = np.asarray(weights, dtype=np.float64)
+    share = n * weights / weights.sum()
+    count = np.floor(share).astype(np.int64)
+    count[np.argsort(count - share, kind="stable")[:n - count.sum()]] += 1
+    return count
+
+# ------------------------------------
+# Scenarios of the design
+# pipes: IDs of the pipes where a leak can be added, lengths: same order
+# flow_range: (min, max) of the leak flow (min == max for a fixed leak), on
+# FLOW_LEVELS levels for the random design, continuous for the others
+# seed: seed or numpy generator (the scenarios continue its sequence)
+# Return: lists of pipes, positions and flows
+# ------------------------------------
+def scenarios(design, pipes, lengths, n, flow_range, seed=None):
+    if design not in DESIGNS:
+        raise ValueError("Unknown scenario design: {0}".format(design))
+    rng = np.random.default_rng(seed)
+    pipes = np.asarray(pipes)
+    if design == "random":
+        # Uniform pipes and positions (previous behaviour of sim_data)
+        k = rng.integers(0, len(pipes), n)
+        u = rng.random((n, 2))
+    elif design in ("stratified", "length"):
+        # Scenarios by pipe (equal or by length), positions and flows stratified on every pipe
+        count = allocate(np.ones(len(pipes)) if design == "stratified" else lengths, n)
+        k = rng.permutation(np.repeat(np.arange(len(pipes)), count))
+        u = np.column_stack((stratify(k, rng), stratify(k, rng)))
+    else:
+        # (pipe, position, flow) on a low discrepancy sequence, the first dimension gives
+        # the pipe: one stratum of 1/n by scenario (LHS) or balanced dyadic intervals (Sobol)
+        if design == "lhs":
+            points = qmc.LatinHypercube(d=3, seed=rng).random(n)
+        else:
+            points = qmc.Sobol(d=3, seed=rng).random_base2(max(0, math.ceil(math.log2(max(n, 1)))))[:n]
+        k = np.minimum((points[:, 0] * len(pipes)).astype(np.int64), len(pipes) - 1)
+        u = points[:, 1:]
+    levels = FLOW_LEVELS if design == "random" else None
+    return [p.item() for p in pipes[k]], position(u[:, 0]).tolist(), flow(u[:, 1], flow_range, levels).tolist()
+
+# ------------------------------------
+# Coverage of the pipes by the scenarios
+# Return: min, mean and max number of scenarios by pipe
+# ------------------------------------
+def coverage(pipes, selected):
+    count = {p: 0 for p in pipes}
+    for p in selected:
+        count[p] += 1
+    values = np.fromiter(count.values(), dtype=np.int64, count=len(count))
+    return int(values.min()), float(values.mean()), int(values.max())
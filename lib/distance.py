@@ -0,0 +1,130 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : distance.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Hydraulic (along the pipes) distance between junctions, the pipe graph is
+#                       stored as a CSR adjacency and the Dijkstra rows are cached on the disk
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: List of pipes (node 1, node 2, length)
+# Output: Distance along the network between two junctions
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import hashlib
+import os
+
+import numpy as np
+
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+CACHE_PATH = "results/cache"
+
+# ------------------------------------
+# Convert the pipes of an EpanetFile (ef.pipes) to a list of edges
+# ------------------------------------
+def edgesFromPipes(pipes):
+    return [(p.node1, p.node2, float(p.length)) for p in pipes.values()]
+
+# ------------------------------------
+# Hydraulic distance class
+# ------------------------------------
+class HydraulicDistance:
+    def __init__(self, edges, cache_path=CACHE_PATH):
+        self.cache_path = cache_path
+        self.rows = {}          # Index of the source node -> distances to every nodes
+        n1 = [str(e[0]).strip() for e in edges]
+        n2 = [str(e[1]).strip() for e in edges]
+        length = np.asarray([float(e[2]) for e in edges], dtype=np.float64)
+        self.ids = sorted(set(n1) | set(n2))
+        self.index = {id: i for i, id in enumerate(self.ids)}
+        i = np.asarray([self.index[n] for n in n1], dtype=np.int64)
+        j = np.asarray([self.index[n] for n in n2], dtype=np.int64)
+        # Both directions, a pipe can be walked in both ways
+        row = np.concatenate((i, j))
+        col = np.concatenate((j, i))
+        data = np.concatenate((length, length))
+        # Keep only the shortest of parallel pipes (CSR would sum the duplicates)
+        order = np.lexsort((data, col, row))
+        row, col, data = row[order], col[order], data[order]
+        first = np.ones(len(row), dtype=bool)
+        first[1:] = (row[1:] != row[:-1]) | (col[1:] != col[:-1])
+        n = len(self.ids)
+        self.graph = csr_matrix((data[first], (row[first], col[first])), shape=(n, n))
+        # The key of the cache depends only on the topology and the lengths
+        h = hashlib.sha1()
+        for a, b, l in sorted(zip(n1, n2, length.tolist())):
+            h.update("{0},{1},{2:.4f};".format(a, b, l).encode())
+        self.key = h.hexdigest()
+        self.loadCache()
+
+    # ------------------------------------
+    # Cache of the Dijkstra rows
+    # ------------------------------------
+    def cacheFile(self):
+        return os.path.join(self.cache_path, "dist_{0}.npz".format(self.key))
+
+    def loadCache(self):
+        if os.path.exists(self.cacheFile()):
+            data = np.load(self.cacheFile())
+            for s, r in zip(data['sources'], data['rows']):
+                self.rows[int(s)] = r
+
+    def saveCache(self):
+        if not self.rows:
+            return
+        os.makedirs(self.cache_path, exist_ok=True)
+        sources = np.asarray(sorted(self.rows), dtype=np.int64)
+        rows = np.vstack([self.rows[s] for s in sources])
+        np.savez(self.cacheFile(), sources=sources, rows=rows)
+
+    # ------------------------------------
+    # Compute (once) the rows of the given source junctions
+    # Return: matrix of distances, one row per source
+    # ------------------------------------
+    def sourceRows(self, sources):
+        idx = [self.index[str(s).strip()] for s in sources]
+        missing = sorted(set(idx) - set(self.rows))
+        if missing:
+            d = dijkstra(self.graph, directed=False, indices=missing)
+            for s, r in zip(missing, np.atleast_2d(d)):
+                self.rows[s] = r
+            self.saveCache()
+        return np.vstack([self.rows[i] for i in idx])
+
+    # ------------------------------------
+    # Distance along the pipes between two junctions
+    # ------------------------------------
+    def distance(self, j1, j2):
+        return float(self.sourceRows([j1])[0][self.index[str(j2).strip()]])
+
+    # ------------------------------------
+    # Distances for a whole evaluation set, one Dijkstra per distinct source
+    # Return: array of distances (inf if the junctions are not connected)
+    # ------------------------------------
+    def distances(self, sources, targets):
+        sources = [str(s).strip() for s in sources]
+        unique = sorted(set(sources))
+        rows = self.sourceRows(unique)
+        pos = {s: i for i, s in enumerate(unique)}
+        r = np.asarray([pos[s] for s in sources], dtype=np.int64)
+        c = np.asarray([self.index[str(t).strip()] for t in targets], dtype=np.int64)
+        return rows[r, c]
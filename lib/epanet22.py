@@ -0,0 +1,265 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : epanet22.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Batch of demand cases solved by threads of one process with the reentrant
+#                       projects of Epanet 2.2 (ctypes), one project by thread
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Filepath (str) of the INP file, list of cases, nodes to read
+# Output: Matrix of pressures [case, node]
+# ********************************************************************************;
+
+# -----------------------------------------
+# Import
+# -----------------------------------------
+import ctypes
+import ctypes.util
+import glob
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+LIBRARY_ENV = "EPABSTRACT_EPANET22"     # Path of the Epanet 2.2 library (optional)
+CHUNK_SIZE = 64             # Cases solved by a thread for one task
+EN_BASEDEMAND = 1
+EN_EMITTER = 3
+EN_PRESSURE = 11
+EN_INITSTATUS = 4
+EN_INITSETTING = 5
+MISSING = -1.0e10           # Setting of a valve with a fixed status
+EN_TRIALS = 0
+
+# Epanet 2.2 library, loaded at the first project
+lib = None
+lib_lock = threading.Lock()
+
+# -----------------------------------------
+# Path of the library: environment variable, system library, or the one shipped
+# with wntr
+# -----------------------------------------
+def libraryPath():
+    if os.environ.get(LIBRARY_ENV):
+        return os.environ[LIBRARY_ENV]
+    for name in ("epanet22", "epanet2"):
+        path = ctypes.util.find_library(name)
+        if path:
+            return path
+    try:
+        import wntr
+    except ImportError:
+        return None
+    for pattern in ("libepanet22.so", "libepanet22.dylib", "epanet22.dll"):
+        found = glob.glob(os.path.join(os.path.dirname(wntr.__file__), "epanet", "libepanet", "*", pattern))
+        if found:
+            return found[0]
+    return None
+
+def library():
+    global lib
+    with lib_lock:
+        if lib is None:
+            path = libraryPath()
+            if path is None:
+                raise ImportError("Epanet 2.2 library not found (set {0} or install wntr)".format(LIBRARY_ENV))
+            loaded = ctypes.CDLL(path)
+            if not hasattr(loaded, "EN_createproject"):
+                raise ImportError("{0} is not Epanet 2.2 (no EN_createproject)".format(path))
+            loaded.EN_setnodevalue.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_double]
+            loaded.EN_setoption.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_double]
+            loaded.EN_getnodevalue.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_double)]
+            loaded.EN_setlinkvalue.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_double]
+            loaded.EN_getlinkvalue.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_double)]
+            lib = loaded
+    return lib
+
+# -----------------------------------------
+# Check the error code of a function
+# Return: the warning code (below 100, e.g. 1: unbalanced)
+# -----------------------------------------
+def check(err):
+    if err > 100:
+        msg = ctypes.create_string_buffer(256)
+        lib.EN_geterror(err, msg, 255)
+        raise RuntimeError("Epanet error {0}: {1}".format(err, msg.value.decode()))
+    return err
+
+# -----------------------------------------
+# Project of Epanet 2.2, same methods as SolverSession (lib/session.py) but any
+# number of them by process
+# -----------------------------------------
+class Project:
+    def __init__(self, path, trials=None):
+        library()
+        self.path = path
+        self.rpt = os.path.join(tempfile.gettempdir(), "epabstract_{0}_{1}.rpt".format(os.getpid(), id(self)))
+        self.handle = ctypes.c_void_p()
+        check(lib.EN_createproject(ctypes.byref(self.handle)))
+        check(lib.EN_open(self.handle, path.encode(), self.rpt.encode(), b""))     # Scratch output file
+        if trials is not None:
+            check(lib.EN_setoption(self.handle, EN_TRIALS, float(trials)))
+        check(lib.EN_openH(self.handle))
+        self.node_index = {}
+        self.base_demand = {}
+        self.base_emitter = {}
+        self.base_link = {}
+        self.link_index = {}
+        self.solved = 0
+        self.value = ctypes.c_double()
+        self.time = ctypes.c_long()
+
+    def nodeIndex(self, id):
+        id = str(id).strip()
+        if id not in self.node_index:
+            index = ctypes.c_int()
+            check(lib.EN_getnodeindex(self.handle, id.encode(), ctypes.byref(index)))
+            self.node_index[id] = index.value
+        return self.node_index[id]
+
+    def nodeIndexes(self, ids):
+        return np.asarray([self.nodeIndex(id) for id in ids], dtype=np.int64)
+
+    def linkIndex(self, id):
+        id = str(id).strip()
+        if id not in self.link_index:
+            index = ctypes.c_int()
+            check(lib.EN_getlinkindex(self.handle, id.encode(), ctypes.byref(index)))
+            self.link_index[id] = index.value
+        return self.link_index[id]
+
+    def getValue(self, i, code):
+        check(lib.EN_getnodevalue(self.handle, int(i), code, ctypes.byref(self.value)))
+        return self.value.value
+
+    def setDemands(self, demands, add=0):
+        for id, demand in demands.items():
+            i = self.nodeIndex(id)
+            if i not in self.base_demand:
+                self.base_demand[i] = self.getValue(i, EN_BASEDEMAND)
+            if add:
+                demand = self.base_demand[i] + float(demand)
+            check(lib.EN_setnodevalue(self.handle, i, EN_BASEDEMAND, float(demand)))
+
+    def setEmitters(self, emitters):
+        for id, coefficient in emitters.items():
+            i = self.nodeIndex(id)
+            if i not in self.base_emitter:
+                self.base_emitter[i] = self.getValue(i, EN_EMITTER)
+            check(lib.EN_setnodevalue(self.handle, i, EN_EMITTER, float(coefficient)))
+
+    def setLinks(self, links):
+        for id, values in links.items():
+            i = self.linkIndex(id)
+            for code, value in values.items():
+                for c in ((EN_INITSTATUS, EN_INITSETTING) if code in (EN_INITSTATUS, EN_INITSETTING) else (code,)):
+                    if (i, c) not in self.base_link:
+                        check(lib.EN_getlinkvalue(self.handle, i, c, ctypes.byref(self.value)))
+                        self.base_link[(i, c)] = self.value.value
+                check(lib.EN_setlinkvalue(self.handle, i, code, float(value)))
+
+    def apply(self, edit):
+        self.setDemands(edit.get("demands", {}))
+        self.setEmitters(edit.get("emitters", {}))
+        self.setLinks(edit.get("links", {}))
+
+    def restore(self):
+        for i, demand in self.base_demand.items():
+            check(lib.EN_setnodevalue(self.handle, i, EN_BASEDEMAND, demand))
+        for i, coefficient in self.base_emitter.items():
+            check(lib.EN_setnodevalue(self.handle, i, EN_EMITTER, coefficient))
+        for (i, code), value in sorted(self.base_link.items(), key=lambda v: v[0][1] != EN_INITSTATUS):
+            if value > MISSING / 2:
+                check(lib.EN_setlinkvalue(self.handle, i, code, value))
+        self.base_demand = {}
+        self.base_emitter = {}
+        self.base_link = {}
+
+    # -----------------------------------------
+    # Steady state solution (first period only), the GIL is released by ctypes
+    # Return: warning code of Epanet (0: converged, 1: unbalanced)
+    # -----------------------------------------
+    def solve(self):
+        check(lib.EN_initH(self.handle, 0))
+        ret = check(lib.EN_runH(self.handle, ctypes.byref(self.time)))
+        self.solved += 1
+        return ret
+
+    def pressures(self, indexes, out=None):
+        if out is None:
+            out = np.empty(len(indexes), dtype=np.float64)
+        for k, i in enumerate(indexes):
+            out[k] = self.getValue(i, EN_PRESSURE)
+        return out
+
+    def baseDemands(self, ids):
+        return np.array([self.getValue(i, EN_BASEDEMAND) for i in self.nodeIndexes(ids)], dtype=np.float64)
+
+    def close(self):
+        lib.EN_closeH(self.handle)
+        lib.EN_close(self.handle)
+        lib.EN_deleteproject(self.handle)
+        if os.path.exists(self.rpt):
+            os.remove(self.rpt)
+
+# -----------------------------------------
+# Solve every case as lib/sweep.py, by threads sharing the result matrix: every
+# thread opens its project once and writes its rows in place
+# Return: matrix [case, node] in the pressure unit of Epanet
+# -----------------------------------------
+def sweep(path, cases, nodes, threads=None, add=0, emitter=0, trials=None):
+    nodes = [str(n) for n in nodes]
+    out = np.empty((len(cases), len(nodes)), dtype=np.float64)
+    if not len(cases):
+        return out
+    local = threading.local()
+    projects = []
+    lock = threading.Lock()
+
+    def solveChunk(start):
+        if not hasattr(local, "project"):
+            local.project = Project(path, trials)
+            local.idx = local.project.nodeIndexes(nodes)
+            with lock:
+                projects.append(local.project)
+        project = local.project
+        for k in range(start, min(start + CHUNK_SIZE, len(cases))):
+            case = cases[k]
+            try:
+                if isinstance(case, dict):
+                    project.apply(case)
+                elif emitter:
+                    project.setEmitters({j: case[1] for j in case[0]})
+                else:
+                    project.setDemands({j: case[1] for j in case[0]}, add)
+                if project.solve() == 1 and trials is not None:
+                    out[k] = np.nan         # Unbalanced solution
+                else:
+                    project.pressures(local.idx, out[k])
+            finally:
+                project.restore()
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as pool:
+            list(pool.map(solveChunk, range(0, len(cases), CHUNK_SIZE)))
+    finally:
+        for project in projects:
+            project.close()
+    return out
@@ -0,0 +1,122 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : families.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Scenario families other than the leaks (pipe closures, valve operations,
+#                       bursts) as edits of the base network applied by the toolkit
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Family, candidate links, number of scenarios, random generator
+# Output: Edits of the network (lib/sweep.py cases), tagged node of every scenario
+# ********************************************************************************;
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+FAMILIES = ("closure", "valve", "burst")
+EN_INITSTATUS = 4           # Same codes in Epanet 2.0 and 2.2
+EN_INITSETTING = 5
+VALVE_CLOSE = 0.2           # Probability of a closed valve, otherwise its setting is scaled
+VALVE_FACTOR = (0.5, 1.5)   # Range of the scale of the valve setting
+BURST_RANGE = (0.5, 5.0)    # Range of the emitter coefficient of a burst (flow unit / pressure^0.5)
+
+# ------------------------------------
+# Links whose closure separates nodes from every source (reservoirs and tanks):
+# bridges of the open links (id, node 1, node 2) with no source on one side, found
+# by one depth-first search (Tarjan) counting the sources below every node
+# Return: set of link IDs
+# ------------------------------------
+def disconnecting(links, sources):
+    adjacency = {}
+    for k, (id, n1, n2) in enumerate(links):
+        adjacency.setdefault(str(n1), []).append((str(n2), k))
+        adjacency.setdefault(str(n2), []).append((str(n1), k))
+    sources = set(str(s) for s in sources)
+    order, low, below = {}, {}, {}     # Discovery order, lowest order reachable, sources below
+    cut = set()
+    for root in adjacency:
+        if root in order:
+            continue
+        order[root] = low[root] = len(order)
+        below[root] = int(root in sources)
+        stack = [(root, -1, iter(adjacency[root]))]
+        bridges = []            # (node below the bridge, link index)
+        while stack:
+            node, via, neighbours = stack[-1]
+            for next_node, k in neighbours:
+                if k == via:
+                    continue
+                if next_node in order:
+                    low[node] = min(low[node], order[next_node])
+                else:
+                    order[next_node] = low[next_node] = len(order)
+                    below[next_node] = int(next_node in sources)
+                    stack.append((next_node, k, iter(adjacency[next_node])))
+                    break
+            else:
+                stack.pop()
+                if stack:
+                    parent = stack[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                    below[parent] += below[node]
+                    if low[node] > order[parent]:
+                        bridges.append((node, via))
+        # A network part without source is already disconnected
+        total = below[root]
+        cut.update(links[k][0] for node, k in bridges if total and below[node] in (0, total))
+    return cut
+
+# ------------------------------------
+# Scenarios of a family
+# links: closure -> {pipe: (node 1, node 2)} of the open pipes
+#        valve -> {valve: (node 1, node 2, setting)}
+#        burst -> {pipe: (node 1, node 2)}, on the leak junctions of the
+#                 super-network if given (lib/supernet.py)
+# cut: links whose closure disconnects nodes (see disconnecting), their closures are
+# None (not solved, failures)
+# Return: edits, tagged nodes (closure: node 1, valve: node 2 (downstream), burst:
+# closest node as addLeaksMiddle), pipes (None for the valves)
+# ------------------------------------
+def scenarios(family, links, n, rng, supernet=None, cut=()):
+    if family not in FAMILIES:
+        raise ValueError("Unknown scenario family {0} ({1})".format(family, ", ".join(FAMILIES)))
+    ids = sorted(links)
+    if not ids:
+        raise ValueError("No link for the {0} scenarios".format(family))
+    edits, nodes, pipes = [], [], []
+    for id in (ids[k] for k in rng.integers(0, len(ids), n)):
+        link = links[id]
+        if family == "closure":
+            edits.append({"links": {id: {EN_INITSTATUS: 0}}} if id not in cut else None)
+            nodes.append(link[0])
+            pipes.append(id)
+        elif family == "valve":
+            if rng.random() < VALVE_CLOSE:
+                edits.append({"links": {id: {EN_INITSTATUS: 0}}} if id not in cut else None)
+            else:
+                edits.append({"links": {id: {EN_INITSETTING: float(link[2]) * rng.uniform(*VALVE_FACTOR)}}})
+            nodes.append(link[1])
+            pipes.append(None)
+        else:
+            x = rng.random()
+            coefficient = rng.uniform(*BURST_RANGE)
+            if supernet is not None:
+                node, x = supernet.leakNode(id, x)
+            else:
+                node = link[0] if x >= 0.5 else link[1]
+            edits.append({"emitters": {node: coefficient}})
+            nodes.append(link[0] if x >= 0.5 else link[1])
+            pipes.append(id)
+    return edits, nodes, pipes
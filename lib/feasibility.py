@@ -0,0 +1,108 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : feasibility.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Pressure feasibility of the generated scenarios (negative pressures, minima
+#                       by sensor, pressure-deficient leak pipes) updated with every result
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Pressures of the sensors of the scenarios, pipe of every scenario
+# Output: Statistics of feasibility (report, JSON)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import json
+
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+THRESHOLD = 0.0             # Pressure below which a sensor is deficient (pressure unit of the rows)
+DEFICIENT_SHARE = 0.5       # Share of deficient scenarios of a pressure-deficient leak pipe
+
+# ------------------------------------
+# Feasibility statistics, the rows are only read (no simulation)
+# ------------------------------------
+class FeasibilityStats:
+    def __init__(self, sensors, threshold=THRESHOLD):
+        self.sensors = [str(s) for s in sensors]
+        self.index = {s: k for k, s in enumerate(self.sensors)}
+        self.threshold = threshold
+        self.rows = 0
+        self.negative = 0                                   # Scenarios with a deficient sensor
+        self.minimum = np.full(len(self.sensors), np.inf)
+        self.sensor_negative = np.zeros(len(self.sensors), dtype=np.int64)
+        self.pipes = {}                                     # Pipe -> [scenarios, deficient, minimum]
+
+    # ------------------------------------
+    # Add scenarios: pressures [row, sensor] in the order of sensors (default: the
+    # sensors of the statistics), pipe of every row (None: unknown)
+    # ------------------------------------
+    def add(self, pressures, pipes=None, sensors=None):
+        p = np.atleast_2d(np.asarray(pressures, dtype=np.float64))
+        if sensors is not None and [str(s) for s in sensors] != self.sensors:
+            columns = [self.index[str(s)] for s in sensors]
+            full = np.full((len(p), len(self.sensors)), np.nan)
+            full[:, columns] = p
+            p = full
+        low = p < self.threshold
+        deficient = low.any(axis=1)
+        self.rows += len(p)
+        self.negative += int(deficient.sum())
+        self.minimum = np.fmin(self.minimum, np.nanmin(p, axis=0, initial=np.inf))
+        self.sensor_negative += low.sum(axis=0)
+        if pipes is not None:
+            row_min = np.nanmin(p, axis=1, initial=np.inf)
+            for pipe, d, m in zip(pipes, deficient, row_min):
+                if pipe is None:
+                    continue
+                s = self.pipes.setdefault(pipe, [0, 0, np.inf])
+                s[0] += 1
+                s[1] += int(d)
+                s[2] = min(s[2], float(m))
+
+    # ------------------------------------
+    # Ratio of the scenarios without and with deficient pressure (as pressureRatio)
+    # ------------------------------------
+    def ratio(self):
+        return (self.rows - self.negative) / self.negative if self.negative else 0
+
+    # ------------------------------------
+    # Pressure-deficient leak pipes
+    # Return: list of (pipe, share of deficient scenarios, minimum pressure), worst first
+    # ------------------------------------
+    def deficient(self, share=DEFICIENT_SHARE):
+        sites = [(p, s[1] / s[0], s[2]) for p, s in self.pipes.items() if s[0] and s[1] / s[0] >= share]
+        return sorted(sites, key=lambda s: (-s[1], s[2]))
+
+    def toDict(self):
+        return {"rows": self.rows, "negative": self.negative, "ratio": self.ratio(), "threshold": self.threshold,
+                "sensors": {s: {"minimum": float(self.minimum[k]) if np.isfinite(self.minimum[k]) else None,
+                                "negative": int(self.sensor_negative[k])} for k, s in enumerate(self.sensors)},
+                "deficient_pipes": [{"pipe": p, "share": share, "minimum": m} for p, share, m in self.deficient()]}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=2)
+
+    def report(self):
+        if not self.rows or not np.isfinite(self.minimum).any():
+            return "Feasibility: no scenario"
+        k = int(np.argmin(self.minimum))
+        return "Feasibility: {0}/{1} scenarios with a pressure below {2} ({3:.1%}), minimum {4:.3f} on sensor {5}, {6} pressure-deficient leak pipes".format(
+            self.negative, self.rows, self.threshold, self.negative / self.rows, self.minimum[k], self.sensors[k], len(self.deficient()))
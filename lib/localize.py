@@ -0,0 +1,171 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : localize.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Leak localization by the nearest neighbours of observed pressures in a
+#                       dataset (normalized, optionally reduced by PCA), queries by batch
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Dataset (p_<sensor> columns, c tag of the closest node), observed pressures
+# Output: Candidate junctions and pipes with scores, distance to the real leak
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+K = 10                      # Neighbours of an observation
+CANDIDATES = 3              # Candidate junctions returned by observation
+QUERY_BATCH = 256           # Observations compared at once
+ROW_BLOCK = 65536           # Dataset rows compared at once (memory: QUERY_BATCH * ROW_BLOCK)
+EPS = 1e-9
+
+# ------------------------------------
+# Read a dataset of epabstract.py
+# Return: sensors, pressures [row, sensor] (float32), label of every row (index of the
+# tagged sensor, -1: the closest node is not a sensor)
+# ------------------------------------
+def readDataset(path):
+    import pandas as pd
+    df = pd.read_csv(path, dtype={"c": str})
+    columns = [c for c in df.columns if c.startswith("p_")]
+    sensors = [c[2:] for c in columns]
+    pressures = df[columns].to_numpy(dtype=np.float32)
+    return sensors, pressures, tagLabels(df["c"].fillna("").values)
+
+def tagLabels(tags):
+    return np.asarray([t.find("1") for t in tags], dtype=np.int64)
+
+# ------------------------------------
+# Index of the dataset: the rows are normalized by sensor and projected on the
+# principal components (components=None: no reduction)
+# ------------------------------------
+class LeakIndex:
+    def __init__(self, sensors, pressures, labels, components=None, pipes=None):
+        self.sensors = [str(s) for s in sensors]
+        self.labels = np.asarray(labels, dtype=np.int64)
+        x = np.asarray(pressures, dtype=np.float64)
+        self.mean = np.nanmean(x, axis=0)
+        self.std = np.nanstd(x, axis=0)
+        self.std[~(self.std > EPS)] = 1.0
+        self.basis = None
+        z = self.normalize(x)
+        if components is not None and components < z.shape[1]:
+            # Principal directions from the covariance (sensors x sensors)
+            values, vectors = np.linalg.eigh(z.T @ z / max(len(z) - 1, 1))
+            order = np.argsort(values)[::-1][:components]
+            self.basis = vectors[:, order]
+            self.explained = float(values[order].sum() / max(values.sum(), EPS))
+            z = z @ self.basis
+        self.z = np.ascontiguousarray(z, dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.z, self.z)
+        # Pipes of every junction: (pipe, position on the side of the junction)
+        self.pipes = {}
+        for id, (node1, node2) in (pipes or {}).items():
+            # Closest node tag: node 1 for a position >= 0.5, node 2 below
+            self.pipes.setdefault(str(node1), []).append((id, 0.75))
+            self.pipes.setdefault(str(node2), []).append((id, 0.25))
+
+    # ------------------------------------
+    # Normalized observations, the missing sensors (NaN) are at the mean
+    # ------------------------------------
+    def normalize(self, x):
+        z = (np.asarray(x, dtype=np.float64) - self.mean) / self.std
+        return np.nan_to_num(z, nan=0.0)
+
+    def project(self, observations):
+        z = self.normalize(np.atleast_2d(observations))
+        if self.basis is not None:
+            z = z @ self.basis
+        return z.astype(np.float32)
+
+    # ------------------------------------
+    # k nearest rows of every observation, the rows are scanned by blocks and the
+    # best k of the blocks are merged
+    # Return: distances, row indexes [observation, k] (sorted)
+    # ------------------------------------
+    def neighbours(self, observations, k=K):
+        q = self.project(observations)
+        k = min(k, len(self.z))
+        dist = np.empty((len(q), k), dtype=np.float32)
+        rows = np.empty((len(q), k), dtype=np.int64)
+        for s in range(0, len(q), QUERY_BATCH):
+            qb = q[s:s + QUERY_BATCH]
+            qn = np.einsum("ij,ij->i", qb, qb)[:, None]
+            best_d = np.full((len(qb), 0), np.inf, dtype=np.float32)
+            best_i = np.empty((len(qb), 0), dtype=np.int64)
+            for r in range(0, len(self.z), ROW_BLOCK):
+                d2 = qn + self.norms[None, r:r + ROW_BLOCK] - 2.0 * (qb @ self.z[r:r + ROW_BLOCK].T)
+                kk = min(k, d2.shape[1])
+                part = np.argpartition(d2, kk - 1, axis=1)[:, :kk]
+                best_d = np.hstack([best_d, np.take_along_axis(d2, part, axis=1)])
+                best_i = np.hstack([best_i, part + r])
+                if best_d.shape[1] > k:
+                    keep = np.argpartition(best_d, k - 1, axis=1)[:, :k]
+                    best_d = np.take_along_axis(best_d, keep, axis=1)
+                    best_i = np.take_along_axis(best_i, keep, axis=1)
+            order = np.argsort(best_d, axis=1)
+            dist[s:s + len(qb)] = np.sqrt(np.maximum(np.take_along_axis(best_d, order, axis=1), 0.0))
+            rows[s:s + len(qb)] = np.take_along_axis(best_i, order, axis=1)
+        return dist, rows
+
+    # ------------------------------------
+    # Candidate leaks of every observation: vote of the neighbours weighted by the
+    # inverse distance, the score is the share of the votes. The dataset only tags
+    # the closest sensor node, the pipes of a candidate are all the pipes of that
+    # junction with the half of the pipe on its side (0.75 from node 1, 0.25 from
+    # node 2), not a position found in the data
+    # Return: list (by observation) of dict {"junction", "score", "pipes"} (junction
+    # None: closest node not a sensor)
+    # ------------------------------------
+    def localize(self, observations, k=K, candidates=CANDIDATES):
+        dist, rows = self.neighbours(observations, k)
+        weights = 1.0 / (dist + EPS)
+        labels = self.labels[rows]
+        results = []
+        for o in range(len(rows)):
+            votes = {}
+            for label, w in zip(labels[o], weights[o]):
+                votes[label] = votes.get(label, 0.0) + float(w)
+            total = sum(votes.values())
+            best = sorted(votes.items(), key=lambda v: v[1], reverse=True)[:candidates]
+            results.append([{"junction": self.sensors[l] if l >= 0 else None, "score": v / total,
+                             "pipes": self.pipes.get(self.sensors[l], []) if l >= 0 else []} for l, v in best])
+        return results
+
+    # ------------------------------------
+    # Localization of labelled rows (e.g. another dataset), distance between the best
+    # candidate and the real junction with their coordinates (ID -> (x, y)). The rows
+    # whose closest node is not a sensor (label -1) have no real junction: they are
+    # counted as unlabeled and not scored
+    # Return: dict of the accuracy (over the labelled rows) and of the distances
+    # ------------------------------------
+    def evaluate(self, pressures, labels, coordinates, k=K):
+        labels = np.asarray(labels, dtype=np.int64)
+        labelled = labels >= 0
+        observations = np.atleast_2d(np.asarray(pressures))[labelled]
+        predicted = [c[0]["junction"] for c in self.localize(observations, k, 1)] if len(observations) else []
+        real = [self.sensors[l] for l in labels[labelled]]
+        located = [(p, r) for p, r in zip(predicted, real) if p is not None]
+        distances = np.asarray([np.hypot(coordinates[p][0] - coordinates[r][0], coordinates[p][1] - coordinates[r][1])
+                                for p, r in located], dtype=np.float64)
+        return {"observations": len(labels), "unlabeled": int((~labelled).sum()),
+                "accuracy": float(np.mean([p == r for p, r in zip(predicted, real)])) if len(real) else 0.0,
+                "located": len(located), "mean_distance": float(distances.mean()) if len(distances) else 0.0,
+                "median_distance": float(np.median(distances)) if len(distances) else 0.0}
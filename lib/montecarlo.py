@@ -0,0 +1,79 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : montecarlo.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Monte Carlo of the consumption: the base demands of every junction are
+#                       drawn around their value for every draw of a leak scenario
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Base demands of the junctions, distribution, seed of the scenario
+# Output: Edits of the network (lib/sweep.py cases), one by draw
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+DISTRIBUTIONS = ("normal", "lognormal", "uniform")
+CV = 0.2                    # Relative spread of a demand (coefficient of variation)
+
+# ------------------------------------
+# Demand sampler: all the draws of a scenario come from one generator seeded by the
+# scenario, draw k of the seed s is the row k of the matrix (tag "s-k")
+# ------------------------------------
+class DemandSampler:
+    def __init__(self, junctions, base, distribution="normal", cv=CV):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError("Unknown distribution {0} ({1})".format(distribution, ", ".join(DISTRIBUTIONS)))
+        base = np.asarray(base, dtype=np.float64)
+        consumers = np.flatnonzero(base)           # Junctions without demand stay closed
+        self.junctions = [str(junctions[k]) for k in consumers]
+        self.base = base[consumers]
+        self.distribution = distribution
+        self.cv = cv
+
+    # ------------------------------------
+    # Demands of n draws
+    # Return: matrix [draw, consumer junction]
+    # ------------------------------------
+    def draw(self, seed, n):
+        rng = np.random.default_rng(seed)
+        shape = (n, len(self.base))
+        if self.distribution == "normal":
+            factor = np.maximum(1.0 + self.cv * rng.standard_normal(shape), 0.0)
+        elif self.distribution == "lognormal":
+            sigma = np.sqrt(np.log1p(self.cv ** 2))
+            factor = np.exp(sigma * rng.standard_normal(shape) - sigma ** 2 / 2)     # Mean 1
+        else:
+            width = self.cv * np.sqrt(3.0)                                          # Same deviation
+            factor = rng.uniform(1.0 - width, 1.0 + width, shape)
+        return self.base * factor
+
+    # ------------------------------------
+    # Edits of n draws around a leak (junction set to the leak demand)
+    # Return: list of edits, tags of the draws
+    # ------------------------------------
+    def edits(self, seed, n, leak_node=None, leak_demand=0.0):
+        edits = []
+        for row in self.draw(seed, n):
+            demands = dict(zip(self.junctions, row.tolist()))
+            if leak_node is not None:
+                demands[str(leak_node)] = float(leak_demand)
+            edits.append({"demands": demands})
+        return edits, ["{0}-{1}".format(seed, k) for k in range(n)]
@@ -0,0 +1,118 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : notify.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Notifications at the end of the simulations, sent in a background thread
+#                       through an optional backend (none, console, Pushbullet)
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: EPABSTRACT_NOTIFY=none|console|pushbullet, EPABSTRACT_PUSHBULLET_KEY=<key>
+# Output: Notification
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import os
+import queue
+import threading
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+NOTIFY_ENV = "EPABSTRACT_NOTIFY"
+PUSHBULLET_ENV = "EPABSTRACT_PUSHBULLET_KEY"
+
+# ------------------------------------
+# Backends, only send(title, body) is required
+# ------------------------------------
+class NullNotifier:
+    def send(self, title, body):
+        pass
+
+class ConsoleNotifier:
+    def send(self, title, body):
+        print("[{0}] {1}".format(title, body))
+
+class PushbulletNotifier:
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.pb = None
+
+    def send(self, title, body):
+        # The connection (network call) is made on the first notification only
+        if self.pb is None:
+            from pushbullet import Pushbullet
+            self.pb = Pushbullet(self.api_key)
+        self.pb.push_note(title, body)
+
+BACKENDS = {
+    "none": lambda: NullNotifier(),
+    "console": lambda: ConsoleNotifier(),
+    "pushbullet": lambda: PushbulletNotifier(os.environ[PUSHBULLET_ENV]),
+}
+
+# ------------------------------------
+# Register a new backend (factory without argument)
+# ------------------------------------
+def registerBackend(name, factory):
+    BACKENDS[name] = factory
+
+# ------------------------------------
+# Asynchronous notifier: the notifications are sent by a daemon thread, the
+# errors of the backend (e.g. no network) are only printed
+# ------------------------------------
+class AsyncNotifier:
+    def __init__(self, backend):
+        self.backend = backend
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def send(self, title, body):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.queue.put((title, body))
+
+    def run(self):
+        while True:
+            title, body = self.queue.get()
+            try:
+                self.backend.send(title, body)
+            except Exception as e:
+                print("Notification not sent: {0}".format(e))
+            finally:
+                self.queue.task_done()
+
+    # ------------------------------------
+    # Wait for the pending notifications (end of the program)
+    # ------------------------------------
+    def flush(self, timeout=10):
+        if self.thread is None:
+            return
+        done = threading.Event()
+        threading.Thread(target=lambda: (self.queue.join(), done.set()), daemon=True).start()
+        done.wait(timeout)
+
+# ------------------------------------
+# Notifier of the given backend (default: EPABSTRACT_NOTIFY, pushbullet if a key is
+# given, none otherwise)
+# ------------------------------------
+def getNotifier(name=None):
+    if name is None:
+        name = os.environ.get(NOTIFY_ENV, "pushbullet" if os.environ.get(PUSHBULLET_ENV) else "none")
+    if name not in BACKENDS:
+        raise ValueError("Unknown notification backend: {0}".format(name))
+    return AsyncNotifier(BACKENDS[name]())
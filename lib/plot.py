@@ -0,0 +1,118 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : plot.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Array based plotting of the junctions for large networks (one scatter call,
+#                       decimation of the points, culling of the labels, headless export)
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Arrays of values of the junctions
+# Output: Matplotlib figures (shown or saved)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import matplotlib.pyplot as plt
+import numpy as np
+
+from numpy.polynomial.polynomial import polyfit
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+MAX_POINTS = 20000          # Points drawn on a figure, the others are decimated
+MAX_LABELS = 200            # Labels drawn on a figure
+
+# ------------------------------------
+# Indexes of the points to draw: every kept point and a regular subset of the others
+# ------------------------------------
+def decimate(n, max_points=MAX_POINTS, keep=None):
+    if n <= max_points:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool) if keep is None else np.asarray(keep, dtype=bool)
+    others = np.flatnonzero(~keep)
+    step = int(np.ceil(len(others) / float(max(max_points - keep.sum(), 1))))
+    return np.union1d(np.flatnonzero(keep), others[::step])
+
+# ------------------------------------
+# Limits of an axe with a small margin
+# ------------------------------------
+def axisLimits(values):
+    low = values.min()
+    high = values.max()
+    if low >= 1:
+        return low - (low / 80), high + (high / 80)
+    return low - 2, high + (high / 80)
+
+# ------------------------------------
+# Scatter of the junctions with the minimum and maximum of Y
+# ------------------------------------
+def scatter2D(ax, axe_x, axe_y, unit_y, color='black', points=1, extrema=1, regression=0, max_points=MAX_POINTS):
+    axe_x = np.asarray(axe_x, dtype=np.float64)
+    axe_y = np.asarray(axe_y, dtype=np.float64)
+    i_max = np.argmax(axe_y)
+    i_min = np.argmin(axe_y)
+    if points:
+        keep = np.zeros(len(axe_x), dtype=bool)
+        keep[[i_min, i_max]] = True
+        idx = decimate(len(axe_x), max_points, keep)
+        ax.scatter(axe_x[idx], axe_y[idx], c=color)
+    if extrema:
+        for i in (i_max, i_min):
+            ax.text(axe_x[i], axe_y[i], str(int(axe_x[i])) + ": " + str(int(axe_y[i])) + " [" + unit_y + "]", fontsize=12)
+        if points:
+            ax.scatter(axe_x[[i_max, i_min]], axe_y[[i_max, i_min]], c='r')
+    if regression:
+        b, m = polyfit(axe_x, axe_y, 1)
+        order = np.argsort(axe_x)
+        ax.plot(axe_x[order], b + m * axe_x[order], '-')
+    ax.set_xlim(*axisLimits(axe_x))
+    ax.set_ylim(*axisLimits(axe_y))
+
+# ------------------------------------
+# 3D map of the junctions, labels only for the highlighted junctions
+# colors: array of colors, labels: array of texts ("" for no label)
+# ------------------------------------
+def scatter3D(ax, xs, ys, zs, colors, labels, max_points=MAX_POINTS, max_labels=MAX_LABELS):
+    labels = np.asarray(labels)
+    labelled = labels != ""
+    idx = decimate(len(xs), max_points, labelled)
+    ax.scatter(xs[idx], ys[idx], zs[idx], c=colors[idx], s=4, depthshade=False)
+    for i in np.flatnonzero(labelled)[:max_labels]:
+        ax.text(xs[i], ys[i], zs[i], labels[i], color=colors[i])
+    ax.set_xlim(xs.min(), xs.max())
+    ax.set_ylim(ys.min(), ys.max())
+    ax.set_zlim(zs.min(), zs.max())
+
+# ------------------------------------
+# Figure drawn off-screen by Agg, whatever the backend of pyplot
+# ------------------------------------
+def aggFigure():
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig
+
+# ------------------------------------
+# Show the figure, or save it without any display if a path is given
+# ------------------------------------
+def showOrSave(fig, path=None):
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
+        plt.close(fig)
@@ -0,0 +1,150 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : profiler.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Wall time and memory peak (tracemalloc) of every stage of the simulation
+#                       loop, breakdown with percentiles at the end of a run
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: EPABSTRACT_PROFILE=1 to enable, EPABSTRACT_CPROFILE=<file> for a cProfile dump
+# Output: Table of the stages
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import cProfile
+import functools
+import os
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+PROFILE_ENV = "EPABSTRACT_PROFILE"
+CPROFILE_ENV = "EPABSTRACT_CPROFILE"
+
+# ------------------------------------
+# Profiler class
+# ------------------------------------
+class StageProfiler:
+    def __init__(self):
+        self.enabled = 0
+        self.memory = 0
+        self.cprofile = None
+        self.cprofile_path = None
+        self.times = {}         # Stage -> list of durations [s]
+        self.peaks = {}         # Stage -> list of memory peaks [B]
+        self.stack = []         # Running stages: [name, start, memory at start, peak of children]
+        self.start = 0.0
+        if os.environ.get(PROFILE_ENV, "0") not in ("", "0"):
+            self.enable(1, os.environ.get(CPROFILE_ENV))
+
+    # ------------------------------------
+    # Start the profiling (the environment variable is set for the child processes)
+    # ------------------------------------
+    def enable(self, memory=1, cprofile_path=None):
+        self.enabled = 1
+        self.memory = memory
+        self.start = time.perf_counter()
+        os.environ[PROFILE_ENV] = "1"
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if cprofile_path:
+            self.cprofile_path = cprofile_path
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def record(self, name, seconds, peak=0):
+        if name not in self.times:
+            self.times[name] = []
+            self.peaks[name] = []
+        self.times[name].append(seconds)
+        self.peaks[name].append(peak)
+
+    # ------------------------------------
+    # Measure a stage: with prof.stage("name"): ...
+    # The memory peak of a stage includes the peaks of its nested stages
+    # ------------------------------------
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        current = 0
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1][3] = max(self.stack[-1][3], peak)
+            tracemalloc.reset_peak()
+        self.stack.append([name, time.perf_counter(), current, 0])
+        try:
+            yield
+        finally:
+            s = self.stack.pop()
+            seconds = time.perf_counter() - s[1]
+            peak = 0
+            if self.memory:
+                peak = max(tracemalloc.get_traced_memory()[1], s[3])
+                if self.stack:
+                    self.stack[-1][3] = max(self.stack[-1][3], peak)
+                tracemalloc.reset_peak()
+                peak -= s[2]
+            self.record(name, seconds, peak)
+
+    # ------------------------------------
+    # Decorator measuring every call of a function
+    # ------------------------------------
+    def timed(self, name):
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------------------------
+    # Breakdown of the stages
+    # Return: table (str)
+    # ------------------------------------
+    def report(self):
+        wall = time.perf_counter() - self.start
+        lines = ["{0:<16}{1:>8}{2:>11}{3:>8}{4:>10}{5:>10}{6:>10}{7:>10}{8:>12}".format(
+            "Stage", "Calls", "Total [s]", "%", "Mean[ms]", "p50[ms]", "p90[ms]", "p99[ms]", "Peak [KiB]")]
+        for name, times in sorted(self.times.items(), key=lambda t: -sum(t[1])):
+            t = np.asarray(times) * 1000
+            p50, p90, p99 = np.percentile(t, [50, 90, 99])
+            lines.append("{0:<16}{1:>8}{2:>11.3f}{3:>8.1f}{4:>10.3f}{5:>10.3f}{6:>10.3f}{7:>10.3f}{8:>12.1f}".format(
+                name, len(t), t.sum() / 1000, 100 * t.sum() / 1000 / wall if wall > 0 else 0, t.mean(), p50, p90, p99, max(self.peaks[name]) / 1024))
+        lines.append("Wall time: {0:.3f} [s] (nested stages are included in their parent)".format(wall))
+        return "\n".join(lines)
+
+    # ------------------------------------
+    # End of the run: cProfile dump and breakdown
+    # ------------------------------------
+    def finish(self):
+        if not self.enabled:
+            return
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+            print("cProfile dump saved in {0}".format(self.cprofile_path))
+        print(self.report())
@@ -0,0 +1,60 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : raster.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Rasterize the coordinates of the junctions on a grid of characters for an
+#                       overview of the network in a terminal
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Coordinates X and Y, code of every junction, size of the grid
+# Output: Picture of the network (str)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import numpy as np
+
+# ------------------------------------
+# Bin the junctions on a grid (row 0 is the top of the picture)
+# A cell keeps the highest code of its junctions, 0 if empty
+# Return: grid of codes [height, width]
+# ------------------------------------
+def rasterize(x, y, codes, width, height):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.int8)
+    grid = np.zeros((height, width), dtype=np.int8)
+    if not len(x):
+        return grid
+    span_x = x.max() - x.min() or 1.0
+    span_y = y.max() - y.min() or 1.0
+    col = np.minimum(((x - x.min()) * width / span_x).astype(np.int64), width - 1)
+    row = height - 1 - np.minimum(((y - y.min()) * height / span_y).astype(np.int64), height - 1)
+    cell = row * width + col
+    # Write the codes in increasing order, the highest one stays on the cell
+    order = np.argsort(codes, kind='stable')
+    grid.flat[cell[order]] = codes[order]
+    return grid
+
+# ------------------------------------
+# Picture of a grid, one character by code
+# Return: lines of the picture (str)
+# ------------------------------------
+def render(grid, chars):
+    height, width = grid.shape
+    pixels = np.asarray(list(chars), dtype='<U1')[grid]
+    lines = np.ascontiguousarray(pixels).view('<U{0}'.format(width)).ravel()
+    return "\n".join(lines) + "\n"
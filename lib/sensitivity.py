@@ -0,0 +1,127 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : sensitivity.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Leak to sensor pressure sensitivity matrix (parallel and cached) and greedy
+#                       placement of the sensors maximizing the detectability of the leaks
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Filepath (str) of the INP file, candidate leak sites and sensors
+# Output: Sensitivity matrix [leak site, sensor] and the selected sensors
+# ********************************************************************************;
+
+# -----------------------------------------
+# Import
+# -----------------------------------------
+import hashlib
+import heapq
+import os
+
+import numpy as np
+
+from lib.sweep import sweep
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+CACHE_PATH = "results/cache"
+SITE_BATCH = 4096           # Leak sites swept at once (memory: SITE_BATCH x sensors in float64)
+
+# -----------------------------------------
+# Key of the cache: network file, sites, sensors and leak demand
+# -----------------------------------------
+def cacheKey(path, sites, sensors, demand):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        h.update(f.read())
+    h.update(",".join(str(s) for s in sites).encode())
+    h.update(b"|")
+    h.update(",".join(str(s) for s in sensors).encode())
+    h.update("|{0}".format(float(demand)).encode())
+    return h.hexdigest()
+
+# -----------------------------------------
+# Pressure drop on every sensor for a leak on every site, swept by blocks of sites
+# into a float32 matrix (the sites should be the leak junctions and the sensors
+# the candidate nodes, not every junction)
+# Return: matrix [site, sensor] in the pressure unit of Epanet
+# -----------------------------------------
+def sensitivityMatrix(path, sites, sensors, demand, processes=None, cache_path=CACHE_PATH):
+    sites = [str(s) for s in sites]
+    sensors = [str(s) for s in sensors]
+    cache_file = os.path.join(cache_path, "sens_{0}.npz".format(cacheKey(path, sites, sensors, demand)))
+    if os.path.exists(cache_file):
+        return np.load(cache_file)['S']
+
+    # Case without leak, then a leak added on every site
+    base = sweep(path, [([], 0)], sensors, 1, 1)[0]
+    S = np.empty((len(sites), len(sensors)), dtype=np.float32)
+    for start in range(0, len(sites), SITE_BATCH):
+        cases = [([s], demand) for s in sites[start:start + SITE_BATCH]]
+        S[start:start + len(cases)] = base[np.newaxis, :] - sweep(path, cases, sensors, processes, 1)
+
+    os.makedirs(cache_path, exist_ok=True)
+    np.savez(cache_file, S=S, sites=np.asarray(sites), sensors=np.asarray(sensors))
+    return S
+
+# -----------------------------------------
+# Detection matrix: thresholded (coverage) or raw pressure drops
+# -----------------------------------------
+def detectionMatrix(S, threshold=None):
+    if threshold is None:
+        return np.asfortranarray(np.maximum(S, 0), dtype=np.float32)
+    return np.asfortranarray(S >= threshold, dtype=np.float32)
+
+# -----------------------------------------
+# Detectability of a set of sensors (columns of S)
+# Return: sum over the sites of the best sensor response, or ratio of detected sites
+# -----------------------------------------
+def detectability(S, sensors, threshold=None):
+    if not len(sensors):
+        return 0.0
+    best = detectionMatrix(S, threshold)[:, list(sensors)].max(axis=1)
+    if threshold is None:
+        return float(best.sum())
+    return float(best.mean())
+
+# -----------------------------------------
+# Lazy greedy selection of k sensors (the objective is submodular, the gains of
+# the previous iterations are upper bounds and only the best one is updated)
+# Return: list of selected columns and the objective after every selection, stops
+#         before k if no sensor improves the detectability
+# -----------------------------------------
+def greedyPlacement(S, k, threshold=None, fixed=()):
+    M = detectionMatrix(S, threshold)
+    best = np.zeros(M.shape[0], dtype=np.float32)
+    chosen = []
+    trace = []
+    for j in fixed:
+        best = np.maximum(best, M[:, j])
+        chosen.append(j)
+    gains = np.maximum(M - best[:, np.newaxis], 0).sum(axis=0)
+    heap = [(-g, j) for j, g in enumerate(gains) if j not in chosen]
+    heapq.heapify(heap)
+    while len(chosen) < k and heap:
+        g, j = heapq.heappop(heap)
+        gain = float(np.maximum(M[:, j] - best, 0).sum())
+        if not heap or gain >= -heap[0][0]:
+            if gain <= 0:           # Nothing more to detect
+                break
+            chosen.append(j)
+            best = np.maximum(best, M[:, j])
+            trace.append(float(best.sum()))
+        else:
+            heapq.heappush(heap, (-gain, j))
+    return chosen, trace
@@ -0,0 +1,179 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : server.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Local HTTP server answering what-if queries (opened junctions, demands,
+#                       leak on a pipe) with the pressures of the sensors, the network stays
+#                       opened in warm solver sessions
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: INP file (super-network for the leaks), sensors, queries (JSON)
+# Output: Pressures of the sensors (JSON)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+HOST = "127.0.0.1"          # Local queries only
+PORT = 8765
+MAX_PENDING = 32            # Requests accepted at the same time, the others are refused (503)
+MAX_BATCH = 10000           # Queries of one batch
+
+# ------------------------------------
+# What-if solver: a pool of warm sessions (one with Epanet 2.0, any number with
+# Epanet 2.2), a query borrows one for its solution
+# ------------------------------------
+class WhatIf:
+    def __init__(self, path, sensors, supernet=None, engine="epanet", sessions=1, trials=None, convert=None):
+        if engine == "epanet22":
+            from lib.epanet22 import Project as Session
+        else:
+            from lib.session import SolverSession as Session
+            sessions = 1                # Single global project of Epanet 2.0
+        self.sensors = [str(s) for s in sensors]
+        self.supernet = supernet
+        self.convert = convert          # Unit conversion of the pressures
+        self.sessions = queue.Queue()
+        for k in range(sessions):
+            self.sessions.put(Session(path, trials))
+        self.count = sessions
+        self.indexes = None
+        self.solved = 0
+        self.lock = threading.Lock()
+
+    # ------------------------------------
+    # Demands of a query: {"open": [junctions], "demand": value} sets the base demand
+    # of the opened junctions, {"demands": {junction: value}} sets any base demand,
+    # {"leak": {"pipe", "position", "demand"}} adds a leak on the super-network
+    # Return: demands (dict), quantized position of the leak (None without leak)
+    # ------------------------------------
+    def demands(self, query):
+        if not isinstance(query, dict):
+            raise ValueError("A query is an object")
+        demands = {str(j): float(query.get("demand", 0)) for j in query.get("open", [])}
+        demands.update({str(j): float(d) for j, d in query.get("demands", {}).items()})
+        position = None
+        leak = query.get("leak")
+        if leak is not None:
+            if self.supernet is None:
+                raise ValueError("Leak queries need a super-network")
+            if int(leak["pipe"]) not in self.supernet.pipes:
+                raise ValueError("Pipe {0} is not a leak pipe".format(leak["pipe"]))
+            node, position = self.supernet.leakNode(int(leak["pipe"]), float(leak.get("position", 0.5)))
+            demands[node] = float(leak["demand"])
+        return demands, position
+
+    def solveOne(self, session, query):
+        demands, position = self.demands(query)
+        if self.indexes is None:
+            self.indexes = session.nodeIndexes(self.sensors)
+        try:
+            session.setDemands(demands)     # Undone even if a junction is unknown
+            unbalanced = session.solve() == 1
+            pressures = session.pressures(self.indexes)
+        finally:
+            session.restore()
+        if self.convert is not None:
+            pressures = self.convert(pressures)
+        r = {"pressures": [round(float(p), 6) for p in pressures], "unbalanced": unbalanced}
+        if position is not None:
+            r["position"] = position
+        return r
+
+    # ------------------------------------
+    # Queries solved one after the other on one borrowed session
+    # Return: list of results (dict, "error" for an invalid query)
+    # ------------------------------------
+    def solve(self, queries):
+        session = self.sessions.get()
+        try:
+            results = []
+            for q in queries:
+                try:
+                    results.append(self.solveOne(session, q))
+                except (KeyError, ValueError, TypeError, RuntimeError) as e:
+                    results.append({"error": str(e)})
+            with self.lock:
+                self.solved += len(queries)
+            return results
+        finally:
+            self.sessions.put(session)
+
+    def close(self):
+        for k in range(self.count):
+            self.sessions.get().close()
+
+# ------------------------------------
+# HTTP requests: GET /health, POST /query (one query), POST /batch ({"queries": [...]})
+# ------------------------------------
+class Handler(BaseHTTPRequestHandler):
+    def reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self.reply(404, {"error": "unknown path"})
+        w = self.server.whatif
+        self.reply(200, {"sensors": w.sensors, "solved": w.solved, "sessions": w.count, "leaks": w.supernet is not None})
+
+    def do_POST(self):
+        if self.path not in ("/query", "/batch"):
+            return self.reply(404, {"error": "unknown path"})
+        if not self.server.pending.acquire(blocking=False):
+            return self.reply(503, {"error": "too many requests"})
+        try:
+            tm = time.perf_counter()
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                queries = body["queries"] if self.path == "/batch" else [body]
+                if not isinstance(body, dict) or not isinstance(queries, list):
+                    raise ValueError("not an object")
+            except (ValueError, KeyError, TypeError) as e:
+                return self.reply(400, {"error": "invalid request: {0}".format(e)})
+            if len(queries) > MAX_BATCH:
+                return self.reply(413, {"error": "more than {0} queries".format(MAX_BATCH)})
+            results = self.server.whatif.solve(queries)
+            body = results[0] if self.path == "/query" else {"results": results}
+            body["ms"] = round((time.perf_counter() - tm) * 1000, 3)
+            self.reply(200, body)
+        finally:
+            self.server.pending.release()
+
+    def log_message(self, format, *args):
+        pass
+
+# ------------------------------------
+# Server of a what-if solver (serve_forever() to run it, shutdown() to stop it)
+# ------------------------------------
+def server(whatif, host=HOST, port=PORT, max_pending=MAX_PENDING):
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    httpd.whatif = whatif
+    httpd.pending = threading.BoundedSemaphore(max_pending)
+    return httpd
@@ -0,0 +1,182 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : session.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Solver session on an INP file opened once with the Epanet toolkit, the
+#                       demands are modified in memory and the network is solved again
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Filepath (str) of the INP file
+# Output: Pressures of the requested nodes
+# ********************************************************************************;
+
+# -----------------------------------------
+# Import
+# -----------------------------------------
+import os
+import tempfile
+
+import epanettools.epanet2 as et
+import numpy as np
+
+# -----------------------------------------
+# Constants
+# -----------------------------------------
+MISSING = -1.0e10           # Setting of a valve with a fixed status
+
+# -----------------------------------------
+# Check the return of a toolkit function
+# Return: the value(s) without the error code
+# -----------------------------------------
+def check(ret):
+    if isinstance(ret, (list, tuple)):
+        err = ret[0]
+        value = ret[1] if len(ret) == 2 else list(ret[1:])
+    else:
+        err = ret
+        value = None
+    if err > 100:       # Codes below 100 are warnings (e.g. negative pressures)
+        raise RuntimeError("Epanet error {0}: {1}".format(err, et.ENgeterror(err, 80)[1]))
+    return value
+
+# -----------------------------------------
+# Solver session, only one by process (Epanet 2.0 has a single global project)
+# -----------------------------------------
+class SolverSession:
+    def __init__(self, path, trials=None):
+        self.path = path
+        self.rpt = os.path.join(tempfile.gettempdir(), "epabstract_{0}.rpt".format(os.getpid()))
+        check(et.ENopen(path, self.rpt, ""))
+        if trials is not None:
+            check(et.ENsetoption(et.EN_TRIALS, float(trials)))     # Instead of the Trials of the INP
+        check(et.ENopenH())
+        self.node_index = {}
+        self.base_demand = {}       # Original base demand of every modified node
+        self.base_emitter = {}      # Original emitter coefficient of every modified node
+        self.base_link = {}         # Original value of every modified (link, code)
+        self.link_index = {}
+        self.solved = 0
+
+    # -----------------------------------------
+    # Index of a node in the toolkit (cached)
+    # -----------------------------------------
+    def nodeIndex(self, id):
+        id = str(id).strip()
+        if id not in self.node_index:
+            self.node_index[id] = check(et.ENgetnodeindex(id))
+        return self.node_index[id]
+
+    def nodeIndexes(self, ids):
+        return np.asarray([self.nodeIndex(id) for id in ids], dtype=np.int64)
+
+    def linkIndex(self, id):
+        id = str(id).strip()
+        if id not in self.link_index:
+            self.link_index[id] = check(et.ENgetlinkindex(id))
+        return self.link_index[id]
+
+    # -----------------------------------------
+    # Set the base demand of nodes (dict: ID -> demand), added to the
+    # original demand if add is set (leak on a consumer node)
+    # -----------------------------------------
+    def setDemands(self, demands, add=0):
+        for id, demand in demands.items():
+            i = self.nodeIndex(id)
+            if i not in self.base_demand:
+                self.base_demand[i] = check(et.ENgetnodevalue(i, et.EN_BASEDEMAND))
+            if add:
+                demand = self.base_demand[i] + float(demand)
+            check(et.ENsetnodevalue(i, et.EN_BASEDEMAND, float(demand)))
+
+    # -----------------------------------------
+    # Set the emitter coefficient of nodes (dict: ID -> coefficient)
+    # -----------------------------------------
+    def setEmitters(self, emitters):
+        for id, coefficient in emitters.items():
+            i = self.nodeIndex(id)
+            if i not in self.base_emitter:
+                self.base_emitter[i] = check(et.ENgetnodevalue(i, et.EN_EMITTER))
+            check(et.ENsetnodevalue(i, et.EN_EMITTER, float(coefficient)))
+
+    # -----------------------------------------
+    # Set initial values of links (dict: ID -> {code: value}, e.g. EN_INITSTATUS,
+    # EN_INITSETTING). The status and the setting are saved together: a fixed status
+    # removes the setting of a valve
+    # -----------------------------------------
+    def setLinks(self, links):
+        for id, values in links.items():
+            i = self.linkIndex(id)
+            for code, value in values.items():
+                for c in ((et.EN_INITSTATUS, et.EN_INITSETTING) if code in (et.EN_INITSTATUS, et.EN_INITSETTING) else (code,)):
+                    if (i, c) not in self.base_link:
+                        self.base_link[(i, c)] = check(et.ENgetlinkvalue(i, c))
+                check(et.ENsetlinkvalue(i, code, float(value)))
+
+    # -----------------------------------------
+    # Apply an edit of the network (dict: "demands", "emitters", "links")
+    # -----------------------------------------
+    def apply(self, edit):
+        self.setDemands(edit.get("demands", {}))
+        self.setEmitters(edit.get("emitters", {}))
+        self.setLinks(edit.get("links", {}))
+
+    # -----------------------------------------
+    # Restore the base demands, emitters and links of the INP file (the status before
+    # the setting: setting a valve makes it active, unless it had no setting)
+    # -----------------------------------------
+    def restore(self):
+        for i, demand in self.base_demand.items():
+            check(et.ENsetnodevalue(i, et.EN_BASEDEMAND, demand))
+        for i, coefficient in self.base_emitter.items():
+            check(et.ENsetnodevalue(i, et.EN_EMITTER, coefficient))
+        for (i, code), value in sorted(self.base_link.items(), key=lambda v: v[0][1] != et.EN_INITSTATUS):
+            if value > MISSING / 2:
+                check(et.ENsetlinkvalue(i, code, value))
+        self.base_demand = {}
+        self.base_emitter = {}
+        self.base_link = {}
+
+    # -----------------------------------------
+    # Steady state solution (first period only)
+    # Return: warning code of Epanet (0: converged, 1: unbalanced)
+    # -----------------------------------------
+    def solve(self):
+        check(et.ENinitH(0))
+        ret = et.ENrunH()
+        check(ret)
+        self.solved += 1
+        return ret[0] if isinstance(ret, (list, tuple)) else ret
+
+    # -----------------------------------------
+    # Values of the given node indexes, written in "out" if given
+    # -----------------------------------------
+    def nodeValues(self, indexes, code, out=None):
+        if out is None:
+            out = np.empty(len(indexes), dtype=np.float64)
+        for k, i in enumerate(indexes):
+            out[k] = check(et.ENgetnodevalue(int(i), code))
+        return out
+
+    def pressures(self, indexes, out=None):
+        return self.nodeValues(indexes, et.EN_PRESSURE, out)
+
+    def baseDemands(self, ids):
+        return self.nodeValues(self.nodeIndexes(ids), et.EN_BASEDEMAND)
+
+    def close(self):
+        et.ENcloseH()
+        et.ENclose()
+        if os.path.exists(self.rpt):
+            os.remove(self.rpt)
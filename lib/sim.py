@@ -18,42 +18,90 @@
 # Revision History  :
 # Date        Author      Ref    Revision
 # 
-# Input: Filepath (str), path to INP file, path to result (CSV file)
-# Output: Network summary
+# Input: Filepath (str), path to INP file, path to result (CSV file), sensors, leak node,
+#           flow sensors (optional CSV of link IDs)
+# Output: Pressures of the sensors (CSV), flows of the flow sensors (<result>.flow)
 # ********************************************************************************;
 
 # -----------------------------------------
 # Import
 # -----------------------------------------
-import epanettools.epanettools as epa
+import epanettools.epanet2 as et
+import numpy as np
+import os
 import sys
 import csv
+import time
 
 # ------------------------------------
 # Constants
 # ------------------------------------
-CANNES_ID_FILES = sys.argv[3]
 id_cannes = []
 
 # ------------------------------------
-# Read points of consumption
+# Read points of consumption (or any CSV of IDs)
 # ------------------------------------
-def readPCID():
-    with open(CANNES_ID_FILES, 'r') as f:
+def readPCID(path):
+    with open(path, 'r') as f:
         reader = csv.reader(f)
         raw_list = list(reader)
-        id_cannes_read = [int(item) for sublist in raw_list for item in sublist]
-    for i in id_cannes_read:
-        id_cannes.append(i)
+        return [int(item) for sublist in raw_list for item in sublist if item.strip()]
+
+# -----------------------------------------
+# Check the return of a toolkit function (codes below 100 are warnings)
+# -----------------------------------------
+def check(ret):
+    err = ret[0] if isinstance(ret, (list, tuple)) else ret
+    if err > 100:
+        raise RuntimeError("Epanet error {0}".format(err))
+    return ret[1] if isinstance(ret, (list, tuple)) else None
+
+# -----------------------------------------
+# Indexes of the IDs present in the network, in the order of the network
+# Return: list of (index, ID)
+# -----------------------------------------
+def indexes(ids, get):
+    found = []
+    for id in ids:
+        ret = get(str(id))
+        if ret[0] == 0:
+            found.append((ret[1], str(id)))
+    return sorted(found)
+
+# -----------------------------------------
+# Steady state of the INP file, only the pressures of the given nodes and the flows
+# of the given links are read (by index, in preallocated arrays)
+# Return: node IDs, pressures, link IDs, flows (pressure and flow units of Epanet)
+# -----------------------------------------
+def extract(path, rpt, nodes, links=()):
+    check(et.ENopen(path, rpt, ""))
+    try:
+        check(et.ENopenH())
+        check(et.ENinitH(0))
+        check(et.ENrunH())
+        node_idx = indexes(nodes, et.ENgetnodeindex)
+        link_idx = indexes(links, et.ENgetlinkindex)
+        pressures = np.empty(len(node_idx), dtype=np.float64)
+        flows = np.empty(len(link_idx), dtype=np.float64)
+        for k, (i, id) in enumerate(node_idx):
+            pressures[k] = check(et.ENgetnodevalue(i, et.EN_PRESSURE))
+        for k, (i, id) in enumerate(link_idx):
+            flows[k] = check(et.ENgetlinkvalue(i, et.EN_FLOW))
+        et.ENcloseH()
+    finally:
+        et.ENclose()
+        if os.path.exists(rpt):
+            os.remove(rpt)
+    return [id for i, id in node_idx], pressures, [id for i, id in link_idx], flows
 
 # -----------------------------------------
 # Unit converter
 # -----------------------------------------
 def convertUnit(type, val):
-    if type is "pressure":
+    if type == "pressure":
         return val * 0.098064           # Convert [H2O m] to [bar]
     else:
-        if type is "flow":
+        if type == "flow":
             return val * 264 * 60       # [m3/s] to gallon per minute [GPM]
         else:
             return val
@@ -62,29 +110,25 @@ def convertUnit(type, val):
 # Run simulation and save result in CSV
 # -----------------------------------------
 def runSim():
-    if len(sys.argv) is not 5:
+    if len(sys.argv) not in (5, 6):
         return -1
     else:
-        readPCID()
-        es=epa.EPANetSimulation(sys.argv[1])
-        es.run()
-        p=epa.Node.value_type['EN_PRESSURE']
-        d=epa.Node.value_type['EN_DEMAND']
-        f_result = open(sys.argv[2], 'w')
-        pre = {}
-        for key, value in es.network.nodes.items():
-            # Only save pressure and flow for real equipement
-            if int(value.id) in id_cannes:
-                # Tag the closest node of the leak
-                if sys.argv[4] is not 0:
-                    if int(value.id) is int(sys.argv[4]):
-                        f_result.write(value.id + "," + str(convertUnit("pressure", value.results[p][0])) + "," + '1' + "\n")
-                    else:
-                        f_result.write(value.id + "," + str(convertUnit("pressure", value.results[p][0])) + "," + '0' + "\n")
-                else:
-                    f_result.write(value.id + "," + str(convertUnit("pressure", value.results[p][0])) + "," + str(convertUnit("flow", value.results[d][0])) + "\n")
-                pre[value.id] = str(convertUnit("pressure", value.results[p][0]))
-        f_result.close()
+        id_cannes.extend(readPCID(sys.argv[3]))
+        flow_ids = readPCID(sys.argv[5]) if len(sys.argv) == 6 else []
+        tm = time.perf_counter()
+        nodes, pressures, links, flows = extract(sys.argv[1], sys.argv[2] + ".rpt", id_cannes, flow_ids)
+        # Solve time for the profiler of epabstract.py
+        if os.environ.get("EPABSTRACT_PROFILE", "0") not in ("", "0"):
+            with open(sys.argv[2] + ".time", 'w') as f_time:
+                f_time.write(str(time.perf_counter() - tm))
+        # Tag the closest node of the leak
+        leak = sys.argv[4].strip()
+        pressures = convertUnit("pressure", pressures)
+        with open(sys.argv[2], 'w') as f_result:
+            f_result.writelines("{0},{1},{2}\n".format(id, pressures[k], '1' if id == leak else '0') for k, id in enumerate(nodes))
+        if links:
+            with open(sys.argv[2] + ".flow", 'w') as f_flow:
+                f_flow.writelines("{0},{1}\n".format(id, flows[k]) for k, id in enumerate(links))
 
 # -----------------------------------------
 # Main
@@ -0,0 +1,301 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : skeleton.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Skeletonization of a network (Hazen-Williams): dead ends without sensor
+#                       trimmed, series and parallel pipes merged in equivalent pipes
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Junctions and pipes of epabstract.py, protected nodes (sensors) and pipes (leaks)
+# Output: Reduced INP file, mapping of the original junctions and pipes
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import copy
+import csv
+import re
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+HEXP = 1.852                # Hazen-Williams flow exponent
+DEXP = 4.871                # Hazen-Williams diameter exponent
+TOLERANCE = 0.01            # Error accepted on the pressures of the sensors (pressure unit)
+JUNCTION_SECTIONS = ["JUNCTIONS", "COORDINATES", "DEMANDS", "EMITTERS", "SOURCES", "QUALITY"]
+PIPE_SECTIONS = ["PIPES", "VERTICES", "STATUS"]
+
+# ------------------------------------
+# Final value of a mapping where the removed elements point to their replacement
+# ------------------------------------
+def resolve(mapping, key):
+    path = []
+    while key is not None and mapping.get(key, key) != key:
+        path.append(key)
+        key = mapping[key]
+    for k in path:
+        mapping[k] = key            # Path compression
+    return key
+
+# ------------------------------------
+# Skeleton class, works on copies of the junctions and pipes, the other links
+# (pumps, valves: objects with node1 and node2) are not reduced and their end nodes
+# are kept
+# ------------------------------------
+class Skeleton:
+    def __init__(self, junctions, pipes, protected=(), keep_pipes=(), options=None, links=()):
+        if options and options.get("HEADLOSS", "H-W").split()[-1].upper() != "H-W":
+            raise ValueError("Only the Hazen-Williams headloss is supported")
+        self.junctions = {str(id): copy.copy(j) for id, j in junctions.items()}
+        self.pipes = {int(id): copy.copy(p) for id, p in pipes.items()}
+        self.keep_pipes = set(int(p) for p in keep_pipes)
+        self.protected = set(str(n) for n in protected)
+        for l in links:
+            self.protected.update((str(l.node1), str(l.node2)))
+        for p in self.pipes.values():
+            # Closed pipes and pipes kept for the leaks are not reduced
+            if str(p.status).upper() == "CLOSED" or int(p.id) in self.keep_pipes:
+                self.protected.update((str(p.node1), str(p.node2)))
+        for id, j in self.junctions.items():
+            if float(j.ec or 0):
+                self.protected.add(id)
+        self.node_map = {id: id for id in self.junctions}         # Junction -> junction replacing it
+        self.pipe_map = {id: id for id in self.pipes}             # Pipe -> pipe replacing it (None: trimmed)
+        self.modified_junctions = set()
+        self.modified_pipes = set()
+        self.removed = {"dead_end": 0, "series": 0, "parallel": 0}
+
+    # ------------------------------------
+    # Open pipes by node
+    # ------------------------------------
+    def adjacency(self):
+        adj = {}
+        for id, p in self.pipes.items():
+            adj.setdefault(str(p.node1), []).append(id)
+            adj.setdefault(str(p.node2), []).append(id)
+        return adj
+
+    def other(self, pipe, node):
+        p = self.pipes[pipe]
+        return str(p.node2) if str(p.node1) == node else str(p.node1)
+
+    def reducible(self, node):
+        return node in self.junctions and node not in self.protected
+
+    # ------------------------------------
+    # Junction and pipe removed, mapped to what replaces them
+    # ------------------------------------
+    def removeJunction(self, node, target):
+        del self.junctions[node]
+        self.modified_junctions.discard(node)
+        self.node_map[node] = target
+
+    def removePipe(self, pipe, target):
+        del self.pipes[pipe]
+        self.modified_pipes.discard(pipe)
+        self.pipe_map[pipe] = target
+
+    # ------------------------------------
+    # Kept junction and pipe of an original one (pipe None: trimmed)
+    # ------------------------------------
+    def junctionOf(self, node):
+        return resolve(self.node_map, str(node))
+
+    def pipeOf(self, pipe):
+        return resolve(self.pipe_map, int(pipe))
+
+    def addDemand(self, node, demand):
+        if node in self.junctions and demand:
+            self.junctions[node].demand = float(self.junctions[node].demand) + demand
+            self.modified_junctions.add(node)
+
+    # ------------------------------------
+    # Equivalent length of a pipe with the diameter and roughness of a reference pipe
+    # ------------------------------------
+    def equivalentLength(self, pipe, ref):
+        p, r = self.pipes[pipe], self.pipes[ref]
+        return float(p.length) * (float(r.roughness) / float(p.roughness)) ** HEXP * (float(r.diameter) / float(p.diameter)) ** DEXP
+
+    # ------------------------------------
+    # Dead end without sensor: demand lumped on the neighbour (exact)
+    # ------------------------------------
+    def trimDeadEnds(self):
+        done = 0
+        adj = self.adjacency()
+        stack = [n for n, links in adj.items() if len(links) == 1 and self.reducible(n)]
+        while stack:
+            node = stack.pop()
+            links = adj.get(node, [])
+            if len(links) != 1 or not self.reducible(node):
+                continue
+            pipe = links[0]
+            target = self.other(pipe, node)
+            self.addDemand(target, float(self.junctions[node].demand))
+            adj[target].remove(pipe)
+            del adj[node]
+            self.removePipe(pipe, None)
+            self.removeJunction(node, target)
+            done += 1
+            if len(adj[target]) == 1 and self.reducible(target):
+                stack.append(target)
+        self.removed["dead_end"] += done
+        return done
+
+    # ------------------------------------
+    # Junction between two pipes: one equivalent pipe, the demand is split on the two
+    # ends by the equivalent lengths (exact only without demand)
+    # ------------------------------------
+    def mergeSeries(self, exact=0):
+        done = 0
+        adj = self.adjacency()
+        for node in list(adj.keys()):
+            links = adj.get(node, [])
+            if len(links) != 2 or not self.reducible(node):
+                continue
+            demand = float(self.junctions[node].demand)
+            if exact and demand:
+                continue
+            p1, p2 = links
+            a, b = self.other(p1, node), self.other(p2, node)
+            if a == b or float(self.pipes[p1].minorLoss or 0) or float(self.pipes[p2].minorLoss or 0):
+                continue
+            l1 = float(self.pipes[p1].length)
+            l2 = self.equivalentLength(p2, p1)
+            self.addDemand(a, demand * l2 / (l1 + l2))
+            self.addDemand(b, demand * l1 / (l1 + l2))
+            self.pipes[p1].node1, self.pipes[p1].node2 = a, b
+            self.pipes[p1].length = l1 + l2
+            self.modified_pipes.add(p1)
+            adj[b].remove(p2)
+            adj[b].append(p1)
+            del adj[node]
+            self.removePipe(p2, p1)
+            self.removeJunction(node, a if l1 <= l2 else b)
+            done += 1
+        self.removed["series"] += done
+        return done
+
+    # ------------------------------------
+    # Pipes between the same nodes: one pipe with the sum of the conductances (exact)
+    # ------------------------------------
+    def mergeParallel(self):
+        done = 0
+        pairs = {}
+        for id, p in self.pipes.items():
+            if id in self.keep_pipes or str(p.status).upper() == "CLOSED" or float(p.minorLoss or 0):
+                continue
+            pairs.setdefault(frozenset((str(p.node1), str(p.node2))), []).append(id)
+        for links in pairs.values():
+            if len(links) < 2:
+                continue
+            ref = self.pipes[links[0]]
+            # Conductance C * D^2.63 / L^0.54 of every pipe
+            k = sum(float(self.pipes[l].roughness) * float(self.pipes[l].diameter) ** (DEXP / HEXP) / float(self.pipes[l].length) ** (1 / HEXP) for l in links)
+            ref.roughness = k * float(ref.length) ** (1 / HEXP) / float(ref.diameter) ** (DEXP / HEXP)
+            self.modified_pipes.add(links[0])
+            for l in links[1:]:
+                self.removePipe(l, links[0])
+                done += 1
+        self.removed["parallel"] += done
+        return done
+
+    # ------------------------------------
+    # All the reductions until no more change
+    # ------------------------------------
+    def reduce(self, exact=0):
+        while self.trimDeadEnds() + self.mergeParallel() + self.mergeSeries(exact):
+            pass
+        return self
+
+    # ------------------------------------
+    # Reduced INP: lines of the removed junctions and pipes dropped, modified ones
+    # rewritten, other sections copied
+    # ------------------------------------
+    def writeInp(self, src, dst):
+        section = None
+        demands = set()             # Modified junctions with their demand already written
+        with open(src, 'r') as f_in, open(dst, 'w') as f_out:
+            for line in f_in:
+                tag = re.match(r'^\s*\[(\w+)\]', line)
+                if tag:
+                    section = tag.group(1).upper()
+                    f_out.write(line)
+                    continue
+                ls = line.split()
+                if not ls or ls[0].startswith(";"):
+                    f_out.write(line)
+                    continue
+                if section == "TAGS" and len(ls) > 1:
+                    if ls[0].upper() == "NODE" and self.removedJunction(ls[1]) or ls[0].upper() == "LINK" and self.removedPipe(ls[1]):
+                        continue
+                elif section in JUNCTION_SECTIONS:
+                    id = ls[0]
+                    if self.removedJunction(id):
+                        continue
+                    if section in ("JUNCTIONS", "DEMANDS") and id in self.modified_junctions:
+                        # The demands of the [DEMANDS] section replace the base demand
+                        if section == "DEMANDS" and id in demands:
+                            continue
+                        j = self.junctions[id]
+                        rest = [t for t in ls[2 if section == "DEMANDS" else 3:] if not t.startswith(";")][:1]
+                        if section == "DEMANDS":
+                            demands.add(id)
+                            line = " {0:<16}\t{1:<12.6g}\t{2:<16}\n".format(id, float(j.demand), rest[0] if rest else "")
+                        else:
+                            line = " {0:<16}\t{1:<12}\t{2:<12.6g}\t{3:<16}\t;\n".format(id, ls[1], float(j.demand), rest[0] if rest else "")
+                elif section in PIPE_SECTIONS:
+                    try:
+                        id = int(ls[0])
+                    except ValueError:
+                        f_out.write(line)
+                        continue
+                    if self.removedPipe(id):
+                        continue
+                    if id in self.modified_pipes:
+                        if section == "VERTICES":
+                            continue            # Merged pipe: straight line
+                        if section == "PIPES":
+                            p = self.pipes[id]
+                            line = " {0:<16}\t{1:<16}\t{2:<16}\t{3:<12.6g}\t{4:<12}\t{5:<12.6g}\t{6:<12}\t{7:<6}\t;\n".format(
+                                id, p.node1, p.node2, float(p.length), p.diameter, float(p.roughness), p.minorLoss, p.status)
+                f_out.write(line)
+
+    def removedJunction(self, id):
+        return id not in self.junctions and id in self.node_map
+
+    def removedPipe(self, id):
+        try:
+            id = int(id)
+        except ValueError:
+            return False
+        return id not in self.pipes and id in self.pipe_map
+
+    # ------------------------------------
+    # Mapping of the original junctions and pipes (CSV: type, original ID, kept ID)
+    # ------------------------------------
+    def writeMapping(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["type", "original", "reduced"])
+            for k in list(self.node_map):
+                writer.writerow(["junction", k, self.junctionOf(k)])
+            for k in list(self.pipe_map):
+                v = self.pipeOf(k)
+                writer.writerow(["pipe", k, "" if v is None else v])
+
+    def summary(self, junctions, pipes):
+        return "Skeleton: {0} -> {1} junctions, {2} -> {3} pipes ({4} dead ends, {5} series, {6} parallel)".format(
+            junctions, len(self.junctions), pipes, len(self.pipes), self.removed["dead_end"], self.removed["series"], self.removed["parallel"])
@@ -0,0 +1,265 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : solver.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Steady state hydraulic solver (Global Gradient Algorithm of Epanet,
+#                       Hazen-Williams headloss) in NumPy/SciPy for batches of leak scenarios
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Junctions, pipes, reservoirs, tanks and options parsed by epabstract.py
+# Output: Heads, flows and pressures of the junctions (Epanet units)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+# ------------------------------------
+# Constants (same values as Epanet 2)
+# ------------------------------------
+HEXP = 1.852                # Hazen-Williams exponent
+RQTOL = 1e-7                # Minimum gradient of a link
+MAX_TRIALS = 1000
+FLOW_UNITS = {"CFS": 1.0, "GPM": 448.831, "MGD": 0.64632, "IMGD": 0.5382, "AFD": 1.9837,
+              "LPS": 28.317, "LPM": 1699.0, "MLD": 2.4466, "CMH": 101.94, "CMD": 2446.6}
+SI_UNITS = ("LPS", "LPM", "MLD", "CMH", "CMD")
+PSI_PER_FT = 0.4333
+TOLERANCE = 1e-3            # Largest pressure difference with Epanet accepted by epabstract.checkNativeSolver() (pressure unit)
+M_PER_FT = 0.3048
+
+# ------------------------------------
+# Last value of an option of the [OPTIONS] section (e.g. "Demand Multiplier 1.0")
+# ------------------------------------
+def option(options, key, default):
+    value = options.get(key.upper()) if options else None
+    return value.split()[-1] if value else default
+
+# ------------------------------------
+# Solver class, the network (topology and pipes) is fixed: only the demands, the
+# emitters and one leak in the middle of a pipe change between two solutions
+# ------------------------------------
+class GGASolver:
+    def __init__(self, junctions, pipes, reservoirs, tanks=None, options=None):
+        units = option(options, "UNITS", "GPM").upper()
+        if option(options, "HEADLOSS", "H-W").upper() != "H-W":
+            raise ValueError("Only the Hazen-Williams headloss is supported")
+        if units not in FLOW_UNITS:
+            raise ValueError("Unknown flow units: {0}".format(units))
+        si = units in SI_UNITS
+        self.ucf_flow = FLOW_UNITS[units]                       # User flow / cfs
+        self.ucf_length = M_PER_FT if si else 1.0               # User length / ft
+        self.ucf_diameter = 304.8 if si else 12.0               # User diameter / ft
+        self.ucf_pressure = M_PER_FT if si else PSI_PER_FT      # User pressure / ft
+        self.ucf_pressure *= float(option(options, "SPECIFIC", 1.0)) if not si else 1.0
+        self.accuracy = float(option(options, "ACCURACY", 0.001))
+        self.trials = min(int(float(option(options, "TRIALS", 200))), MAX_TRIALS)
+        self.multiplier = float(option(options, "DEMAND", 1.0))
+        self.qexp = 1.0 / float(option(options, "EMITTER", 0.5))
+        unbalanced = options.get("UNBALANCED", "") if options else ""
+        self.unbalanced_continue = unbalanced.upper().startswith("CONTINUE")
+
+        # -- Nodes: junctions (unknown heads) then reservoirs and tanks (fixed heads) --
+        self.ids = [str(id) for id in junctions]
+        self.index = {id: k for k, id in enumerate(self.ids)}
+        n = len(self.ids)
+        fixed = [(str(r.id), float(r.head)) for r in reservoirs.values()]
+        for t in (tanks or {}).values():
+            fixed.append((str(t.id), float(t.elevation) + float(t.initLevel)))
+        index = dict(self.index)
+        index.update((id, n + k) for k, (id, head) in enumerate(fixed))
+        self.n = n
+        self.elevation = np.asarray([float(j.elevation) for j in junctions.values()]) / self.ucf_length
+        self.hfixed = np.asarray([head for id, head in fixed], dtype=np.float64) / self.ucf_length
+        self.demand = np.asarray([float(j.demand) for j in junctions.values()]) * self.multiplier / self.ucf_flow
+        self.emitter = np.asarray([float(j.ec or 0) for j in junctions.values()], dtype=np.float64)
+
+        # -- Links: open pipes only (no pump and no valve, refused by epabstract.nativeSolver()) --
+        links = [p for p in pipes.values() if str(p.status).upper() != "CLOSED"]
+        self.link_ids = [int(p.id) for p in links]
+        self.link_index = {id: k for k, id in enumerate(self.link_ids)}
+        self.a = np.asarray([index[str(p.node1)] for p in links], dtype=np.int64)
+        self.b = np.asarray([index[str(p.node2)] for p in links], dtype=np.int64)
+        self.length = np.asarray([float(p.length) for p in links]) / self.ucf_length
+        d = np.asarray([float(p.diameter) for p in links]) / self.ucf_diameter
+        c = np.asarray([float(p.roughness) for p in links])
+        self.diameter = d
+        self.r_unit = 4.727 / c ** HEXP / d ** 4.871           # Resistance by unit of length
+        self.m = 0.02517 * np.asarray([float(p.minorLoss or 0) for p in links]) / d ** 4
+        self.q0 = np.pi * d ** 2 / 4                            # 1 ft/s
+        self.q = self.q0.copy()
+        self.h = np.full(n, self.hfixed.max() if len(self.hfixed) else 0.0)
+
+        # -- Fixed sparsity pattern of the matrix (CSC order), built once --
+        inner = (self.a < n) & (self.b < n)
+        rows = np.concatenate([np.arange(n), self.a[inner], self.b[inner]])
+        cols = np.concatenate([np.arange(n), self.b[inner], self.a[inner]])
+        keys, self.inverse = np.unique(cols * n + rows, return_inverse=True)
+        self.indices = (keys % n).astype(np.int32)
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(keys // n, minlength=n))]).astype(np.int32)
+        self.inner = inner
+        self.a_in = self.a < n                                  # Link ends on a junction
+        self.b_in = self.b < n
+        self.solved = 0
+        self.iterations = 0
+        self.unbalanced = 0
+
+    # ------------------------------------
+    # Index of the junctions in the solver
+    # ------------------------------------
+    def nodeIndexes(self, ids):
+        return np.asarray([self.index[str(id)] for id in ids], dtype=np.int64)
+
+    # ------------------------------------
+    # Inverse gradient P and correction Y of links (Epanet: pipecoeff)
+    # ------------------------------------
+    def coefficients(self, q, r, m):
+        aq = np.abs(q)
+        h = r * aq ** HEXP + m * aq * aq
+        grad = HEXP * r * aq ** (HEXP - 1) + 2 * m * aq
+        small = (r + m) * aq < RQTOL
+        grad = np.where(small, RQTOL, grad)
+        p = 1.0 / grad
+        y = np.where(small, q / HEXP, np.sign(q) * h * p)
+        return p, y
+
+    # ------------------------------------
+    # Steady state solution
+    # demand: base demands of the junctions (user units, None for the INP demands)
+    # emitter: emitter coefficients of the junctions (user units, None for the INP ones)
+    # leak: (pipe ID, position from node 1 [0..1], demand) of a leak in the middle of a pipe
+    # Return: heads of the junctions [ft], flows of the links [cfs] and head of the leak [ft]
+    # ------------------------------------
+    def solve(self, demand=None, emitter=None, leak=None):
+        n = self.n
+        a_node, b_node, ai, bi = self.a, self.b, self.a_in, self.b_in
+        dem = self.demand if demand is None else np.asarray(demand, dtype=np.float64) * self.multiplier / self.ucf_flow
+        ec = self.emitter if emitter is None else np.asarray(emitter, dtype=np.float64)
+        emitters = np.flatnonzero(ec > 0)
+        # Emitter: pseudo link to a fixed head (elevation) with h = ke * q^qexp
+        ke = self.ucf_flow ** self.qexp / self.ucf_pressure / ec[emitters] ** self.qexp
+        qe = np.ones(len(emitters))
+        if leak is not None:
+            k = self.link_index[int(leak[0])]
+            x = min(max(float(leak[1]), 1e-6), 1 - 1e-6)
+            dl = float(leak[2]) * self.multiplier / self.ucf_flow
+            r_leak = self.r_unit[k] * self.length[k] * np.asarray([x, 1 - x])
+            m_leak = self.m[k] * np.asarray([x, 1 - x])
+            q_leak = np.asarray([self.q[k], self.q[k] - dl])
+        r = self.r_unit * self.length
+        q = self.q
+        h = self.h.copy()
+        h_leak = 0.0
+        for t in range(self.trials):
+            # -- Linearized flows with the current heads (differences of heads, precise
+            # for the links of very small flow) and residual of the continuity --
+            p, y = self.coefficients(q, r, self.m)
+            hh = np.concatenate([h, self.hfixed])
+            q_out = q - y + p * (hh[a_node] - hh[b_node])
+            q_in = q_out
+            if leak is not None:
+                # The leak node (degree 2) is eliminated: the pipe becomes an equivalent link
+                pl, yl = self.coefficients(q_leak, r_leak, m_leak)
+                s = pl[0] + pl[1]
+                r_l = (q_leak[0] - yl[0]) - (q_leak[1] - yl[1]) - dl
+                h_leak = (r_l + pl[0] * hh[a_node[k]] + pl[1] * hh[b_node[k]]) / s
+                q_in = q_out.copy()
+                q_out[k] = q_leak[0] - yl[0] + pl[0] * (hh[a_node[k]] - h_leak)
+                q_in[k] = q_leak[1] - yl[1] + pl[1] * (h_leak - hh[b_node[k]])
+                p = p.copy()
+                p[k] = pl[0] * pl[1] / s
+            res = np.bincount(b_node[bi], weights=q_in[bi], minlength=n) - np.bincount(a_node[ai], weights=q_out[ai], minlength=n) - dem
+            diag = np.bincount(a_node[ai], weights=p[ai], minlength=n) + np.bincount(b_node[bi], weights=p[bi], minlength=n)
+            if len(emitters):
+                pe, ye = self.coefficients(qe, ke, 0.0)
+                diag[emitters] += pe
+                res[emitters] -= qe - ye + pe * (h[emitters] - self.elevation[emitters])
+
+            # -- Correction of the heads (Jacobian on the fixed sparsity pattern) --
+            off = -p[self.inner]
+            data = np.bincount(self.inverse, weights=np.concatenate([diag, off, off]), minlength=len(self.indices))
+            A = sp.csc_matrix((data, self.indices, self.indptr), shape=(n, n))
+            dh = spla.splu(A, permc_spec="MMD_AT_PLUS_A").solve(res)
+            h = h + dh
+
+            # -- New flows --
+            dhh = np.concatenate([dh, np.zeros(len(self.hfixed))])
+            q_new = q_out + p * (dhh[a_node] - dhh[b_node])
+            if leak is not None:
+                hh = np.concatenate([h, self.hfixed])
+                h_leak = (r_l + pl[0] * hh[a_node[k]] + pl[1] * hh[b_node[k]]) / s
+                ql = q_leak - yl + pl * np.asarray([hh[a_node[k]] - h_leak, h_leak - hh[b_node[k]]])
+                q_new[k] = ql[0]
+            dq = np.abs(q_new - q)
+            dq_sum, q_sum = dq.sum(), np.abs(q_new).sum()
+            if leak is not None:
+                dq_sum += abs(ql[1] - q_leak[1])
+                q_sum += abs(ql[1])
+                q_leak = ql
+            if len(emitters):
+                qe_new = qe - ye + pe * (h[emitters] - self.elevation[emitters])
+                dq_sum += np.abs(qe_new - qe).sum()
+                q_sum += np.abs(qe_new).sum()
+                qe = qe_new
+            q = q_new
+            if dq_sum <= self.accuracy * q_sum:
+                break
+        else:
+            if not self.unbalanced_continue:
+                raise RuntimeError("Hydraulic solver did not converge in {0} trials".format(self.trials))
+            self.unbalanced += 1        # Unbalanced Continue: solution kept (Epanet warning)
+        self.iterations += t + 1
+        self.solved += 1
+        if leak is None:
+            self.q = q      # Warm start of the next solution
+            self.h = h
+        return h, q, h_leak
+
+    # ------------------------------------
+    # Pressures of the junctions (Epanet pressure unit)
+    # ------------------------------------
+    def pressures(self, demand=None, emitter=None, leak=None, indexes=None):
+        h = self.solve(demand, emitter, leak)[0]
+        p = (h - self.elevation) * self.ucf_pressure
+        return p if indexes is None else p[indexes]
+
+    # ------------------------------------
+    # Solve every case (list of junctions set to the demand, or increased by the
+    # demand if add is set), same cases as lib/sweep.py
+    # Return: matrix [case, node] in the pressure unit of Epanet
+    # ------------------------------------
+    def sweep(self, cases, nodes, add=0):
+        idx = self.nodeIndexes(nodes)
+        base = self.demand * self.ucf_flow / self.multiplier
+        rows = np.empty((len(cases), len(idx)), dtype=np.float64)
+        for k, (junctions, demand) in enumerate(cases):
+            d = base.copy()
+            j = self.nodeIndexes(junctions)
+            d[j] = d[j] + float(demand) if add else float(demand)
+            rows[k] = self.pressures(d, indexes=idx)
+        return rows
+
+    # ------------------------------------
+    # Solve every leak in the middle of a pipe: (pipe ID, position, demand)
+    # Return: matrix [case, node] in the pressure unit of Epanet
+    # ------------------------------------
+    def leakSweep(self, leaks, nodes):
+        idx = self.nodeIndexes(nodes)
+        rows = np.empty((len(leaks), len(idx)), dtype=np.float64)
+        for k, leak in enumerate(leaks):
+            rows[k] = self.pressures(leak=leak, indexes=idx)
+        return rows
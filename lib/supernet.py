@@ -0,0 +1,130 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : supernet.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Super-network: leak junctions inserted once at fixed positions on every
+#                       leak pipe, a scenario only sets the demand of one of them
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Junctions and pipes of epabstract.py, leak pipes, positions
+# Output: INP file of the super-network, leak junction of a (pipe, position)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import re
+
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+POSITIONS = tuple(round(0.05 + 0.1 * k, 2) for k in range(10))     # 0.05, 0.15, ..., 0.95
+TRIALS = 200                # Trials of a scenario, unbalanced ones are simulated on the split network
+STATUSES = ("OPEN", "CLOSED", "CV")     # Initial status of a pipe in [PIPES]
+
+# ------------------------------------
+# Super-network class
+# ------------------------------------
+class SuperNetwork:
+    def __init__(self, junctions, pipes, leak_pipes, positions=POSITIONS, node_ids=(), emitter=0):
+        self.emitter = emitter          # Leak modelled by an emitter instead of a demand
+        self.path = None
+        self.positions = np.asarray(sorted(positions), dtype=np.float64)
+        self.pipes = {int(p): pipes[p] for p in leak_pipes}
+        # New IDs after every node (junctions, reservoirs, tanks) and pipe
+        next_node = max([int(id) for id in junctions] + [int(id) for id in node_ids if str(id).isdigit()]) + 1
+        next_pipe = max(int(id) for id in pipes) + 1
+        self.leak_nodes = {}            # (pipe, position index) -> leak junction ID
+        self.new_junctions = []         # (ID, elevation, x, y)
+        self.segments = []              # (ID, node 1, node 2, length, pipe)
+        for id, p in self.pipes.items():
+            j1, j2 = junctions[p.node1], junctions[p.node2]
+            e1, e2 = float(j1.elevation), float(j2.elevation)
+            previous, start = str(p.node1), 0.0
+            for k, x in enumerate(self.positions):
+                node = str(next_node)
+                next_node += 1
+                # Elevation as addLeaksMiddle, coordinates along the pipe from node 1
+                self.new_junctions.append((node, min(e1, e2) + abs(e1 - e2) * x, float(j1.posX) + (float(j2.posX) - float(j1.posX)) * x, float(j1.posY) + (float(j2.posY) - float(j1.posY)) * x))
+                self.leak_nodes[(id, k)] = node
+                # The first segment keeps the ID of the pipe
+                self.segments.append((id if k == 0 else next_pipe, previous, node, float(p.length) * (x - start), id))
+                if k:
+                    next_pipe += 1
+                previous, start = node, x
+            self.segments.append((next_pipe, previous, str(p.node2), float(p.length) * (1 - start), id))
+            next_pipe += 1
+
+    # ------------------------------------
+    # Leak junction of the closest inserted position
+    # Return: junction ID, quantized position
+    # ------------------------------------
+    def leakNode(self, pipe, coef):
+        k = int(np.argmin(np.abs(self.positions - coef)))
+        return self.leak_nodes[(int(pipe), k)], float(self.positions[k])
+
+    # ------------------------------------
+    # Initial status of a segment in [PIPES]: a check valve on every segment, a closed
+    # pipe only on its first one (same ID, the leak junctions stay connected by node 2)
+    # ------------------------------------
+    def status(self, id, pipe):
+        status = str(self.pipes[pipe].status)
+        if status.upper() not in STATUSES or status.upper() == "CLOSED" and id != pipe:
+            return "Open"
+        return status
+
+    # ------------------------------------
+    # INP of the super-network: split pipes replaced by their segments, leak junctions
+    # added at the end of their sections. The [STATUS] lines of a split pipe apply to
+    # its first segment, which keeps its ID
+    # ------------------------------------
+    def writeInp(self, src, dst):
+        self.path = dst
+        section = None
+        added = {
+            "JUNCTIONS": [" {0:<16}\t{1:<12.6g}\t0           \t                \t;\n".format(id, el) for id, el, x, y in self.new_junctions],
+            "COORDINATES": [" {0:<16}\t{1:<16.2f}\t{2:<16.2f}\n".format(id, x, y) for id, el, x, y in self.new_junctions],
+            "PIPES": [" {0:<16}\t{1:<16}\t{2:<16}\t{3:<12.6g}\t{4:<12}\t{5:<12}\t{6:<12}\t{7:<6}\t;\n".format(
+                id, n1, n2, length, self.pipes[p].diameter, self.pipes[p].roughness, self.pipes[p].minorLoss, self.status(id, p)) for id, n1, n2, length, p in self.segments],
+        }
+        with open(src, 'r') as f_in, open(dst, 'w') as f_out:
+            for line in f_in:
+                tag = re.match(r'^\s*\[(\w+)\]', line)
+                if tag:
+                    if section in added:
+                        f_out.writelines(added.pop(section))
+                    section = tag.group(1).upper()
+                    if section == "END":
+                        self.writeMissing(f_out, added)
+                    f_out.write(line)
+                    continue
+                ls = line.split()
+                # Lines of the split pipes
+                if section in ("PIPES", "VERTICES") and ls and ls[0].isdigit() and int(ls[0]) in self.pipes:
+                    continue
+                f_out.write(line)
+            self.writeMissing(f_out, added)
+
+    # ------------------------------------
+    # Sections not found in the source INP
+    # ------------------------------------
+    def writeMissing(self, f_out, added):
+        for section, lines in added.items():
+            f_out.write("[{0}]\n".format(section))
+            f_out.writelines(lines)
+            f_out.write("\n")
+        added.clear()
@@ -0,0 +1,114 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : surrogate.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Surrogate of the leak simulations: pressure response of the sensors
+#                       calibrated on a few leaks by pipe, with an estimation of its error
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Native solver (lib/solver.py), sensors, calibration positions and flows
+# Output: Pressures of the sensors for batches of leaks (pipe, position, flow)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+POSITIONS = (0.05, 0.5, 0.95)       # Calibration positions of the leak (range of addLeaksMiddle)
+TOLERANCE = 0.05                    # Error accepted on a pressure (Epanet pressure unit)
+SAFETY = 2                          # Factor on the errors measured at the calibration
+
+# ------------------------------------
+# Surrogate class
+# For a pipe and a position, the response of the sensors is a * Q + b * Q^2 (fitted
+# on two flows), linear between two calibration positions
+# ------------------------------------
+class LeakSurrogate:
+    def __init__(self, solver, sensors, pipes, max_flow, positions=POSITIONS, tolerance=TOLERANCE):
+        self.solver = solver
+        self.sensors = [str(s) for s in sensors]
+        self.pipes = [int(p) for p in pipes]
+        self.pipe_index = {p: k for k, p in enumerate(self.pipes)}
+        self.max_flow = float(max_flow)
+        self.positions = np.asarray(sorted(positions), dtype=np.float64)
+        self.tolerance = tolerance
+        self.solves = 0
+        self.calibrate()
+
+    # ------------------------------------
+    # Pressures of the sensors for leaks solved by the native solver
+    # ------------------------------------
+    def solve(self, leaks):
+        self.solves += len(leaks)
+        return self.solver.leakSweep(leaks, self.sensors)
+
+    # ------------------------------------
+    # Calibration: base pressures, responses at two flows for every pipe and
+    # position, then errors on leaks between the calibration points
+    # ------------------------------------
+    def calibrate(self):
+        self.base = self.solver.pressures(indexes=self.solver.nodeIndexes(self.sensors))
+        f1, f2 = self.max_flow / 2, self.max_flow
+        n_pipe, n_pos, n_sensor = len(self.pipes), len(self.positions), len(self.sensors)
+        leaks = [(p, x, f) for p in self.pipes for x in self.positions for f in (f1, f2)]
+        d = (self.solve(leaks) - self.base).reshape(n_pipe, n_pos, 2, n_sensor)
+        d1, d2 = d[:, :, 0], d[:, :, 1]
+        den = f1 * f2 * (f2 - f1)
+        self.a = (d1 * f2 ** 2 - d2 * f1 ** 2) / den
+        self.b = (d2 * f1 - d1 * f2) / den
+
+        # -- Errors by pipe: positions between two calibration positions (max flow) and
+        # flow at a quarter of the max flow (middle calibration position) --
+        mid = (self.positions[:-1] + self.positions[1:]) / 2
+        x_mid = self.positions[n_pos // 2]
+        leaks = [(p, x, f2) for p in self.pipes for x in mid] + [(p, x_mid, f2 / 4) for p in self.pipes]
+        real = self.solve(leaks) - self.base
+        n_mid = len(mid)
+        pos = real[:n_pipe * n_mid].reshape(n_pipe, n_mid, n_sensor)
+        pred_pos = np.stack([self.predictDelta(np.arange(n_pipe), np.full(n_pipe, x), np.full(n_pipe, f2)) for x in mid], axis=1)
+        pred_flow = self.predictDelta(np.arange(n_pipe), np.full(n_pipe, x_mid), np.full(n_pipe, f2 / 4))
+        self.error_position = np.abs(pos - pred_pos).max(axis=(1, 2))
+        self.error_flow = np.abs(real[n_pipe * n_mid:] - pred_flow).max(axis=1)
+
+    # ------------------------------------
+    # Pressure response of the sensors (pipes given by their index in the surrogate)
+    # Return: matrix [leak, sensor]
+    # ------------------------------------
+    def predictDelta(self, k, coef, flow):
+        j = np.clip(np.searchsorted(self.positions, coef) - 1, 0, len(self.positions) - 2)
+        w = ((coef - self.positions[j]) / (self.positions[j + 1] - self.positions[j]))[:, None]
+        a = (1 - w) * self.a[k, j] + w * self.a[k, j + 1]
+        b = (1 - w) * self.b[k, j] + w * self.b[k, j + 1]
+        return a * flow[:, None] + b * flow[:, None] ** 2
+
+    # ------------------------------------
+    # Pressures of the sensors for a batch of leaks
+    # Return: pressures [leak, sensor], estimated error [leak] and trusted [leak] (within
+    # the calibrated range and error below the tolerance, else a real simulation is needed)
+    # ------------------------------------
+    def predict(self, pipes, coef, flow):
+        known = np.asarray([int(p) in self.pipe_index for p in pipes], dtype=bool)
+        k = np.asarray([self.pipe_index.get(int(p), 0) for p in pipes], dtype=np.int64)
+        coef = np.asarray(coef, dtype=np.float64)
+        flow = np.asarray(flow, dtype=np.float64)
+        pressures = self.base + self.predictDelta(k, coef, flow)
+        # Largest errors of the calibration (the solver error does not decrease with the flow)
+        error = SAFETY * (self.error_position[k] + self.error_flow[k])
+        trusted = known & (flow > 0) & (flow <= self.max_flow) & (coef >= self.positions[0]) & (coef <= self.positions[-1]) & (error <= self.tolerance)
+        return pressures, error, trusted
@@ -0,0 +1,102 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : sweep.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Batch of demand cases (junctions, demand) solved in parallel, every worker
+#                       keeps its solver session opened for all its cases
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Filepath (str) of the INP file, list of cases, nodes to read
+# Output: Matrix of pressures [case, node]
+# ********************************************************************************;
+
+# -----------------------------------------
+# Import
+# -----------------------------------------
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+
+import numpy as np
+
+from lib.session import SolverSession
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+CHUNK_SIZE = 64             # Cases solved by a worker for one task
+MAX_TASKS = 200             # Restart the workers regularly (Epanettools limitation)
+
+# Solver session of the worker process and its close (also run at the exit of a
+# worker recycled by maxtasksperchild)
+session = None
+closeSession = None
+
+# -----------------------------------------
+# Worker: open the network once
+# -----------------------------------------
+def initWorker(path, trials=None):
+    global session, closeSession
+    session = SolverSession(path, trials)
+    closeSession = Finalize(session, session.close, exitpriority=10)
+
+# -----------------------------------------
+# Worker: pressures of the nodes for a chunk of cases
+# Return: matrix [case, node]
+# -----------------------------------------
+def solveChunk(args):
+    cases, nodes, add, emitter, strict = args
+    idx = session.nodeIndexes(nodes)
+    rows = np.empty((len(cases), len(nodes)), dtype=np.float64)
+    for k, case in enumerate(cases):
+        try:
+            if isinstance(case, dict):
+                session.apply(case)         # Edit of the network (lib/families.py)
+            elif emitter:
+                session.setEmitters({j: case[1] for j in case[0]})
+            else:
+                session.setDemands({j: case[1] for j in case[0]}, add)
+            if session.solve() == 1 and strict:
+                rows[k] = np.nan        # Unbalanced solution
+            else:
+                session.pressures(idx, rows[k])
+        finally:
+            session.restore()
+    return rows
+
+# -----------------------------------------
+# Solve every case (list of junctions set to the demand, or increased by the
+# demand if add is set, or emitter coefficient of the junctions if emitter is set)
+# and read the pressures of the nodes. A case can also be an edit (dict: "demands",
+# "emitters", "links", see SolverSession.apply). If trials is given, it replaces the Trials of
+# the INP and the unbalanced cases are NaN
+# Return: matrix [case, node] in the pressure unit of Epanet
+# -----------------------------------------
+def sweep(path, cases, nodes, processes=None, add=0, emitter=0, trials=None):
+    nodes = [str(n) for n in nodes]
+    tasks = [(cases[i:i+CHUNK_SIZE], nodes, add, emitter, trials is not None) for i in range(0, len(cases), CHUNK_SIZE)]
+    if not tasks:
+        return np.empty((0, len(nodes)), dtype=np.float64)
+    if processes == 1:
+        initWorker(path, trials)
+        try:
+            results = [solveChunk(t) for t in tasks]
+        finally:
+            closeSession()
+    else:
+        with Pool(processes, initializer=initWorker, initargs=(path, trials), maxtasksperchild=MAX_TASKS) as pool:
+            results = pool.map(solveChunk, tasks)
+            pool.close()            # Workers exit normally and close their session
+            pool.join()
+    return np.vstack(results)
@@ -0,0 +1,115 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : synthetic.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Generate synthetic Epanet networks (grid or tree) of any size, with
+#                       coordinates, a reservoir and a file of sensors
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Kind of network ("grid" or "tree"), number of junctions, output paths
+# Output: INP file and CSV file of the sensors
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import math
+import random
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+PIPE_LENGTH = 500           # [ft]
+PIPE_DIAMETER = 12          # [in]
+ROUGHNESS = 100             # Hazen-Williams
+SENSOR_RATIO = 0.05         # Junctions with a sensor
+HEAD_MARGIN = 150           # Head of the reservoir above the highest junction
+
+# ------------------------------------
+# Topology of a grid: junctions on a square grid, pipes between neighbours
+# Return: coordinates by junction and list of pipes (node 1, node 2)
+# ------------------------------------
+def gridTopology(n):
+    side = int(math.ceil(math.sqrt(n)))
+    coor = {}
+    links = []
+    for k in range(n):
+        i, j = k // side, k % side
+        coor[k + 1] = (float(j * 10), float(i * 10))
+        if j > 0:
+            links.append((k, k + 1))
+        if i > 0:
+            links.append((k + 1 - side, k + 1))
+    return coor, links
+
+# ------------------------------------
+# Topology of a tree: every junction is connected to a random previous one,
+# placed around its parent
+# ------------------------------------
+def treeTopology(n, rnd):
+    coor = {1: (0.0, 0.0)}
+    links = []
+    for k in range(2, n + 1):
+        parent = rnd.randint(max(1, k - 50), k - 1)
+        angle = rnd.uniform(0, 2 * math.pi)
+        x, y = coor[parent]
+        coor[k] = (x + 10 * math.cos(angle), y + 10 * math.sin(angle))
+        links.append((parent, k))
+    return coor, links
+
+# ------------------------------------
+# Write the INP file of a synthetic network (junction 1 is fed by the reservoir)
+# Return: list of the sensors
+# ------------------------------------
+def writeNetwork(kind, n, path, sensors_path=None, demand=0, seed=0):
+    rnd = random.Random(seed)
+    if kind == "grid":
+        coor, links = gridTopology(n)
+    elif kind == "tree":
+        coor, links = treeTopology(n, rnd)
+    else:
+        raise ValueError("Unknown kind of network: {0}".format(kind))
+    # Smooth terrain
+    elevation = {k: int(100 + 20 * math.sin(x / 300.0) + 20 * math.cos(y / 300.0)) for k, (x, y) in coor.items()}
+    reservoir = 2 * n + 1   # addLeaksMiddle() numbers the leak junction n + 1
+    x1, y1 = coor[1]
+    coor[reservoir] = (x1 - 10, y1 - 10)
+    head = max(elevation.values()) + HEAD_MARGIN
+    sensors = sorted(rnd.sample(range(1, n + 1), max(1, int(n * SENSOR_RATIO))))
+
+    lines = ["[TITLE]", "Synthetic {0} network of {1} junctions".format(kind, n), ""]
+    lines += ["[JUNCTIONS]", ";ID              \tElev        \tDemand      \tPattern         "]
+    lines += [" {0}\t{1}\t{2}\t\t;".format(k, elevation[k], demand) for k in range(1, n + 1)]
+    lines += ["", "[RESERVOIRS]", ";ID              \tHead        \tPattern         "]
+    lines += [" {0}\t{1}\t\t;".format(reservoir, head)]
+    lines += ["", "[TANKS]", ";ID              \tElevation   \tInitLevel   \tMinLevel    \tMaxLevel    \tDiameter    \tMinVol      \tVolCurve"]
+    lines += ["", "[PIPES]", ";ID              \tNode1           \tNode2           \tLength      \tDiameter    \tRoughness   \tMinorLoss   \tStatus"]
+    lines += [" 1\t{0}\t1\t{1}\t{2}\t{3}\t0\tOpen\t;".format(reservoir, PIPE_LENGTH, PIPE_DIAMETER, ROUGHNESS)]
+    lines += [" {0}\t{1}\t{2}\t{3}\t{4}\t{5}\t0\tOpen\t;".format(p + 2, a, b, PIPE_LENGTH, PIPE_DIAMETER, ROUGHNESS) for p, (a, b) in enumerate(links)]
+    lines += ["", "[PUMPS]", ";ID              \tNode1           \tNode2           \tParameters"]
+    lines += ["", "[VALVES]", ";ID              \tNode1           \tNode2           \tDiameter    \tType\tSetting     \tMinorLoss   "]
+    lines += ["", "[DEMANDS]", ";Junction        \tDemand      \tPattern         \tCategory"]
+    lines += ["", "[STATUS]", ";ID              \tStatus/Setting"]
+    lines += ["", "[EMITTERS]", ";Junction        \tCoefficient"]
+    lines += ["", "[OPTIONS]", " Units              \tGPM", " Headloss           \tH-W", " Trials             \t200", " Accuracy           \t0.001", " Unbalanced         \tContinue 10"]
+    lines += ["", "[COORDINATES]", ";Node            \tX-Coord         \tY-Coord"]
+    lines += [" {0}\t{1:.2f}\t{2:.2f}".format(k, x, y) for k, (x, y) in sorted(coor.items())]
+    lines += ["", "[END]", ""]
+    with open(path, 'w') as f:
+        f.write("\n".join(lines))
+    if sensors_path is not None:
+        with open(sensors_path, 'w') as f:
+            f.write(",".join(str(s) for s in sensors) + "\n")
+    return sensors
@@ -0,0 +1,135 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : telemetry.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Live telemetry of a simulation run: throughput, coverage of the pipes,
+#                       failures and ETA, written as Prometheus metrics and a console status
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: Number of simulations of the run, IDs of the pipes, path of the metrics file
+# Output: Metrics file (Prometheus text format) and status line
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+# ------------------------------------
+# Constants
+# ------------------------------------
+METRICS_INTERVAL = 5        # Seconds between two updates of the metrics and status
+
+# ------------------------------------
+# Telemetry class
+# ------------------------------------
+class SimTelemetry:
+    def __init__(self, total, name, pipes, metrics_path, interval=METRICS_INTERVAL):
+        self.total = total
+        self.name = name
+        self.pipes = np.asarray(sorted(pipes), dtype=np.int64)     # IDs of the pipes to cover
+        self.metrics_path = metrics_path
+        self.interval = interval
+        self.start = time.time()
+        self.last = 0.0
+        self.done = 0
+        self.failures = 0
+
+    # ------------------------------------
+    # Count finished simulations (ok = 0 for a failure of the solver)
+    # ------------------------------------
+    def record(self, ok=1, count=1):
+        self.done += count
+        if not ok:
+            self.failures += count
+
+    def rate(self):
+        elapsed = time.time() - self.start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        rate = self.rate()
+        return (self.total - self.done) / rate if rate > 0 else float('inf')
+
+    # ------------------------------------
+    # Simulations of the pipes to cover (coverage: simulations by pipe ID)
+    # ------------------------------------
+    def pipesCoverage(self, coverage):
+        c = np.zeros(len(self.pipes), dtype=np.int64)
+        valid = self.pipes < len(coverage)
+        c[valid] = np.asarray(coverage)[self.pipes[valid]]
+        return c
+
+    # ------------------------------------
+    # Status line
+    # ------------------------------------
+    def status(self, coverage):
+        c = self.pipesCoverage(coverage)
+        eta = self.eta()
+        eta = str(datetime.timedelta(seconds=int(eta))) if eta != float('inf') else "-"
+        return "{0}/{1} sim | {2:.2f} sim/s | pipes covered {3}/{4} (min {5}) | failures {6} | ETA {7}".format(
+            self.done, self.total, self.rate(), int((c > 0).sum()), len(c), int(c.min()) if len(c) else 0, self.failures, eta)
+
+    # ------------------------------------
+    # Metrics in the Prometheus text format (file replaced atomically)
+    # ------------------------------------
+    def writeMetrics(self, coverage):
+        c = self.pipesCoverage(coverage)
+        label = '{{network="{0}"}}'.format(self.name)
+        eta = self.eta()
+        lines = []
+        for metric, type, value, help in [
+                ("epabstract_scenarios_total", "counter", self.done, "Simulations done"),
+                ("epabstract_scenarios_target", "gauge", self.total, "Simulations of the run"),
+                ("epabstract_solver_failures_total", "counter", self.failures, "Simulations failed"),
+                ("epabstract_scenarios_per_second", "gauge", self.rate(), "Throughput of the run"),
+                ("epabstract_eta_seconds", "gauge", eta if eta != float('inf') else -1, "Estimated time to the end"),
+                ("epabstract_pipes_covered", "gauge", int((c > 0).sum()), "Pipes simulated at least once"),
+                ("epabstract_pipe_coverage_min", "gauge", int(c.min()) if len(c) else 0, "Simulations of the least simulated pipe")]:
+            lines.append("# HELP {0} {1}".format(metric, help))
+            lines.append("# TYPE {0} {1}".format(metric, type))
+            lines.append("{0}{1} {2}".format(metric, label, value))
+        lines.append("# HELP epabstract_pipe_simulations Simulations by pipe")
+        lines.append("# TYPE epabstract_pipe_simulations counter")
+        for p, n in zip(self.pipes, c):
+            lines.append('epabstract_pipe_simulations{{network="{0}",pipe="{1}"}} {2}'.format(self.name, p, int(n)))
+        directory = os.path.dirname(self.metrics_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.metrics_path + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.metrics_path)
+
+    # ------------------------------------
+    # Periodic update of the metrics and of the status line
+    # ------------------------------------
+    def update(self, coverage, force=0):
+        now = time.time()
+        if not force and now - self.last < self.interval:
+            return
+        self.last = now
+        self.writeMetrics(coverage)
+        sys.stdout.write("\r" + self.status(coverage))
+        sys.stdout.flush()
+
+    def finish(self, coverage):
+        self.update(coverage, 1)
+        sys.stdout.write("\n")
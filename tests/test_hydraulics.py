@@ -0,0 +1,226 @@
+# ********************************************************************************;
+#  _____              __          __   _            __  __
+# |  __ \             \ \        / /  | |          |  \/  |
+# | |  | | ___  ___ _ _\ \  /\  / /_ _| |_ ___ _ __| \  / | ___  _ __
+# | |  | |/ _ \/ _ \ '_ \ \/  \/ / _` | __/ _ \ '__| |\/| |/ _ \| '_ \
+# | |__| |  __/  __/ |_) \  /\  / (_| | ||  __/ |  | |  | | (_) | | | |
+# |_____/ \___|\___| .__/ \/  \/ \__,_|\__\___|_|  |_|  |_|\___/|_| |_|
+#                  | |
+#                  |_|
+#
+# Project           : Master thesis - DeepWaterMon
+# Program name      : test_hydraulics.py
+# School            : HEIA-FR
+# Author            : DeepWaterMon contributors
+# Date created      : 19.10.2026
+# Purpose           : Hydraulic regression tests against Epanet 2.2 (library bundled in wntr)
+#                       on input.inp and Net1.inp (pump, tank)
+# Revision History  :
+# Date        Author      Ref    Revision
+#
+# Input: input.inp, Net1.inp of wntr
+# Output: pytest results (skipped without wntr)
+# ********************************************************************************;
+
+# ------------------------------------
+# Import
+# ------------------------------------
+import os
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INPUT = os.path.join(ROOT, "input.inp")
+INPUT_SENSORS = ["1", "2", "3", "5", "10", "15", "20", "25", "30"]
+NET1_SENSORS = ["11", "13", "22", "32"]
+
+wntr = pytest.importorskip("wntr")
+
+# ------------------------------------
+# input.inp with a closed pipe (in [STATUS]) and a check valve pipe (in [PIPES])
+# ------------------------------------
+STATUS_CLOSED = 3
+STATUS_CV = 15             # Loop pipe, the check valve changes the flows of the demand cases
+
+def withStatus(path, closed, cv):
+    lines = []
+    with open(INPUT, 'r') as f:
+        for line in f:
+            ls = line.split()
+            if ls and ls[0] == str(cv) and len(ls) > 7 and ls[7] == "Open":
+                line = line.replace("Open", "CV")
+            lines.append(line)
+            if line.startswith("[STATUS]"):
+                lines.append(" {0}\tClosed\n".format(closed))
+    with open(path, 'w') as f:
+        f.writelines(lines)
+    return str(path)
+
+# ------------------------------------
+# Fixtures: Epanet 2.2 sweep, networks with their sensors file, epabstract in a
+# temporary working directory
+# ------------------------------------
+@pytest.fixture(scope="module")
+def sweep22():
+    try:
+        from lib.epanet22 import sweep
+        sweep(INPUT, [([], 0)], INPUT_SENSORS, 1)
+    except OSError as e:
+        pytest.skip("Epanet 2.2 library not found ({0})".format(e))
+    return sweep
+
+@pytest.fixture
+def network(request, tmp_path, monkeypatch):
+    path, sensors = request.param
+    if path == "status":
+        path = withStatus(tmp_path / "status.inp", STATUS_CLOSED, STATUS_CV)
+    elif path == "tree":
+        from lib.synthetic import writeNetwork
+        path = str(tmp_path / "tree.inp")
+        writeNetwork("tree", 30, path, demand=1)
+        sensors = ["1"]
+    elif path == "Net1.inp":
+        path = os.path.join(os.path.dirname(wntr.__file__), "library", "networks", "Net1.inp")
+    cannes = tmp_path / "sensors.csv"
+    cannes.write_text(",".join(sensors) + "\n")
+    for directory in ("results/sim", "networks"):
+        (tmp_path / directory).mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    import epabstract
+    epabstract.configure(path, str(cannes))
+    epabstract.runSummary()
+    return epabstract, path, sensors
+
+NETWORKS = [(INPUT, INPUT_SENSORS), ("Net1.inp", NET1_SENSORS)]
+IDS = ["input", "Net1"]
+
+# ------------------------------------
+# Skeleton: the pumps and valves keep their end nodes, the reduced INP is solved by
+# Epanet with the pressures of the original network on the sensors
+# ------------------------------------
+@pytest.mark.parametrize("network", NETWORKS, indirect=True, ids=IDS)
+def test_skeleton(network, sweep22):
+    e, path, sensors = network
+    keep = e.leakPipes()[:2]
+    out_path, sk = e.skeletonize(keep_pipes=keep, out_path="networks/skeleton.inp", engine="epanet22")
+    for p in e.ef.pumps.values():
+        assert str(p.node2) in sk.junctions or str(p.node2) not in e.ef.junctions
+        assert str(p.node1) in sk.junctions or str(p.node1) not in e.ef.junctions
+    ref = sweep22(path, [([], 0)], sensors, 1)
+    reduced = sweep22(out_path, [([], 0)], sensors, 1)
+    assert np.abs(e.convertUnit("pressure", reduced - ref)).max() <= 0.01
+
+@pytest.mark.parametrize("network", NETWORKS[1:], indirect=True, ids=IDS[1:])
+def test_pumps_parsed(network):
+    e, path, sensors = network
+    assert {id: (p.node1, p.node2, p.parameters) for id, p in e.ef.pumps.items()} == {"9": ("9", "10", "HEAD 1")}
+
+# ------------------------------------
+# Native solver: same pressures as Epanet 2.2 on the sensors (without leak, demand
+# on every sensor, leak on every leak pipe of the super-network), refused on the
+# networks with a pump
+# ------------------------------------
+@pytest.mark.parametrize("network", NETWORKS[:1], indirect=True, ids=IDS[:1])
+def test_native_solver(network, sweep22):
+    e, path, sensors = network
+    from lib.solver import TOLERANCE
+    assert e.checkNativeSolver(supernet=e.superNetwork(), engine="epanet22") <= TOLERANCE
+
+@pytest.mark.parametrize("network", NETWORKS[1:], indirect=True, ids=IDS[1:])
+def test_native_solver_pumps(network):
+    e, path, sensors = network
+    assert e.nativeUnsupported() == ["1 pumps"]
+    with pytest.raises(ValueError, match="pumps"):
+        e.nativeSolver()
+
+# ------------------------------------
+# Super-network: without leak demand, the split network has the pressures of the
+# original one, also with a closed (in [STATUS]) and a check valve leak pipe
+# ------------------------------------
+NETWORKS_STATUS = NETWORKS + [("status", INPUT_SENSORS)]
+
+@pytest.mark.parametrize("network", NETWORKS_STATUS, indirect=True, ids=IDS + ["status"])
+def test_supernet(network, sweep22):
+    e, path, sensors = network
+    from lib.supernet import TRIALS
+    net = e.superNetwork(out_path="networks/super.inp")
+    if path.endswith("status.inp"):
+        assert STATUS_CLOSED in net.pipes and STATUS_CV in net.pipes
+    cases = [([], 0)] + [([s], 10) for s in sensors]
+    ref = sweep22(path, cases, sensors, 1, trials=TRIALS)
+    split = sweep22(net.path, cases, sensors, 1, trials=TRIALS)
+    # The cases unbalanced in TRIALS on the split network are simulated again by sim_data()
+    assert not np.isnan(ref).any() and not np.isnan(split[0]).any()
+    converged = ~np.isnan(split).any(axis=1)
+    assert np.abs(e.convertUnit("pressure", split - ref))[converged].max() <= 1e-6
+
+# ------------------------------------
+# Closures: the pipes found disconnecting are the ones whose closure leaves nodes
+# without pressure in Epanet 2.2, a closure is undone by the restore of the project
+# ------------------------------------
+@pytest.mark.parametrize("network", NETWORKS + [("tree", [])], indirect=True, ids=IDS + ["tree"])
+def test_closures(network, sweep22):
+    e, path, sensors = network
+    from lib.families import EN_INITSTATUS, disconnecting
+    from lib.supernet import TRIALS
+    ef = e.ef
+    opened = [(p, v.node1, v.node2) for p, v in ef.pipes.items() if str(v.status).upper() != "CLOSED"]
+    opened += [(id, v.node1, v.node2) for id, v in ef.pumps.items()]
+    cut = disconnecting(opened, list(ef.reservoirs) + list(ef.tanks))
+    # A demand on every junction, a disconnected one has no pressure (input.inp has none)
+    pipes = sorted(ef.pipes)
+    nodes = list(ef.junctions)
+    demands = {j: 1 for j in nodes}
+    cases = [{"demands": demands, "links": {p: {EN_INITSTATUS: 0}}} for p in pipes]
+    base = {"demands": demands}
+    pressures = sweep22(path, [base] + cases + [base], nodes, 1, trials=TRIALS)
+    # The next solution starts from the flows of the previous one (accuracy of Epanet)
+    assert np.abs(e.convertUnit("pressure", pressures[-1] - pressures[0])).max() <= 1e-3
+    assert set(p for p, row in zip(pipes, pressures[1:-1]) if np.nanmin(row) < -1e4) == cut
+    if path.endswith("tree.inp"):
+        assert cut == set(pipes)
+
+@pytest.mark.parametrize("network", [("tree", [])], indirect=True, ids=["tree"])
+def test_closures_failed(network, sweep22, capsys):
+    e, path, sensors = network
+    e.ef.sim_data(family="closure", processes=1, engine="epanet22")
+    assert "({0} failed), 0 closure scenarios".format(len(e.ef.pipes)) in capsys.readouterr().out
+    assert not os.path.exists(e.RESULT_PATH)
+
+# ------------------------------------
+# Demand uncertainty with Epanet 2.2: the base demands are read by its projects,
+# lib/session.py (epanettools) is not imported
+# ------------------------------------
+@pytest.mark.parametrize("network", NETWORKS[1:], indirect=True, ids=IDS[1:])
+def test_montecarlo_epanet22(network, sweep22, monkeypatch):
+    e, path, sensors = network
+    import sys
+    monkeypatch.setitem(sys.modules, "lib.session", None)
+    e.configure(path, "sensors.csv", montecarlo=2, seed=1)
+    e.runSummary()
+    e.ef.sim_data(processes=1, engine="epanet22")
+    assert e.ef.sim_cnt == 2 * len(e.ef.pipes) * e.SIM_RATIO
+    with open(e.RESULT_PATH, 'r') as f:
+        assert len(f.readlines()) == e.ef.sim_cnt + 1
+
+# ------------------------------------
+# Parse cache: reset() copies the parsed network instead of parsing the INP again,
+# the leak added by addLeaksMiddle does not modify the cached objects
+# ------------------------------------
+@pytest.mark.parametrize("network", NETWORKS[:1], indirect=True, ids=IDS[:1])
+def test_reset_cached(network, monkeypatch):
+    e, path, sensors = network
+    e.reset()
+    pipes = {p: (v.node1, v.node2, v.length) for p, v in e.ef.pipes.items()}
+    junctions, id_max = set(e.ef.junctions), (e.Junction.id_max, e.Pipe.id_max)
+    def parse():
+        raise AssertionError("INP parsed again")
+    monkeypatch.setattr(e, "saveJunctions", parse)
+    for pipe in e.leakPipes()[:3]:
+        e.reset()
+        e.addLeaksMiddle(5, 0.3, 1, pipe=pipe)
+        assert e.ef.pipes[pipe].node2 not in junctions
+    e.reset()
+    assert {p: (v.node1, v.node2, v.length) for p, v in e.ef.pipes.items()} == pipes
+    assert set(e.ef.junctions) == junctions and (e.Junction.id_max, e.Pipe.id_max) == id_max